@@ -196,11 +196,13 @@ async def add_sre_to_character(
             skill_ranks_now = {
                 name: data.get("rank", 0) for name, data in skills.items()
             }
+            skill_ranks_before = dict(skill_ranks_now)
+            skill_ranks_before[sre_request.skill_name] = new_rank - 1
             # --- END REFACTOR ---
 
-            # This returns a list of dictionaries, e.g., [{"name": "...", "source": "...", "effect": "..."}]
-            all_eligible_talents_raw = await services.get_eligible_talents(
-                char_stats, skill_ranks_now
+            # Only the talents this rank-up crossed, e.g. [{"name": "...", "source": "...", "effect": "..."}]
+            all_eligible_talents_raw = await services.get_unlocked_talents(
+                char_stats, skill_ranks_before, skill_ranks_now
             )
 
             # --- REFACTOR START ---
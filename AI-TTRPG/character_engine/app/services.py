@@ -145,6 +145,18 @@ async def get_eligible_talents(
     return await _call_rules_engine(
         "POST", "/lookup/talents", json_data=request_data
     )
+async def get_unlocked_talents(
+    stats: Dict[str, int], old_skills: Dict[str, int], new_skills: Dict[str, int]
+) -> List[Dict]:
+    """Fetches only the talents a change in skill ranks unlocks from the Rules Engine."""
+    request_data = {
+        "before": {"stats": stats, "skills": old_skills},
+        "after": {"stats": stats, "skills": new_skills},
+    }
+    response = await _call_rules_engine(
+        "POST", "/lookup/talents/unlocked", json_data=request_data
+    )
+    return response.get("unlocked", [])
 async def _get_rules_engine_data() -> Dict[str, Any]:
     """
     Fetches all necessary data from the rules_engine service asynchronously.
@@ -0,0 +1,110 @@
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Budget units the solver works in; power ratings are rounded to this grid
+BUDGET_RESOLUTION = 256
+
+# Fraction of the party's power an encounter of each difficulty should reach
+DIFFICULTY_BUDGETS: Dict[str, float] = {
+    "easy": 0.5,
+    "medium": 0.75,
+    "hard": 1.0,
+    "deadly": 1.5,
+}
+
+def _pieces(limit: int) -> List[int]:
+    """
+    Splits 'up to `limit` copies' into pieces 1, 2, 4, ... plus a remainder.
+    Any count from 0 to `limit` is a sum of a subset of the pieces, so a
+    bounded item becomes a handful of 0/1 items.
+    """
+    pieces, size = [], 1
+    while limit > 0:
+        take = min(size, limit)
+        pieces.append(take)
+        limit -= take
+        size *= 2
+    return pieces
+
+def compose_encounter(
+    powers: Dict[str, float],
+    budget: float,
+    tolerance: float = 0.1,
+    min_npcs: int = 1,
+    max_npcs: int = 8,
+    max_per_template: Optional[int] = None,
+    rng: Optional[random.Random] = None
+) -> Optional[Dict]:
+    """
+    Picks NPC templates whose power ratings add up as close to `budget` as
+    possible without going over budget * (1 + tolerance): a bounded knapsack
+    over (number of NPCs, power) solved by dynamic programming.
+
+    Power is rounded to BUDGET_RESOLUTION units of the upper limit, so one
+    pass costs O(pieces * max_npcs * BUDGET_RESOLUTION) regardless of the
+    ratings, and each piece is one vectorised shift-and-OR of the reachable
+    states. Pieces are visited in a random order and ties between equally
+    close totals are broken at random, so the same request can produce
+    different (equally fitting) groups.
+
+    Returns {"npcs": [template IDs], "total_power": float,
+    "within_tolerance": bool}, or None if no group of at least
+    `min_npcs` fits under the upper limit.
+    """
+    rng = rng or random.Random()
+    limit = budget * (1 + tolerance)
+    if budget <= 0 or max_npcs < max(min_npcs, 1):
+        return None
+    unit = limit / BUDGET_RESOLUTION
+    per_template = max_per_template if max_per_template is not None else max_npcs
+
+    # --- 1. Bounded items -> 0/1 pieces of (template, copies, cost) ---
+    pieces: List[Tuple[str, int, int]] = []
+    for template_id, power in powers.items():
+        if power <= 0 or power > limit:
+            continue
+        cost = max(1, int(round(power / unit)))
+        copies = min(per_template, max_npcs, BUDGET_RESOLUTION // cost)
+        pieces.extend((template_id, size, cost * size) for size in _pieces(copies))
+    rng.shuffle(pieces)
+
+    # --- 2. reachable[n, c]: some group of n NPCs costs exactly c units ---
+    reachable = np.zeros((max_npcs + 1, BUDGET_RESOLUTION + 1), dtype=bool)
+    reachable[0, 0] = True
+    took = np.zeros((len(pieces), max_npcs + 1, BUDGET_RESOLUTION + 1), dtype=bool)
+    for i, (_, size, cost) in enumerate(pieces):
+        if size > max_npcs or cost > BUDGET_RESOLUTION:
+            continue
+        shifted = np.zeros_like(reachable)
+        shifted[size:, cost:] = reachable[:max_npcs + 1 - size, :BUDGET_RESOLUTION + 1 - cost]
+        took[i] = shifted & ~reachable # States first reached by taking this piece
+        reachable |= shifted
+
+    # --- 3. The reachable state closest to the budget ---
+    reachable[:max(min_npcs, 1)] = False
+    counts, costs = np.nonzero(reachable)
+    if len(costs) == 0:
+        return None
+    target = budget / unit
+    gaps = np.abs(costs - target)
+    best = np.flatnonzero(gaps <= gaps.min() + 1e-9)
+    choice = best[rng.randrange(len(best))]
+    n, c = int(counts[choice]), int(costs[choice])
+
+    # --- 4. Walk the pieces backwards to recover the group ---
+    npcs: List[str] = []
+    for i in range(len(pieces) - 1, -1, -1):
+        if took[i, n, c]:
+            template_id, size, cost = pieces[i]
+            npcs.extend([template_id] * size)
+            n, c = n - size, c - cost
+    npcs.sort()
+
+    total_power = sum(powers[template_id] for template_id in npcs)
+    return {
+        "npcs": npcs,
+        "total_power": round(total_power, 3),
+        "within_tolerance": abs(total_power - budget) <= budget * tolerance,
+    }
@@ -1,40 +1,216 @@
+import os
 import random
-from typing import List, Dict, Any, Optional, Union
+import threading
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Union, Deque, Mapping, Tuple
 from . import data_loader # To access the loaded data
 from . import models
+from .sampling import AliasTable, sample_without_replacement
 
-def find_matching_encounter(
-    requested_tags: List[str]
-) -> Optional[Dict[str, Any]]:
+# --- Configuration ---
+ENCOUNTER_RECENT_LIMIT = int(os.getenv("ENCOUNTER_RECENT_LIMIT", "10")) # Encounter IDs remembered per campaign
+ENCOUNTER_RECENT_CAMPAIGNS = int(os.getenv("ENCOUNTER_RECENT_CAMPAIGNS", "1024")) # Campaigns remembered at once
+ALIAS_TABLE_LIMIT = 256 # Cached alias tables (per match set and data version)
+
+def _matching_positions(
+    requested_tags: List[str],
+    snapshot: data_loader.EncounterSnapshot
+) -> List[int]:
     """
-    Finds a random encounter that matches ALL of the requested tags.
+    Positions in the snapshot's all_encounters of every encounter that has
+    ALL of the requested tags, in catalogue order.
     """
     # Create a set for fast lookup
     tag_set = set(t.lower() for t in requested_tags)
+    if not tag_set:
+        return list(range(len(snapshot.all_encounters)))
 
-    # --- 1. Combine all encounter lists ---
-    # We can add social encounters, etc., to this list later
-    all_encounters = (
-        data_loader.COMBAT_ENCOUNTERS +
-        data_loader.SKILL_ENCOUNTERS
-    )
+    # --- 1. Look up each tag's posting set ---
+    postings = []
+    for tag in tag_set:
+        positions = snapshot.tag_index.get(tag)
+        if not positions:
+            return [] # No encounter has this tag
+        postings.append(positions)
 
-    # --- 2. Find all matches ---
-    matches = []
-    for encounter in all_encounters:
-        # Create a set of the encounter's tags
-        encounter_tags = set(t.lower() for t in encounter.get('tags', []))
+    # --- 2. Intersect, smallest set first ---
+    postings.sort(key=len)
+    matches = set(postings[0])
+    for positions in postings[1:]:
+        matches &= positions
+        if not matches:
+            return []
 
-        # Check if all requested tags are in this encounter's tags
-        if tag_set.issubset(encounter_tags):
-            matches.append(encounter)
+    return sorted(matches)
 
-    # --- 3. Pick one at random ---
+def find_matching_encounters(
+    requested_tags: List[str],
+    snapshot: Optional[data_loader.EncounterSnapshot] = None
+) -> List[Dict[str, Any]]:
+    """
+    Finds every encounter that has ALL of the requested tags,
+    in catalogue order. Searches the current data snapshot unless one is given.
+    """
+    snapshot = snapshot or data_loader.get_snapshot()
+    return [snapshot.all_encounters[p] for p in _matching_positions(requested_tags, snapshot)]
+
+def find_matching_encounter(
+    requested_tags: List[str],
+    snapshot: Optional[data_loader.EncounterSnapshot] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Finds a random encounter that matches ALL of the requested tags.
+    """
+    matches = find_matching_encounters(requested_tags, snapshot)
+
+    # --- Pick one at random ---
     if not matches:
         return None
 
     return random.choice(matches)
 
+# --- Recently Used Encounters ---
+# campaign_id -> the IDs of its last ENCOUNTER_RECENT_LIMIT encounters.
+# Campaigns are evicted least recently used first.
+_RECENT_ENCOUNTERS: "OrderedDict[str, Deque[str]]" = OrderedDict()
+_RECENT_LOCK = threading.Lock()
+
+def recent_encounters(campaign_id: str) -> List[str]:
+    with _RECENT_LOCK:
+        return list(_RECENT_ENCOUNTERS.get(campaign_id, ()))
+
+def remember_encounters(campaign_id: str, encounter_ids: List[str]):
+    with _RECENT_LOCK:
+        history = _RECENT_ENCOUNTERS.pop(campaign_id, None)
+        if history is None:
+            history = deque(maxlen=ENCOUNTER_RECENT_LIMIT)
+        history.extend(encounter_ids)
+        _RECENT_ENCOUNTERS[campaign_id] = history
+        while len(_RECENT_ENCOUNTERS) > ENCOUNTER_RECENT_CAMPAIGNS:
+            _RECENT_ENCOUNTERS.popitem(last=False)
+
+# --- Batch Selection ---
+# (data version, match positions) -> AliasTable, least recently used evicted first.
+# Keying on the version means tables built for older data simply age out.
+_ALIAS_TABLES: "OrderedDict[Tuple[str, Tuple[int, ...]], AliasTable]" = OrderedDict()
+_ALIAS_LOCK = threading.Lock()
+
+def _alias_table(positions: List[int], snapshot: data_loader.EncounterSnapshot) -> AliasTable:
+    """Alias table over the snapshot's weights for these positions, built once and cached."""
+    key = (snapshot.version, tuple(positions))
+    with _ALIAS_LOCK:
+        table = _ALIAS_TABLES.get(key)
+        if table is not None:
+            _ALIAS_TABLES.move_to_end(key)
+            return table
+    table = AliasTable([snapshot.weights[p] for p in positions])
+    with _ALIAS_LOCK:
+        _ALIAS_TABLES[key] = table
+        while len(_ALIAS_TABLES) > ALIAS_TABLE_LIMIT:
+            _ALIAS_TABLES.popitem(last=False)
+    return table
+
+def select_encounters(
+    requested_tags: List[str],
+    count: int,
+    weights: Optional[Dict[str, float]] = None,
+    rarity: Optional[Dict[str, str]] = None,
+    unique: bool = False,
+    campaign_id: Optional[str] = None,
+    exclude_recent: bool = True,
+    rng: Optional[random.Random] = None,
+    snapshot: Optional[data_loader.EncounterSnapshot] = None
+) -> Dict[str, Any]:
+    """
+    Picks `count` encounters matching ALL of the requested tags, weighted by
+    each encounter's weight/rarity unless `weights` or `rarity` (keyed by
+    encounter ID) override it. With `unique`, no encounter is picked twice,
+    so fewer than `count` may come back.
+
+    With a campaign_id, that campaign's recently used encounters are
+    skipped while anything else matches, and the picks are remembered.
+    Returns {"encounters": [...], "matched": n, "recent_excluded": [ids]}.
+    Raises ValueError for an unknown rarity.
+    """
+    rng = rng or random.Random()
+    snapshot = snapshot or data_loader.get_snapshot()
+    positions = _matching_positions(requested_tags, snapshot)
+    encounters = snapshot.all_encounters
+
+    # --- 1. Weights, with per-request overrides ---
+    overridden = bool(weights or rarity)
+    if overridden:
+        weights, rarity = weights or {}, rarity or {}
+        for name in rarity.values():
+            data_loader.encounter_weight({}, name) # Rejects unknown rarities up front
+        def weight_of(p: int) -> float:
+            encounter_id = encounters[p].get('id')
+            if encounter_id in weights:
+                return max(0.0, float(weights[encounter_id]))
+            if encounter_id in rarity:
+                return data_loader.encounter_weight(encounters[p], rarity[encounter_id])
+            return snapshot.weights[p]
+    else:
+        def weight_of(p: int) -> float:
+            return snapshot.weights[p]
+    candidates = [p for p in positions if weight_of(p) > 0]
+    matched = len(candidates)
+
+    # --- 2. Skip the campaign's recent encounters, unless that leaves nothing ---
+    excluded: List[str] = []
+    if campaign_id and exclude_recent and candidates:
+        recent = set(recent_encounters(campaign_id))
+        fresh = [p for p in candidates if encounters[p].get('id') not in recent]
+        if fresh:
+            excluded = [encounters[p].get('id') for p in candidates if encounters[p].get('id') in recent]
+            candidates = fresh
+
+    # --- 3. Sample ---
+    picks: List[int] = []
+    if candidates and count > 0:
+        if unique:
+            picks = sample_without_replacement([weight_of(p) for p in candidates], count, rng)
+        elif overridden:
+            picks = AliasTable([weight_of(p) for p in candidates]).sample(rng, count)
+        else:
+            picks = _alias_table(candidates, snapshot).sample(rng, count)
+    chosen = [encounters[candidates[i]] for i in picks]
+
+    if campaign_id and chosen:
+        remember_encounters(campaign_id, [encounter.get('id') for encounter in chosen])
+    return {"encounters": chosen, "matched": matched, "recent_excluded": excluded}
+
+# --- Budgeted Encounters ---
+def budget_candidates(
+    requested_tags: List[str],
+    template_ids: Optional[List[str]],
+    ratings: Mapping[str, float],
+    snapshot: Optional[data_loader.EncounterSnapshot] = None
+) -> Tuple[Dict[str, float], List[str]]:
+    """
+    NPC templates a budgeted encounter may use: `template_ids` if given,
+    else every NPC spawned by the encounters matching the tags, else every
+    rated template. Returns (template ID -> power, requested IDs that have
+    no rating).
+    """
+    if template_ids is None and requested_tags:
+        template_ids = [
+            template_id
+            for encounter in find_matching_encounters(requested_tags, snapshot)
+            for template_id in encounter.get('npcs_to_spawn', [])
+        ]
+    if template_ids is None:
+        return dict(ratings), []
+
+    candidates: Dict[str, float] = {}
+    unrated: List[str] = []
+    for template_id in dict.fromkeys(template_ids): # Unique, in order
+        if template_id in ratings:
+            candidates[template_id] = ratings[template_id]
+        else:
+            unrated.append(template_id)
+    return candidates, unrated
+
 def build_encounter_response(
     encounter_data: Dict[str, Any]
 ) -> Union[models.CombatEncounterResponse, models.SkillEncounterResponse]:
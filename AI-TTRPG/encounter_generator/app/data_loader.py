@@ -1,41 +1,238 @@
+import asyncio
+import hashlib
 import json
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import List, Dict, Any, FrozenSet, Mapping, Optional, Tuple
 
-# Global variables to hold our loaded data
-COMBAT_ENCOUNTERS: List[Dict[str, Any]] = []
-SKILL_ENCOUNTERS: List[Dict[str, Any]] = []
+from pydantic import ValidationError
 
-def load_all_data():
+from . import models
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+COMBAT_FILE = 'combat_encounters.json'
+SKILL_FILE = 'skill_challenges.json'
+
+# Seconds between data file checks when watching for changes; 0 disables watching
+ENCOUNTER_DATA_WATCH_INTERVAL = float(os.getenv("ENCOUNTER_DATA_WATCH_INTERVAL", "0"))
+
+# Sampling weight for an encounter's optional 'rarity'; an explicit 'weight' wins
+RARITY_WEIGHTS: Dict[str, float] = {
+    "common": 1.0,
+    "uncommon": 0.5,
+    "rare": 0.2,
+    "very_rare": 0.1,
+    "legendary": 0.05,
+}
+
+class DataValidationError(ValueError):
+    """Raised when the encounter files parse but contain unusable encounters."""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid encounter data: " + "; ".join(problems))
+
+@dataclass(frozen=True)
+class EncounterSnapshot:
     """
-    Loads all encounter JSON files from the 'data' directory
-    into the global variables.
+    One immutable, fully indexed version of the encounter files.
+
+    A request takes the current snapshot once and uses it throughout, so a
+    reload never changes data under an in-flight request. The containers
+    are read-only; the encounter dicts inside were parsed for this snapshot
+    alone and must not be mutated either.
+    """
+    version: str = "empty" # Content hash of both files
+    loaded_at: float = 0.0
+    combat_encounters: Tuple[Dict[str, Any], ...] = ()
+    skill_encounters: Tuple[Dict[str, Any], ...] = ()
+    all_encounters: Tuple[Dict[str, Any], ...] = () # Every encounter type, combat first
+    # lowercase tag -> positions in all_encounters
+    tag_index: Mapping[str, FrozenSet[int]] = field(default_factory=lambda: MappingProxyType({}))
+    weights: Tuple[float, ...] = () # Sampling weight per position in all_encounters
+
+# The current snapshot. Replaced, never mutated, so swapping it is atomic.
+_SNAPSHOT = EncounterSnapshot()
+_RELOAD_LOCK = threading.Lock()
+
+def get_snapshot() -> EncounterSnapshot:
+    return _SNAPSHOT
+
+def install_snapshot(snapshot: EncounterSnapshot) -> EncounterSnapshot:
+    """Makes `snapshot` current and returns the one it replaced."""
+    global _SNAPSHOT
+    previous, _SNAPSHOT = _SNAPSHOT, snapshot
+    return previous
+
+def encounter_weight(encounter: Dict[str, Any], rarity: Optional[str] = None) -> float:
+    """
+    Sampling weight from an explicit 'weight', else from 'rarity' (see RARITY_WEIGHTS).
+    Encounters with neither are common.
     """
-    global COMBAT_ENCOUNTERS, SKILL_ENCOUNTERS
+    if rarity is None and encounter.get('weight') is not None:
+        return max(0.0, float(encounter['weight']))
+    rarity = (rarity or encounter.get('rarity') or 'common').lower()
+    if rarity not in RARITY_WEIGHTS:
+        raise ValueError(f"Unknown rarity '{rarity}'. Use one of: {', '.join(RARITY_WEIGHTS)}.")
+    return RARITY_WEIGHTS[rarity]
 
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
+# --- Validation ---
+def validate_encounters(combat: Any, skill: Any):
+    """
+    Checks every encounter against the response model it will be served as,
+    plus unique IDs, string tags and a valid weight or rarity.
+    Raises DataValidationError listing every problem.
+    """
+    problems: List[str] = []
+    seen_ids = set()
+    # Defaults match the ones core.build_encounter_response fills in
+    checks = (
+        (COMBAT_FILE, combat, models.CombatEncounterResponse, {"npcs_to_spawn": []}),
+        (SKILL_FILE, skill, models.SkillEncounterResponse, {"success_threshold": 1, "stages": []}),
+    )
+    for filename, encounters, model, defaults in checks:
+        if not isinstance(encounters, list):
+            problems.append(f"{filename} must be a list of encounters")
+            continue
+        for position, encounter in enumerate(encounters):
+            if not isinstance(encounter, dict):
+                problems.append(f"{filename} entry #{position} must be an object")
+                continue
+            label = encounter.get('id') or f"{filename} entry #{position}"
+            try:
+                model(**{**defaults, **encounter})
+            except ValidationError as e:
+                fields = ", ".join(".".join(str(p) for p in error["loc"]) for error in e.errors())
+                problems.append(f"encounter '{label}' has invalid fields: {fields}")
+            if encounter.get('id') in seen_ids:
+                problems.append(f"encounter ID '{label}' is used twice")
+            seen_ids.add(encounter.get('id'))
+            tags = encounter.get('tags', [])
+            if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+                problems.append(f"encounter '{label}' tags must be a list of strings")
+            try:
+                weight = encounter.get('weight')
+                if weight is not None and (isinstance(weight, bool) or float(weight) < 0):
+                    raise ValueError("weight must be a non-negative number")
+                encounter_weight(encounter)
+            except (TypeError, ValueError) as e:
+                problems.append(f"encounter '{label}': {e}")
 
+    if problems:
+        raise DataValidationError(problems)
+
+# --- Building ---
+def build_snapshot(combat: List[Dict[str, Any]], skill: List[Dict[str, Any]],
+                   version: Optional[str] = None) -> EncounterSnapshot:
+    """
+    Validates parsed encounters and builds a new snapshot without touching
+    the current one: the combined list and the tag -> positions inverted
+    index, so matching intersects a few posting sets instead of scanning
+    every encounter.
+    """
+    validate_encounters(combat, skill)
+    if version is None:
+        content = json.dumps([combat, skill], sort_keys=True).encode("utf-8")
+        version = hashlib.sha256(content).hexdigest()[:16]
+
+    # We can add social encounters, etc., to this list later
+    all_encounters = tuple(combat) + tuple(skill)
+    postings: Dict[str, set] = {}
+    for position, encounter in enumerate(all_encounters):
+        for tag in set(t.lower() for t in encounter.get('tags', [])):
+            postings.setdefault(tag, set()).add(position)
+
+    return EncounterSnapshot(
+        version=version,
+        loaded_at=time.time(),
+        combat_encounters=tuple(combat),
+        skill_encounters=tuple(skill),
+        all_encounters=all_encounters,
+        tag_index=MappingProxyType({tag: frozenset(positions) for tag, positions in postings.items()}),
+        weights=tuple(encounter_weight(encounter) for encounter in all_encounters),
+    )
+
+def read_snapshot(data_dir: Optional[str] = None) -> EncounterSnapshot:
+    """Parses, validates and indexes the encounter files into a new snapshot."""
+    data_dir = data_dir or DATA_DIR
+    with open(os.path.join(data_dir, COMBAT_FILE), 'r') as f:
+        combat = json.load(f)
+    with open(os.path.join(data_dir, SKILL_FILE), 'r') as f:
+        skill = json.load(f)
+    return build_snapshot(combat, skill)
+
+# --- Loading ---
+def load_all_data(data_dir: Optional[str] = None) -> EncounterSnapshot:
+    """
+    Loads all encounter JSON files from the 'data' directory
+    and makes them the current snapshot.
+    """
     print("--- Encounter Generator: Loading Data ---")
 
     try:
-        # Load Combat Encounters
-        combat_file = os.path.join(DATA_DIR, 'combat_encounters.json')
-        with open(combat_file, 'r') as f:
-            COMBAT_ENCOUNTERS = json.load(f)
-        print(f"Loaded {len(COMBAT_ENCOUNTERS)} combat encounters.")
-
-        # Load Skill Encounters
-        skill_file = os.path.join(DATA_DIR, 'skill_challenges.json')
-        with open(skill_file, 'r') as f:
-            SKILL_ENCOUNTERS = json.load(f)
-        print(f"Loaded {len(SKILL_ENCOUNTERS)} skill challenges.")
-
+        snapshot = read_snapshot(data_dir)
     except FileNotFoundError as e:
         print(f"FATAL ERROR: Data file not found: {e.filename}")
         raise
     except json.JSONDecodeError as e:
         print(f"FATAL ERROR: Failed to decode JSON from {e.doc}")
         raise
+    except DataValidationError as e:
+        print(f"FATAL ERROR: {e}")
+        raise
+
+    with _RELOAD_LOCK:
+        install_snapshot(snapshot)
+    print(f"Loaded {len(snapshot.combat_encounters)} combat encounters.")
+    print(f"Loaded {len(snapshot.skill_encounters)} skill challenges.")
+    print("--- Encounter Generator: Data Loaded ---")
+    return snapshot
+
+def reload_data(data_dir: Optional[str] = None) -> Tuple[EncounterSnapshot, bool]:
+    """
+    Rebuilds the snapshot off to the side and swaps it in only if it is
+    valid and its content changed. Returns (current snapshot, changed).
+    Raises (keeping the current snapshot) if the files are missing or invalid.
+    """
+    with _RELOAD_LOCK: # One reload at a time; readers never wait
+        snapshot = read_snapshot(data_dir)
+        if snapshot.version == _SNAPSHOT.version:
+            return _SNAPSHOT, False
+        previous = install_snapshot(snapshot)
+    print(f"INFO: Encounter data reloaded: version {previous.version} -> {snapshot.version}.")
+    return snapshot, True
+
+# --- Watching ---
+def data_files_signature(data_dir: Optional[str] = None) -> Tuple[Tuple[int, int], ...]:
+    """(mtime_ns, size) of each data file; missing files count as (0, 0)."""
+    data_dir = data_dir or DATA_DIR
+    signature = []
+    for filename in (COMBAT_FILE, SKILL_FILE):
+        try:
+            stat = os.stat(os.path.join(data_dir, filename))
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((0, 0))
+    return tuple(signature)
 
-    print("--- Encounter Generator: Data Loaded ---")
\ No newline at end of file
+async def watch_data_files(interval: float = ENCOUNTER_DATA_WATCH_INTERVAL, data_dir: Optional[str] = None):
+    """
+    Polls the encounter files and reloads when they change. Parsing runs in
+    a thread so the event loop keeps serving; invalid edits are reported and
+    the current snapshot stays in place until the files are fixed.
+    """
+    loop = asyncio.get_running_loop()
+    seen = data_files_signature(data_dir)
+    while True:
+        await asyncio.sleep(interval)
+        current = data_files_signature(data_dir)
+        if current == seen:
+            continue
+        seen = current
+        try:
+            await loop.run_in_executor(None, reload_data, data_dir)
+        except (OSError, ValueError) as e: # JSONDecodeError and DataValidationError are ValueErrors
+            print(f"ERROR: Encounter data reload failed, keeping version {_SNAPSHOT.version}: {e}")
@@ -1,12 +1,22 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import json
+import random
 from typing import List, Union
 
 from . import core
 from . import data_loader
+from . import power
+from .budget import DIFFICULTY_BUDGETS, compose_encounter
 from .models import (
     EncounterRequest,
+    EncounterBatchRequest,
+    EncounterBatchResponse,
+    EncounterBudgetRequest,
+    EncounterBudgetResponse,
+    DataReloadResponse,
     CombatEncounterResponse,
     SkillEncounterResponse
 )
@@ -25,7 +35,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"FATAL: Failed to load encounter data: {e}")
         # In a real app, you might want to exit if data fails to load
+    try:
+        await power.fetch_ratings()
+    except power.RulesEngineUnavailable as e:
+        # Budgeted encounters retry on first use
+        print(f"WARNING: {e}")
+    watcher = None
+    if data_loader.ENCOUNTER_DATA_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(data_loader.watch_data_files())
+        print(f"INFO: Watching encounter data files every {data_loader.ENCOUNTER_DATA_WATCH_INTERVAL:g}s.")
     yield
+    if watcher:
+        watcher.cancel()
     print("INFO: Shutting down Encounter Generator.")
 
 # Create the FastAPI app
@@ -48,7 +69,10 @@ app.add_middleware(
 
 @app.get("/")
 def read_root():
-    return {"status": "Encounter Generator is running."}
+    return {
+        "status": "Encounter Generator is running.",
+        "data_version": data_loader.get_snapshot().version,
+    }
 
 @app.post(
     "/v1/generate",
@@ -85,3 +109,150 @@ def generate_encounter(request: EncounterRequest):
             status_code=500,
             detail=f"Encounter data for {match.get('id')} is corrupted."
         )
+
+@app.post("/v1/generate/batch", response_model=EncounterBatchResponse)
+def generate_encounter_batch(request: EncounterBatchRequest):
+    """
+    (AI DM) Returns `count` encounters matching the tags in one call, e.g.
+    to populate a region. Picks are weighted by rarity/weight; set `unique`
+    to avoid repeats and `campaign_id` to skip that campaign's recent encounters.
+    """
+    if not request.tags:
+        raise HTTPException(
+            status_code=400,
+            detail="No tags provided. Please provide tags to filter by."
+        )
+
+    rng = random.Random(request.seed) if request.seed is not None else None
+    snapshot = data_loader.get_snapshot() # Every pick comes from the same data
+    try:
+        selection = core.select_encounters(
+            request.tags,
+            request.count,
+            weights=request.weights,
+            rarity=request.rarity,
+            unique=request.unique,
+            campaign_id=request.campaign_id,
+            exclude_recent=request.exclude_recent,
+            rng=rng,
+            snapshot=snapshot
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not selection["encounters"]:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No encounters found matching all tags: {request.tags}"
+        )
+
+    encounters = []
+    for match in selection["encounters"]:
+        try:
+            encounters.append(core.build_encounter_response(match))
+        except ValueError as e:
+            print(f"ERROR: Matched encounter {match.get('id')} has unknown type: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Encounter data for {match.get('id')} is corrupted."
+            )
+
+    return EncounterBatchResponse(
+        encounters=encounters,
+        requested=request.count,
+        matched=selection["matched"],
+        recent_excluded=selection["recent_excluded"]
+    )
+
+@app.post("/v1/generate/budgeted", response_model=EncounterBudgetResponse)
+async def generate_budgeted_encounter(request: EncounterBudgetRequest):
+    """
+    (AI DM) Builds a group of NPCs whose combined power rating fits a
+    difficulty budget for the party. Ratings come from the rules_engine,
+    fetched once at startup; the group is solved as a bounded knapsack.
+    """
+    difficulty = request.difficulty.lower()
+    if request.budget is None and difficulty not in DIFFICULTY_BUDGETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown difficulty '{request.difficulty}'. Use one of: {', '.join(DIFFICULTY_BUDGETS)}."
+        )
+    if request.min_npcs > request.max_npcs:
+        raise HTTPException(status_code=400, detail="min_npcs cannot be more than max_npcs.")
+    if any(m.power is None and (m.stats is None or m.max_hp is None) for m in request.party):
+        raise HTTPException(
+            status_code=400,
+            detail="Each party member needs a 'power', or 'stats' and 'max_hp'."
+        )
+
+    try:
+        ratings = await power.ensure_ratings()
+        party_powers = await power.rate_party([m.model_dump() for m in request.party])
+    except power.RulesEngineUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    party_power = sum(party_powers)
+    budget = request.budget or party_power * DIFFICULTY_BUDGETS[difficulty]
+
+    candidates, unrated = core.budget_candidates(request.tags, request.template_ids, ratings.ratings)
+    if not candidates:
+        raise HTTPException(status_code=404, detail="No rated NPC templates match the request.")
+
+    rng = random.Random(request.seed) if request.seed is not None else None
+    result = compose_encounter(
+        candidates,
+        budget,
+        tolerance=request.tolerance,
+        min_npcs=request.min_npcs,
+        max_npcs=request.max_npcs,
+        max_per_template=request.max_per_template,
+        rng=rng
+    )
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No group of {request.min_npcs} to {request.max_npcs} NPCs fits a budget of {budget:.1f}."
+        )
+
+    return EncounterBudgetResponse(
+        npcs_to_spawn=result["npcs"],
+        total_power=result["total_power"],
+        budget=round(budget, 3),
+        party_power=round(party_power, 3),
+        within_tolerance=result["within_tolerance"],
+        candidates=list(candidates),
+        unrated=unrated
+    )
+
+@app.post("/v1/data/reload", response_model=DataReloadResponse)
+async def reload_encounter_data():
+    """
+    (Admin) Re-reads the encounter files. The new data is parsed, validated
+    and indexed off to the side, then swapped in at once; requests already
+    running keep the data they started with. Invalid files are rejected
+    with 422 and the current data stays in use. NPC power ratings are
+    refetched from the rules_engine, keeping the old ones if it is down.
+    """
+    previous = data_loader.get_snapshot()
+    loop = asyncio.get_running_loop()
+    try:
+        snapshot, changed = await loop.run_in_executor(None, data_loader.reload_data)
+    except data_loader.DataValidationError as e:
+        raise HTTPException(status_code=422, detail=e.problems)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON in encounter data: {e}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=422, detail=f"Data file not found: {e.filename}")
+    try:
+        ratings = await power.fetch_ratings()
+    except power.RulesEngineUnavailable as e:
+        print(f"WARNING: Keeping previous NPC power ratings: {e}")
+        ratings = power.get_ratings()
+    return DataReloadResponse(
+        version=snapshot.version,
+        previous_version=previous.version,
+        changed=changed,
+        loaded_at=snapshot.loaded_at,
+        combat_encounters=len(snapshot.combat_encounters),
+        skill_encounters=len(snapshot.skill_encounters),
+        npc_ratings=len(ratings.ratings)
+    )
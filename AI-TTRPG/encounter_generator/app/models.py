@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Union
 
 # --- API Request Model ---
 class EncounterRequest(BaseModel):
@@ -10,6 +10,53 @@ class EncounterRequest(BaseModel):
     # e.g., ["forest", "medium", "combat"]
     tags: List[str]
 
+class EncounterBatchRequest(BaseModel):
+    """
+    Asks for several encounters in one call, e.g. to populate a region.
+    'weights' and 'rarity' are keyed by encounter ID and override the
+    catalogue's own weights for this request.
+    """
+    tags: List[str]
+    count: int = Field(default=1, ge=1, le=100)
+    weights: Optional[Dict[str, float]] = None # e.g. {"combat_forest_easy_goblins": 3.0}
+    rarity: Optional[Dict[str, str]] = None # e.g. {"combat_cave_hard_cultists": "rare"}
+    unique: bool = False # Sample without replacement
+    campaign_id: Optional[str] = None # Skip and remember this campaign's recent encounters
+    exclude_recent: bool = True
+    seed: Optional[int] = None # Fixed seed for repeatable picks
+
+class PartyMember(BaseModel):
+    """
+    One party member: either a known 'power' rating, or a stat block the
+    rules_engine rates on the same scale as NPC templates.
+    """
+    power: Optional[float] = Field(default=None, gt=0)
+    stats: Optional[Dict[str, int]] = None
+    max_hp: Optional[int] = Field(default=None, gt=0)
+    attack_stat: Optional[str] = None # rules_engine default: Might
+    defense_stat: Optional[str] = None # rules_engine default: Reflexes
+    damage_dice: Optional[str] = None # rules_engine default: 1d8
+    skill_rank: Optional[int] = Field(default=None, ge=0)
+    damage_bonus: Optional[int] = None
+    damage_reduction: Optional[int] = Field(default=None, ge=0)
+
+class EncounterBudgetRequest(BaseModel):
+    """
+    Asks for a group of NPCs whose combined power fits a difficulty budget
+    for the given party. Candidates are 'template_ids' if given, else the
+    NPCs of the encounters matching 'tags', else every rated template.
+    """
+    party: List[PartyMember] = Field(..., min_length=1)
+    difficulty: str = "medium" # easy, medium, hard, deadly
+    budget: Optional[float] = Field(default=None, gt=0) # Explicit power budget; overrides difficulty
+    tolerance: float = Field(default=0.1, ge=0, le=1) # Allowed miss, as a fraction of the budget
+    tags: List[str] = []
+    template_ids: Optional[List[str]] = None
+    min_npcs: int = Field(default=1, ge=1, le=50)
+    max_npcs: int = Field(default=8, ge=1, le=50)
+    max_per_template: Optional[int] = Field(default=None, ge=1)
+    seed: Optional[int] = None
+
 # --- API Response Models ---
 # These are the structured objects we send back.
 
@@ -32,4 +79,29 @@ class SkillEncounterResponse(BaseModel):
     success_threshold: int
     stages: List[SkillChallengeStage]
 
-# We can add SocialEncounterResponse later
\ No newline at end of file
+class EncounterBatchResponse(BaseModel):
+    encounters: List[Union[CombatEncounterResponse, SkillEncounterResponse]]
+    requested: int
+    matched: int # Matching encounters with a positive weight
+    recent_excluded: List[str] = [] # IDs skipped as recently used by the campaign
+
+class EncounterBudgetResponse(BaseModel):
+    npcs_to_spawn: List[str] # Template IDs, one per NPC
+    total_power: float
+    budget: float
+    party_power: float
+    within_tolerance: bool # False if nothing fit closer than the tolerance
+    candidates: List[str] # Rated templates the group was built from
+    unrated: List[str] = [] # Requested templates the rules_engine has no rating for
+
+class DataReloadResponse(BaseModel):
+    """Outcome of reloading the encounter files."""
+    version: str # Content hash of the data now in use
+    previous_version: str
+    changed: bool # False when the files' content was already loaded
+    loaded_at: float
+    combat_encounters: int
+    skill_encounters: int
+    npc_ratings: int = 0 # NPC templates with a power rating after the reload
+
+# We can add SocialEncounterResponse later
@@ -0,0 +1,79 @@
+import os
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
+
+import httpx
+
+# The rules_engine rates NPC templates once at its startup; we fetch the table
+RULES_ENGINE_URL = os.getenv("RULES_ENGINE_URL", "http://127.0.0.1:8000")
+RULES_ENGINE_TIMEOUT = 10.0
+
+class RulesEngineUnavailable(RuntimeError):
+    """Raised when power ratings are needed but the rules_engine cannot be reached."""
+
+@dataclass(frozen=True)
+class PowerRatings:
+    """One immutable copy of the rules_engine's NPC power ratings."""
+    ratings: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({})) # template ID -> power
+    fetched_at: float = 0.0
+
+# The current ratings. Replaced, never mutated, like the encounter snapshot.
+_RATINGS = PowerRatings()
+
+def get_ratings() -> PowerRatings:
+    return _RATINGS
+
+def install_ratings(ratings: Dict[str, float]) -> PowerRatings:
+    """Makes `ratings` current and returns them."""
+    global _RATINGS
+    _RATINGS = PowerRatings(ratings=MappingProxyType(dict(ratings)), fetched_at=time.time())
+    return _RATINGS
+
+async def fetch_ratings() -> PowerRatings:
+    """
+    Fetches every NPC template's power rating from the rules_engine and
+    makes them current. Raises RulesEngineUnavailable on any failure,
+    keeping the ratings already held.
+    """
+    url = f"{RULES_ENGINE_URL}/v1/lookup/npc_power_ratings"
+    try:
+        async with httpx.AsyncClient(timeout=RULES_ENGINE_TIMEOUT) as client:
+            response = await client.get(url)
+        response.raise_for_status()
+        table = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise RulesEngineUnavailable(f"Could not fetch NPC power ratings from {url}: {e}")
+    ratings = install_ratings({template_id: float(entry["power"]) for template_id, entry in table.items()})
+    print(f"INFO: Loaded power ratings for {len(ratings.ratings)} NPC templates.")
+    return ratings
+
+async def ensure_ratings() -> PowerRatings:
+    """The current ratings, fetched on first use if startup could not reach the rules_engine."""
+    ratings = get_ratings()
+    if ratings.ratings:
+        return ratings
+    return await fetch_ratings()
+
+async def rate_party(members: List[Dict[str, Any]]) -> List[float]:
+    """
+    Power of each party member. Members that give 'power' are used as-is;
+    the rest are stat blocks rated by the rules_engine in one call, on the
+    same scale as the NPC templates.
+    """
+    powers: List[Optional[float]] = [m.get("power") for m in members]
+    to_rate = [i for i, power in enumerate(powers) if power is None]
+    if to_rate:
+        url = f"{RULES_ENGINE_URL}/v1/calculate/power_rating"
+        payload = [{k: v for k, v in members[i].items() if k != "power" and v is not None} for i in to_rate]
+        try:
+            async with httpx.AsyncClient(timeout=RULES_ENGINE_TIMEOUT) as client:
+                response = await client.post(url, json=payload)
+            response.raise_for_status()
+            rated = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise RulesEngineUnavailable(f"Could not rate party members at {url}: {e}")
+        for i, rating in zip(to_rate, rated):
+            powers[i] = float(rating["power"])
+    return powers
@@ -0,0 +1,54 @@
+import heapq
+import random
+from typing import List, Sequence
+
+# --- Weighted Sampling ---
+
+class AliasTable:
+    """
+    Walker/Vose alias table over a list of weights.
+    Building it is O(n); each draw is O(1): pick a column uniformly, then
+    keep it or take its alias by one biased coin flip.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("An alias table needs at least one positive weight.")
+
+        self.size = n
+        self.probability: List[float] = [0.0] * n
+        self.alias: List[int] = [0] * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            lo, hi = small.pop(), large.pop()
+            self.probability[lo] = scaled[lo]
+            self.alias[lo] = hi
+            scaled[hi] -= 1.0 - scaled[lo]
+            (small if scaled[hi] < 1.0 else large).append(hi)
+        # Whatever is left is 1.0 up to rounding error
+        for i in large + small:
+            self.probability[i] = 1.0
+            self.alias[i] = i
+
+    def draw(self, rng: random.Random) -> int:
+        column = rng.randrange(self.size)
+        return column if rng.random() < self.probability[column] else self.alias[column]
+
+    def sample(self, rng: random.Random, count: int) -> List[int]:
+        """count independent draws (with replacement)."""
+        return [self.draw(rng) for _ in range(count)]
+
+
+def sample_without_replacement(weights: Sequence[float], count: int, rng: random.Random) -> List[int]:
+    """
+    Weighted sampling without replacement (Efraimidis-Spirakis): every item
+    gets the key u ** (1 / w) and the count largest keys win, in key order.
+    Items with a zero weight are never picked.
+    """
+    keys = ((rng.random() ** (1.0 / w), i) for i, w in enumerate(weights) if w > 0)
+    return [i for _, i in heapq.nlargest(count, keys)]
@@ -0,0 +1,56 @@
+import itertools
+import random
+import time
+from collections import Counter
+
+from encounter_generator.app.budget import compose_encounter
+
+
+def _best_by_brute_force(powers, budget, limit, max_npcs, max_per_template):
+    best = None
+    names = list(powers)
+    for n in range(1, max_npcs + 1):
+        for group in itertools.combinations_with_replacement(names, n):
+            if max(Counter(group).values()) > max_per_template:
+                continue
+            total = sum(powers[name] for name in group)
+            if total <= limit and (best is None or abs(total - budget) < abs(best - budget)):
+                best = total
+    return best
+
+
+def test_compose_encounter_matches_brute_force():
+    powers = {"goblin": 14.9, "spider": 11.4, "acolyte": 10.9, "brute": 17.8}
+    for budget in (20.0, 35.0, 52.0, 70.0):
+        result = compose_encounter(powers, budget, tolerance=0.1, max_npcs=5, max_per_template=3, rng=random.Random(1))
+        best = _best_by_brute_force(powers, budget, budget * 1.1, 5, 3)
+        # Costs are rounded to 1/256 of the limit, so allow that much slack
+        assert abs(result["total_power"] - best) <= budget * 1.1 / 256 * len(result["npcs"])
+        assert max(Counter(result["npcs"]).values()) <= 3
+
+
+def test_compose_encounter_respects_group_size():
+    powers = {"rat": 1.0, "ogre": 40.0}
+    result = compose_encounter(powers, 40.0, min_npcs=3, max_npcs=4, rng=random.Random(2))
+    assert sorted(result["npcs"]) == ["ogre", "rat", "rat"] and result["total_power"] == 42.0
+    # Too few NPCs allowed to reach the budget: the closest group, flagged
+    short = compose_encounter({"rat": 1.0}, 40.0, max_npcs=4, rng=random.Random(2))
+    assert short["npcs"] == ["rat"] * 4 and short["within_tolerance"] is False
+    assert compose_encounter({"ogre": 40.0}, 10.0) is None
+
+
+def test_compose_encounter_is_fast_with_hundreds_of_templates():
+    rng = random.Random(5)
+    powers = {f"npc_{i}": rng.uniform(2.0, 60.0) for i in range(500)}
+    start = time.perf_counter()
+    result = compose_encounter(powers, 150.0, max_npcs=8, rng=rng)
+    elapsed = time.perf_counter() - start
+    assert result["within_tolerance"]
+    assert abs(result["total_power"] - 150.0) < 2.0
+    assert elapsed < 0.5
+
+
+def test_compose_encounter_seed_is_repeatable():
+    powers = {f"npc_{i}": 5.0 + i for i in range(20)}
+    first = compose_encounter(powers, 60.0, rng=random.Random(9))
+    assert compose_encounter(powers, 60.0, rng=random.Random(9)) == first
@@ -0,0 +1,56 @@
+import random
+
+from encounter_generator.app import core, data_loader
+
+
+def _linear_scan(tags):
+    tag_set = set(t.lower() for t in tags)
+    return [
+        e for e in data_loader.get_snapshot().combat_encounters + data_loader.get_snapshot().skill_encounters
+        if tag_set.issubset(set(t.lower() for t in e.get('tags', [])))
+    ]
+
+
+def test_tag_index_matches_linear_scan():
+    data_loader.load_all_data()
+    all_tags = sorted(data_loader.get_snapshot().tag_index)
+    queries = [[], ["FOREST"], ["forest", "combat"], ["cave", "dark", "hard"], ["no-such-tag"]]
+    queries += [[tag] for tag in all_tags] + [[a, b] for a in all_tags[:6] for b in all_tags[-6:]]
+    for tags in queries:
+        assert core.find_matching_encounters(tags) == _linear_scan(tags)
+
+
+def test_find_matching_encounter_picks_from_matches():
+    data_loader.load_all_data()
+    match = core.find_matching_encounter(["forest", "combat"])
+    assert match in _linear_scan(["forest", "combat"])
+    assert core.find_matching_encounter(["no-such-tag"]) is None
+
+
+def test_select_encounters_batch_options():
+    data_loader.load_all_data()
+    forest = ["forest", "combat"]
+    ids = {e["id"] for e in _linear_scan(forest)}
+
+    picks = core.select_encounters(forest, 20, rng=random.Random(1))["encounters"]
+    assert len(picks) == 20 and {e["id"] for e in picks} <= ids
+
+    unique = core.select_encounters(forest, 20, unique=True, rng=random.Random(1))["encounters"]
+    assert sorted(e["id"] for e in unique) == sorted(ids)
+
+    only = core.select_encounters(forest, 10, weights={"combat_forest_easy_goblins": 0.0}, rng=random.Random(1))
+    assert {e["id"] for e in only["encounters"]} == ids - {"combat_forest_easy_goblins"}
+    assert only["matched"] == len(ids) - 1
+
+
+def test_select_encounters_skips_recent_per_campaign():
+    data_loader.load_all_data()
+    forest = ["forest", "combat"]
+    first = core.select_encounters(forest, 1, campaign_id="c1", rng=random.Random(2))["encounters"][0]
+    second = core.select_encounters(forest, 1, campaign_id="c1", rng=random.Random(2))
+    assert second["encounters"][0]["id"] != first["id"]
+    assert second["recent_excluded"] == [first["id"]]
+    # Everything is recent now: fall back to the full match set
+    third = core.select_encounters(forest, 1, campaign_id="c1", rng=random.Random(2))
+    assert third["encounters"] and third["recent_excluded"] == []
+    assert core.select_encounters(forest, 1, campaign_id="c2")["recent_excluded"] == []
@@ -0,0 +1,53 @@
+import json
+import shutil
+
+import pytest
+
+from encounter_generator.app import core, data_loader
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    for filename in (data_loader.COMBAT_FILE, data_loader.SKILL_FILE):
+        shutil.copy(f"{data_loader.DATA_DIR}/{filename}", tmp_path / filename)
+    monkeypatch.setattr(data_loader, "_SNAPSHOT", data_loader.EncounterSnapshot())
+    return tmp_path
+
+
+def _edit_combat(data_dir, edit):
+    path = data_dir / data_loader.COMBAT_FILE
+    encounters = json.loads(path.read_text())
+    edit(encounters)
+    path.write_text(json.dumps(encounters))
+
+
+def test_reload_swaps_snapshot_and_keeps_old_one_intact(data_dir):
+    old = data_loader.load_all_data(str(data_dir))
+    assert data_loader.reload_data(str(data_dir)) == (old, False)
+
+    _edit_combat(data_dir, lambda encounters: encounters.append(
+        {"id": "combat_swamp_bog", "tags": ["swamp", "combat"], "description": "Bubbles.",
+         "npcs_to_spawn": ["bog_lurker"], "rarity": "rare"}
+    ))
+    new, changed = data_loader.reload_data(str(data_dir))
+    assert changed and data_loader.get_snapshot() is new
+    assert [e["id"] for e in core.find_matching_encounters(["swamp"])] == ["combat_swamp_bog"]
+    assert new.weights[len(old.combat_encounters)] == data_loader.RARITY_WEIGHTS["rare"]
+    # A request holding the old snapshot still sees the old data
+    assert core.find_matching_encounters(["swamp"], old) == []
+    picks = core.select_encounters(["combat"], 20, rng=core.random.Random(1), snapshot=old)["encounters"]
+    assert all(e["id"] != "combat_swamp_bog" for e in picks)
+
+
+def test_invalid_reload_keeps_current_snapshot(data_dir):
+    current = data_loader.load_all_data(str(data_dir))
+
+    def break_data(encounters):
+        encounters[1]["id"] = encounters[0]["id"]
+        encounters[2]["rarity"] = "mythic"
+        del encounters[0]["description"]
+    _edit_combat(data_dir, break_data)
+    with pytest.raises(data_loader.DataValidationError) as error:
+        data_loader.reload_data(str(data_dir))
+    assert len(error.value.problems) == 3
+    assert data_loader.get_snapshot() is current
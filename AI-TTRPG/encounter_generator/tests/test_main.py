@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from encounter_generator.app.main import app
+
+
+def test_generate_batch_endpoint():
+    with TestClient(app) as client:
+        response = client.post("/v1/generate/batch", json={"tags": ["combat"], "count": 5, "seed": 4})
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["encounters"]) == 5 and body["requested"] == 5
+        assert all(e["type"] == "combat" for e in body["encounters"])
+        assert client.post("/v1/generate/batch", json={"tags": ["combat"], "count": 5, "seed": 4}).json() == body
+
+        assert client.post("/v1/generate/batch", json={"tags": ["no-such-tag"], "count": 2}).status_code == 404
+        bad = client.post("/v1/generate/batch", json={"tags": ["combat"], "rarity": {"x": "mythic"}})
+        assert bad.status_code == 400
+
+
+def test_reload_endpoint_reports_data_version():
+    with TestClient(app) as client:
+        version = client.get("/").json()["data_version"]
+        body = client.post("/v1/data/reload").json()
+        assert body["changed"] is False and body["version"] == body["previous_version"] == version
+        assert body["combat_encounters"] >= 1
+
+
+def test_budgeted_endpoint_uses_precomputed_ratings(monkeypatch):
+    from encounter_generator.app import power
+
+    async def fake_fetch():
+        return power.install_ratings({"goblin_scout": 15.0, "cultist_brute": 18.0, "cultist_acolyte": 11.0})
+
+    monkeypatch.setattr(power, "fetch_ratings", fake_fetch)
+    with TestClient(app) as client:
+        party = [{"power": 20.0}, {"power": 20.0}, {"power": 20.0}]
+        body = client.post("/v1/generate/budgeted", json={"party": party, "difficulty": "hard", "seed": 1}).json()
+        assert body["budget"] == 60.0 and body["party_power"] == 60.0
+        assert body["within_tolerance"] and abs(body["total_power"] - 60.0) <= 6.0
+
+        # Tags limit the candidates to the NPCs of matching encounters
+        cave = client.post("/v1/generate/budgeted", json={"party": party, "tags": ["cave"], "budget": 30.0}).json()
+        assert set(cave["candidates"]) == {"cultist_acolyte", "cultist_brute"}
+        assert set(cave["npcs_to_spawn"]) <= {"cultist_acolyte", "cultist_brute"}
+
+        forest = client.post("/v1/generate/budgeted", json={"party": party, "tags": ["forest"]}).json()
+        assert "spiderling" in forest["unrated"]
+
+        assert client.post("/v1/generate/budgeted", json={"party": party, "difficulty": "silly"}).status_code == 400
+        assert client.post("/v1/generate/budgeted", json={"party": [{"max_hp": 10}]}).status_code == 400
@@ -0,0 +1,29 @@
+import random
+from collections import Counter
+
+import pytest
+
+from encounter_generator.app.sampling import AliasTable, sample_without_replacement
+
+
+def test_alias_table_matches_weights():
+    weights = [5.0, 1.0, 0.0, 4.0]
+    table = AliasTable(weights)
+    counts = Counter(table.sample(random.Random(7), 50000))
+    assert counts[2] == 0
+    for i, w in enumerate(weights):
+        assert abs(counts[i] / 50000 - w / 10.0) < 0.01
+
+
+def test_alias_table_needs_positive_weight():
+    with pytest.raises(ValueError):
+        AliasTable([0.0, 0.0])
+
+
+def test_sampling_without_replacement():
+    rng = random.Random(3)
+    picks = sample_without_replacement([1.0, 0.0, 2.0, 3.0], 10, rng)
+    assert sorted(picks) == [0, 2, 3]
+    # Heavier items come first more often
+    firsts = Counter(sample_without_replacement([1.0, 9.0], 1, rng)[0] for _ in range(2000))
+    assert firsts[1] > firsts[0] * 5
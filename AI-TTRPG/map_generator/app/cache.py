@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from . import models
+
+# --- Configuration ---
+MAP_CACHE_MAX_ENTRIES = int(os.getenv("MAP_CACHE_MAX_ENTRIES", "256"))
+MAP_CACHE_MAX_BYTES = int(os.getenv("MAP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MAP_CACHE_DIR = os.getenv("MAP_CACHE_DIR") # Optional on-disk tier; disabled when unset
+MAP_CACHE_DISK_MAX_ENTRIES = int(os.getenv("MAP_CACHE_DISK_MAX_ENTRIES", "4096"))
+MAP_CACHE_DISK_MAX_BYTES = int(os.getenv("MAP_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+
+def make_cache_key(algorithm: Dict[str, Any], seed: str, width: int, height: int, data_version: str = "") -> str:
+    """
+    Builds a deterministic key from the algorithm name, a hash of everything
+    that shapes its output (type, parameters, post-processing, and the data
+    version, since tile definitions shape the navigation data), the seed and
+    the resolved dimensions.
+    """
+    shape = {
+        "algorithm": algorithm.get("algorithm"),
+        "parameters": algorithm.get("parameters", {}),
+        "post_processing": algorithm.get("post_processing", []),
+        "data_version": data_version,
+    }
+    params_hash = hashlib.sha256(
+        json.dumps(shape, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{algorithm.get('name', 'Unknown Algorithm')}|{params_hash}|{seed}|{width}x{height}"
+
+
+class MapCache:
+    """
+    Bounded LRU cache of generated maps.
+    Entries are stored as serialized JSON so memory use is measured exactly
+    and callers always get a fresh response object. An optional directory
+    acts as a second tier that survives restarts; it has its own entry and
+    byte limits and evicts the least recently used files (by mtime).
+    Async handlers use get_async/put_serialized_async so disk I/O stays off
+    the event loop.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, disk_dir: Optional[str] = None,
+                 disk_max_entries: int = MAP_CACHE_DISK_MAX_ENTRIES,
+                 disk_max_bytes: int = MAP_CACHE_DISK_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._disk_files: "OrderedDict[str, int]" = OrderedDict() # path -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    # --- Disk Tier ---
+    def _disk_path(self, key: str) -> str:
+        filename = hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+        return os.path.join(self.disk_dir, filename)
+
+    def _scan_disk(self):
+        """Indexes entries left by an earlier run, oldest first, and trims them to the limits."""
+        found = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._disk_files[path] = size
+            self._disk_bytes += size
+        self._prune_disk()
+
+    def _prune_disk(self):
+        """Deletes the least recently used files until the disk tier is within its limits."""
+        with self._lock:
+            victims = []
+            while self._disk_files and (len(self._disk_files) > self.disk_max_entries
+                                        or self._disk_bytes > self.disk_max_bytes):
+                path, size = self._disk_files.popitem(last=False)
+                self._disk_bytes -= size
+                self.disk_evictions += 1
+                victims.append(path)
+        for path in victims:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Failed to evict map cache entry from disk: {e}")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path) # Bump the mtime so eviction is least-recently-used
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_bytes -= self._disk_files.pop(path, 0)
+            return None
+        except OSError as e:
+            print(f"Warning: Failed to read map cache entry from disk: {e}")
+            return None
+        with self._lock:
+            if path in self._disk_files:
+                self._disk_files.move_to_end(path)
+        return payload
+
+    def _write_disk(self, key: str, payload: bytes):
+        if not self.disk_dir:
+            return
+        if len(payload) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path) # Atomic, so readers never see partial files
+        except OSError as e:
+            print(f"Warning: Failed to write map cache entry to disk: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += len(payload) - self._disk_files.pop(path, 0)
+            self._disk_files[path] = len(payload)
+        self._prune_disk()
+
+    # --- Memory Tier ---
+    def _store(self, key: str, payload: bytes):
+        """Inserts into the memory tier and evicts LRU entries. Caller holds the lock."""
+        if len(payload) > self.max_bytes:
+            return # Would evict everything else and still not fit
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = payload
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            elif not self.disk_dir:
+                self.misses += 1
+        return payload
+
+    def _get_disk(self, key: str) -> Optional[bytes]:
+        payload = self._read_disk(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, payload)
+        return payload
+
+    def get(self, key: str) -> Optional[models.MapGenerationResponse]:
+        payload = self._get_memory(key)
+        if payload is None and self.disk_dir:
+            payload = self._get_disk(key)
+        if payload is None:
+            return None
+        return models.MapGenerationResponse.model_validate_json(payload)
+
+    async def get_async(self, key: str) -> Optional[models.MapGenerationResponse]:
+        """Like get(), but a disk lookup runs in the default executor."""
+        payload = self._get_memory(key)
+        if payload is None and self.disk_dir:
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(None, self._get_disk, key)
+        if payload is None:
+            return None
+        return models.MapGenerationResponse.model_validate_json(payload)
+
+    def put(self, key: str, response: models.MapGenerationResponse):
+        self.put_serialized(key, response.model_dump_json().encode("utf-8"))
+
+    def put_serialized(self, key: str, payload: bytes):
+        """Stores a response that is already serialized to JSON."""
+        with self._lock:
+            self._store(key, payload)
+        self._write_disk(key, payload)
+
+    async def put_serialized_async(self, key: str, payload: bytes):
+        """Like put_serialized(), but the disk write runs in the default executor."""
+        with self._lock:
+            self._store(key, payload)
+        if self.disk_dir:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_disk, key, payload)
+
+    def clear(self):
+        """Empties the memory tier. Disk entries are left in place."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_tier": bool(self.disk_dir),
+                "disk_entries": len(self._disk_files),
+                "disk_bytes": self._disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+MAP_CACHE = MapCache(MAP_CACHE_MAX_ENTRIES, MAP_CACHE_MAX_BYTES, MAP_CACHE_DIR)
@@ -0,0 +1,160 @@
+import hashlib
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import core, models, noise
+from .noise import cell_noise
+
+# --- Seeds ---
+def seed_key(seed: str) -> int:
+    """Turns any seed string into a 64-bit integer key."""
+    return int.from_bytes(hashlib.sha256(seed.encode("utf-8")).digest()[:8], "little")
+
+# --- Chunk Geometry ---
+def chunk_bounds(chunk_x: int, chunk_y: int, chunk_size: int,
+                 region_width: Optional[int], region_height: Optional[int]) -> Tuple[int, int, int, int]:
+    """
+    Returns (origin_x, origin_y, width, height) of a chunk in global tiles.
+    Edge chunks of a bounded region are cropped to the region.
+    """
+    origin_x, origin_y = chunk_x * chunk_size, chunk_y * chunk_size
+    width = height = chunk_size
+    if region_width is not None:
+        if not 0 <= origin_x < region_width:
+            raise ValueError(f"Chunk x {chunk_x} is outside a region {region_width} tiles wide.")
+        width = min(chunk_size, region_width - origin_x)
+    if region_height is not None:
+        if not 0 <= origin_y < region_height:
+            raise ValueError(f"Chunk y {chunk_y} is outside a region {region_height} tiles high.")
+        height = min(chunk_size, region_height - origin_y)
+    return origin_x, origin_y, width, height
+
+def _outside_region(xs: np.ndarray, ys: np.ndarray,
+                    region_width: Optional[int], region_height: Optional[int]) -> np.ndarray:
+    outside = np.zeros((ys.size, xs.size), dtype=bool)
+    if region_width is not None:
+        outside |= ((xs < 0) | (xs >= region_width))[None, :]
+    if region_height is not None:
+        outside |= ((ys < 0) | (ys >= region_height))[:, None]
+    return outside
+
+# --- Chunk Generators ---
+def _generate_ca_chunk(params: Dict[str, Any], key: int, origin_x: int, origin_y: int, width: int, height: int,
+                       region_width: Optional[int], region_height: Optional[int]) -> np.ndarray:
+    """
+    Cellular Automata for one chunk.
+    A CA step only looks one tile away, so after N iterations a tile depends on
+    the initial state within N tiles. Generating the chunk with an N-tile apron
+    and cropping it gives the same tiles as running the CA over the whole map.
+    """
+    initial_density = params.get("initial_density", 0.45)
+    iterations = params.get("iterations", 4)
+    wall_id = params.get("wall_tile_id", 1)
+    floor_id = params.get("floor_tile_id", 0)
+
+    margin = iterations
+    xs = np.arange(origin_x - margin, origin_x + width + margin)
+    ys = np.arange(origin_y - margin, origin_y + height + margin)
+    grid = np.where(cell_noise(key, xs[None, :], ys[:, None]) < initial_density, wall_id, floor_id)
+
+    # Tiles beyond a bounded region always count as walls, as in the whole-map CA
+    outside = _outside_region(xs, ys, region_width, region_height)
+    grid[outside] = wall_id
+    for _ in range(iterations):
+        grid = core._run_ca_iteration(grid, params)
+        grid[outside] = wall_id
+
+    return grid[margin:margin + height, margin:margin + width]
+
+def _generate_noise_chunk(params: Dict[str, Any], key: int, origin_x: int, origin_y: int, width: int, height: int,
+                          region_width: Optional[int], region_height: Optional[int]) -> np.ndarray:
+    """Fractal noise is a pure function of global coordinates, so a chunk needs no apron."""
+    elevation = noise.fractal_noise(key, origin_x, origin_y, width, height, **noise.noise_settings(params))
+    return noise.elevation_to_tiles(elevation, noise.build_tile_lut(noise.elevation_bands(params)))
+
+CHUNK_GENERATORS: Dict[str, Callable[..., np.ndarray]] = {
+    "cellular_automata": _generate_ca_chunk,
+    "fractal_noise": _generate_noise_chunk,
+}
+
+# --- Chunk Post-Processing ---
+# These work in global coordinates so a step gives the same result however the
+# region is split. They return None when the step cannot apply to this map.
+def _chunk_add_border(grid, params, origin_x, origin_y, region_width, region_height):
+    if region_width is None or region_height is None:
+        return None # An unbounded map has no border
+    wall_id = params.get("wall_tile_id", 1)
+    height, width = grid.shape
+    xs = np.arange(origin_x, origin_x + width)
+    ys = np.arange(origin_y, origin_y + height)
+    grid[:, (xs == 0) | (xs == region_width - 1)] = wall_id
+    grid[(ys == 0) | (ys == region_height - 1), :] = wall_id
+    return grid
+
+def _chunk_clear_center(grid, params, origin_x, origin_y, region_width, region_height):
+    if region_width is None or region_height is None:
+        return None # An unbounded map has no center
+    height, width = grid.shape
+    center_x, center_y = region_width // 2, region_height // 2
+    clear_radius = params.get("clear_center_radius", 2)
+    x_start = max(0, center_x - clear_radius - origin_x)
+    x_end = min(width, center_x + clear_radius + 1 - origin_x)
+    y_start = max(0, center_y - clear_radius - origin_y)
+    y_end = min(height, center_y + clear_radius + 1 - origin_y)
+    if x_start < x_end and y_start < y_end:
+        grid[y_start:y_end, x_start:x_end] = params.get("floor_tile_id", 0)
+    return grid
+
+# 'fill_unreachable' needs the whole map's connectivity and is skipped per chunk
+CHUNK_POST_PROCESSING_FUNCTIONS = {
+    "add_border_trees": _chunk_add_border,
+    "add_border_walls": _chunk_add_border,
+    "clear_center": _chunk_clear_center,
+}
+
+# --- Chunk Runner ---
+def select_chunk_algorithm(tags: List[str], seed: str) -> Optional[Dict[str, Any]]:
+    """
+    Picks a chunkable algorithm for the tags. The pick depends only on the
+    seed, so every chunk of a map uses the same algorithm.
+    """
+    matches = [a for a in core.find_matching_algorithms(tags) if a.get("algorithm") in CHUNK_GENERATORS]
+    if not matches:
+        return None
+    matches.sort(key=lambda a: a.get("name", ""))
+    return matches[seed_key(seed) % len(matches)]
+
+def generate_chunk(algorithm: Dict[str, Any], seed: str, chunk_x: int, chunk_y: int, chunk_size: int,
+                   region_width: Optional[int] = None, region_height: Optional[int] = None) -> models.ChunkResponse:
+    """Generates a single chunk of a chunked map."""
+    algo_name = algorithm.get("name", "Unknown Algorithm")
+    algo_type = algorithm.get("algorithm", "cellular_automata")
+    params = algorithm.get("parameters", {})
+
+    generator = CHUNK_GENERATORS.get(algo_type)
+    if generator is None:
+        raise ValueError(f"Algorithm type '{algo_type}' cannot be generated in chunks.")
+
+    origin_x, origin_y, width, height = chunk_bounds(chunk_x, chunk_y, chunk_size, region_width, region_height)
+    grid = generator(params, seed_key(seed), origin_x, origin_y, width, height, region_width, region_height)
+
+    skipped = []
+    for step_name in algorithm.get("post_processing", []):
+        func = CHUNK_POST_PROCESSING_FUNCTIONS.get(step_name)
+        result = func(grid, params, origin_x, origin_y, region_width, region_height) if func else None
+        if result is None:
+            skipped.append(step_name)
+        else:
+            grid = result
+
+    return models.ChunkResponse(
+        chunk_x=chunk_x,
+        chunk_y=chunk_y,
+        origin_x=origin_x,
+        origin_y=origin_y,
+        width=width,
+        height=height,
+        map_data=grid.tolist(),
+        seed_used=seed,
+        algorithm_used=algo_name,
+        skipped_post_processing=skipped
+    )
@@ -1,19 +1,44 @@
+import hashlib
 import random
 import numpy as np # Make sure numpy is installed
-from typing import List, Dict, Optional, Any, Tuple
-from . import models
-from .data_loader import GENERATION_ALGORITHMS, TILE_DEFINITIONS
+from typing import List, Dict, Optional, Any, Mapping, Tuple
+from . import data_loader, models, navigation, noise, spawns
+
+# --- Random Number Generation ---
+def make_rng(seed: str) -> np.random.Generator:
+    """
+    Builds an independent generator for a single generation from its seed.
+    Any string is accepted; it is hashed so non-numeric seeds work too.
+    Nothing here touches the global random/np.random state, so concurrent
+    requests cannot disturb each other's sequences.
+    """
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    return np.random.default_rng(int.from_bytes(digest[:16], "little"))
 
 # --- Algorithm Selection ---
-def select_algorithm(tags: List[str]) -> Optional[Dict[str, Any]]:
+def find_matching_algorithms(tags: List[str], snapshot: Optional[data_loader.DataSnapshot] = None) -> List[Dict[str, Any]]:
+    """
+    Returns every generation algorithm whose required tags are all in the input tags,
+    in catalogue order. Uses the inverted index built at load time: an algorithm
+    matches when every one of its required tags was hit by the request.
+    Searches the current data snapshot unless one is given.
+    """
+    snapshot = snapshot or data_loader.get_snapshot()
+    hits: Dict[int, int] = {}
+    for tag in set(t.lower() for t in tags):
+        for position in snapshot.algorithm_tag_index.get(tag, ()):
+            hits[position] = hits.get(position, 0) + 1
+    matched = [p for p, count in hits.items() if count == snapshot.algorithm_tag_counts[p]]
+    matched.extend(snapshot.untagged_algorithms)
+    return [snapshot.generation_algorithms[p] for p in sorted(matched)]
+
+def find_algorithm(name: str, snapshot: Optional[data_loader.DataSnapshot] = None) -> Optional[Dict[str, Any]]:
+    """Looks up a generation algorithm by its name."""
+    return (snapshot or data_loader.get_snapshot()).algorithms_by_name.get(name)
+
+def select_algorithm(tags: List[str], snapshot: Optional[data_loader.DataSnapshot] = None) -> Optional[Dict[str, Any]]:
     """Finds a generation algorithm matching the input tags."""
-    tag_set = set(t.lower() for t in tags)
-    possible_matches = []
-    for algo in GENERATION_ALGORITHMS:
-        required_tags = set(t.lower() for t in algo.get("required_tags", []))
-        if required_tags.issubset(tag_set):
-            possible_matches.append(algo)
-
+    possible_matches = find_matching_algorithms(tags, snapshot)
     if not possible_matches:
         return None
     # Maybe add logic here to pick the 'best' match if multiple found
@@ -36,8 +61,11 @@ def _count_neighbors(grid: np.ndarray, x: int, y: int, wall_id: int) -> int:
                 count += 1
     return count
 
-def _run_ca_iteration(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
-    """Runs a single iteration of the Cellular Automata simulation."""
+def _run_ca_iteration_scalar(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """
+    Reference per-cell implementation of a CA iteration.
+    Kept for equivalence tests and benchmarks against _run_ca_iteration.
+    """
     height, width = grid.shape
     new_grid = grid.copy()
     wall_id = params.get("wall_tile_id", 1)
@@ -56,10 +84,38 @@ def _run_ca_iteration(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
                     new_grid[y, x] = wall_id # Born (becomes wall)
     return new_grid
 
-def generate_cellular_automata(params: Dict[str, Any], width: int, height: int, seed: str) -> np.ndarray:
+def _count_wall_neighbors(is_wall: np.ndarray) -> np.ndarray:
+    """
+    Counts wall neighbors (including diagonals) for every cell at once.
+    The mask is padded with walls so out-of-bounds cells count as walls.
+    """
+    height, width = is_wall.shape
+    padded = np.pad(is_wall.astype(np.uint8), 1, mode="constant", constant_values=1)
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dy == 1 and dx == 1:
+                continue # Skip self
+            counts += padded[dy:dy + height, dx:dx + width]
+    return counts
+
+def _run_ca_iteration(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """Runs a single iteration of the Cellular Automata simulation over the whole array."""
+    wall_id = params.get("wall_tile_id", 1)
+    floor_id = params.get("floor_tile_id", 0)
+    birth_limit = params.get("birth_limit", 4)
+    death_limit = params.get("death_limit", 3)
+
+    is_wall = grid == wall_id
+    neighbors = _count_wall_neighbors(is_wall)
+
+    new_grid = grid.copy()
+    new_grid[is_wall & (neighbors < death_limit)] = floor_id # Dies (becomes floor)
+    new_grid[~is_wall & (neighbors > birth_limit)] = wall_id # Born (becomes wall)
+    return new_grid
+
+def generate_cellular_automata(params: Dict[str, Any], width: int, height: int, rng: np.random.Generator) -> np.ndarray:
     """Generates a map using the Cellular Automata method."""
-    random.seed(seed) # Use the seed
-    np.random.seed(int(float(seed))) # Numpy needs an int seed
 
     initial_density = params.get("initial_density", 0.45)
     iterations = params.get("iterations", 4)
@@ -67,11 +123,7 @@ def generate_cellular_automata(params: Dict[str, Any], width: int, height: int,
     floor_id = params.get("floor_tile_id", 0)
 
     # 1. Initialize random grid
-    grid = np.random.choice(
-        [floor_id, wall_id],
-        size=(height, width),
-        p=[1 - initial_density, initial_density]
-    )
+    grid = np.where(rng.random((height, width)) < initial_density, wall_id, floor_id)
 
     # 2. Run iterations
     for _ in range(iterations):
@@ -80,46 +132,200 @@ def generate_cellular_automata(params: Dict[str, Any], width: int, height: int,
     return grid
 
 # --- Drunkard's Walk Implementation ---
-def generate_drunkards_walk(params: Dict[str, Any], width: int, height: int, seed: str) -> np.ndarray:
+_WALK_BATCH = 256 # Direction draws per walker taken from the RNG at once
+
+_WALK_DELTAS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)]) # (dx, dy): N, S, E, W
+
+def _walk_batch(pos: np.ndarray, moves: np.ndarray, upper: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advances every walker through a batch of moves, clamping at the map edge.
+    Returns (visited, new_pos); visited[i] holds each walker's position before move i.
+    """
+    path = pos + np.cumsum(moves, axis=0) # Unclamped positions after each move
+    if path.min() >= 0 and (path <= upper).all():
+        # No walker touched an edge, so no clamping happened
+        return np.concatenate([pos[None], path[:-1]]), path[-1]
+
+    visited = np.empty_like(moves)
+    for i in range(moves.shape[0]):
+        visited[i] = pos
+        pos = np.clip(pos + moves[i], 0, upper) # Stay within bounds (important!)
+    return visited, pos
+
+def generate_drunkards_walk(params: Dict[str, Any], width: int, height: int, rng: np.random.Generator) -> np.ndarray:
     """
     Generates a map using the Drunkard's Walk algorithm.
     Carves out floor tiles by simulating random walks.
+    All walkers advance together with array ops; each carves the tile it
+    stands on, then moves one step N, S, E or W. Walking stops after
+    walk_steps steps per walker, or as soon as target_floor_ratio of the map
+    is floor.
     """
-    random.seed(seed) # Use the seed for Python's random
-    # Note: numpy's random is not heavily used here, but seeding both is good practice
-
     wall_id = params.get("wall_tile_id", 4) # Default for cave from generation_algorithms.json
-    floor_id = params.get("floor_tile_id", 3)
-    walk_steps = params.get("walk_steps", 500)
-    # Optional: Add parameters like number of drunkards, floor target percentage
+    walkers = max(1, int(params.get("walkers", 1)))
 
     # 1. Initialize grid full of walls
     grid = np.full((height, width), wall_id, dtype=int)
 
-    # 2. Perform the walk(s)
-    # Start near the center
-    x, y = width // 2, height // 2
-
-    for _ in range(walk_steps):
-        # Ensure current position is within bounds before carving
-        if 0 <= y < height and 0 <= x < width:
-            grid[y, x] = floor_id # Carve floor
-
-        # Move randomly (N, S, E, W)
-        dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
-        new_x, new_y = x + dx, y + dy
-
-        # Stay within bounds (important!)
-        x = max(0, min(width - 1, new_x))
-        y = max(0, min(height - 1, new_y))
-
-    # Optional: Add multiple drunkards starting from different points
-    # Optional: Add target floor percentage check to stop early
-
+    # 2. Perform the walks
+    # Every walker starts at the center, so the cave stays one connected region
+    _carve_walks(grid, np.tile([width // 2, height // 2], (walkers, 1)), params, rng)
     return grid
 
+def _carve_walks(grid: np.ndarray, starts: np.ndarray, params: Dict[str, Any], rng: np.random.Generator,
+                 carvable: Optional[np.ndarray] = None) -> None:
+    """
+    Walks one walker from each (x, y) in starts, carving floor into grid in
+    place. With a carvable mask only the tiles it marks are carved, and
+    target_floor_ratio is a share of those tiles rather than of the grid.
+    """
+    floor_id = params.get("floor_tile_id", 3)
+    walk_steps = params.get("walk_steps", 500)
+    target_floor_ratio = params.get("target_floor_ratio") # None walks every step
+    height, width = grid.shape
+    carvable_flat = None if carvable is None else carvable.reshape(-1)
+    carvable_tiles = width * height if carvable is None else int(carvable.sum())
+    target_floor = int(np.ceil(target_floor_ratio * carvable_tiles)) if target_floor_ratio else None
+
+    flat_grid = grid.reshape(-1) # View, so carving flat indices edits grid
+    carved = 0
+    pos = np.asarray(starts)
+    walkers = pos.shape[0]
+    upper = np.array([width - 1, height - 1])
+
+    steps_done = 0
+    while steps_done < walk_steps:
+        batch = min(_WALK_BATCH, walk_steps - steps_done)
+        moves = _WALK_DELTAS[rng.integers(0, len(_WALK_DELTAS), size=(batch, walkers))]
+        visited, pos = _walk_batch(pos, moves, upper)
+        steps_done += batch
+
+        # Tiles in step order, so a coverage target stops at the exact step
+        cells = (visited[..., 1] * width + visited[..., 0]).reshape(-1)
+        if carvable_flat is not None:
+            cells = cells[carvable_flat[cells]]
+        if target_floor is None:
+            flat_grid[cells] = floor_id # Carve floor
+            continue
+
+        unique_cells, first_seen = np.unique(cells, return_index=True)
+        fresh = flat_grid[unique_cells] != floor_id
+        new_cells = unique_cells[fresh][np.argsort(first_seen[fresh], kind="stable")]
+        remaining = target_floor - carved
+        if new_cells.size >= remaining:
+            flat_grid[new_cells[:remaining]] = floor_id
+            break
+        flat_grid[new_cells] = floor_id
+        carved += new_cells.size
+
+# --- Fractal Noise Implementation ---
+def generate_fractal_noise(params: Dict[str, Any], width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Overworld terrain: fractal value noise as an elevation field, thresholded
+    into tiles through the elevation bands' lookup table.
+    """
+    key = int(rng.integers(0, 2**63))
+    elevation = noise.fractal_noise(key, 0, 0, width, height, **noise.noise_settings(params))
+    return noise.elevation_to_tiles(elevation, noise.build_tile_lut(noise.elevation_bands(params)))
+
+# --- Region Labeling ---
+def _find_root(parents: List[int], i: int) -> int:
+    """Union-find root lookup with path halving."""
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+def label_regions(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Labels 4-connected regions of True cells in a single sweep.
+    Works on horizontal runs instead of cells: runs are extracted with array ops,
+    overlapping runs on neighbouring rows are merged with union-find, and the
+    label image is painted back with a cumulative sum.
+
+    Returns (labels, sizes, bounding_boxes):
+      labels: int32 array, 0 for background, 1..n in row-major discovery order.
+      sizes: cell count per region (index 0 is label 1).
+      bounding_boxes: [min_x, min_y, max_x, max_y] per region.
+    """
+    height, width = mask.shape
+    empty = (np.zeros((height, width), dtype=np.int32),
+             np.zeros(0, dtype=np.int64),
+             np.zeros((0, 4), dtype=np.int64))
+    if mask.size == 0 or not mask.any():
+        return empty
+
+    # 1. Extract horizontal runs as (row, start, end) with end exclusive
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+    num_runs = run_rows.size
+
+    # 2. Merge runs that overlap a run on the previous row
+    parents = list(range(num_runs))
+    row_bounds = np.searchsorted(run_rows, np.arange(height + 1))
+    starts, ends = run_starts.tolist(), run_ends.tolist()
+    for row in range(1, height):
+        i, i_end = int(row_bounds[row - 1]), int(row_bounds[row])
+        j, j_end = i_end, int(row_bounds[row + 1])
+        while i < i_end and j < j_end:
+            if starts[i] < ends[j] and starts[j] < ends[i]:
+                root_i, root_j = _find_root(parents, i), _find_root(parents, j)
+                if root_i != root_j:
+                    parents[max(root_i, root_j)] = min(root_i, root_j)
+            # Advance whichever run finishes first
+            if ends[i] < ends[j]:
+                i += 1
+            else:
+                j += 1
+
+    # 3. Compact labels in order of each region's first run
+    run_labels = np.empty(num_runs, dtype=np.int32)
+    root_to_label: Dict[int, int] = {}
+    for run in range(num_runs):
+        root = _find_root(parents, run)
+        label = root_to_label.get(root)
+        if label is None:
+            label = len(root_to_label) + 1
+            root_to_label[root] = label
+        run_labels[run] = label
+    num_regions = len(root_to_label)
+
+    # 4. Region statistics from the runs
+    lengths = run_ends - run_starts
+    sizes = np.bincount(run_labels, weights=lengths, minlength=num_regions + 1)[1:].astype(np.int64)
+    bounding_boxes = np.empty((num_regions, 4), dtype=np.int64)
+    bounding_boxes[:, 0:2] = np.iinfo(np.int64).max
+    bounding_boxes[:, 2:4] = -1
+    idx = run_labels - 1
+    np.minimum.at(bounding_boxes[:, 0], idx, run_starts)
+    np.minimum.at(bounding_boxes[:, 1], idx, run_rows)
+    np.maximum.at(bounding_boxes[:, 2], idx, run_ends - 1)
+    np.maximum.at(bounding_boxes[:, 3], idx, run_rows)
+
+    # 5. Paint the label image: +label at each run start, -label at its end
+    delta = np.zeros(height * width + 1, dtype=np.int32)
+    flat_offsets = run_rows * width
+    np.add.at(delta, flat_offsets + run_starts, run_labels)
+    np.add.at(delta, flat_offsets + run_ends, -run_labels)
+    labels = np.cumsum(delta[:-1], dtype=np.int32).reshape(height, width)
+
+    return labels, sizes, bounding_boxes
+
+def compute_region_stats(grid: np.ndarray, floor_id: int) -> models.RegionStats:
+    """Summarises the connected floor regions of a grid, largest first."""
+    _, sizes, bounding_boxes = label_regions(grid == floor_id)
+    order = np.argsort(-sizes, kind="stable")
+    regions = [
+        models.RegionInfo(size=int(sizes[i]), bounding_box=bounding_boxes[i].tolist())
+        for i in order
+    ]
+    return models.RegionStats(count=len(regions), regions=regions)
+
 # --- Post-Processing ---
-def post_process_add_border(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+def post_process_add_border(grid: np.ndarray, params: Dict[str, Any], rng: np.random.Generator) -> np.ndarray:
     """Adds a border of wall tiles around the map."""
     wall_id = params.get("wall_tile_id", 1) # Get wall ID relevant to the algorithm
     grid[0, :] = wall_id  # Top row
@@ -128,7 +334,7 @@ def post_process_add_border(grid: np.ndarray, params: Dict[str, Any]) -> np.ndar
     grid[:, -1] = wall_id # Right column
     return grid
 
-def post_process_clear_center(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+def post_process_clear_center(grid: np.ndarray, params: Dict[str, Any], rng: np.random.Generator) -> np.ndarray:
     """Clears a small area in the center to be floor tiles."""
     height, width = grid.shape
     center_x, center_y = width // 2, height // 2
@@ -142,47 +348,24 @@ def post_process_clear_center(grid: np.ndarray, params: Dict[str, Any]) -> np.nd
              grid[y, x] = floor_id
     return grid
 
-def post_process_fill_unreachable(grid: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+def post_process_fill_unreachable(grid: np.ndarray, params: Dict[str, Any], rng: np.random.Generator) -> np.ndarray:
     """Finds the largest floor area and fills smaller disconnected areas with walls."""
-    height, width = grid.shape
     floor_id = params.get("floor_tile_id", 0)
     wall_id = params.get("wall_tile_id", 1)
-    visited = np.zeros_like(grid, dtype=bool)
-    regions = []
 
-    for y in range(height):
-        for x in range(width):
-            if grid[y, x] == floor_id and not visited[y, x]:
-                region_size = 0
-                region_coords = []
-                q = [(x, y)]
-                visited[y, x] = True
-                while q:
-                    cx, cy = q.pop(0)
-                    region_size += 1
-                    region_coords.append((cx, cy))
-                    for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                        nx, ny = cx + dx, cy + dy
-                        if 0 <= nx < width and 0 <= ny < height and \
-                           grid[ny, nx] == floor_id and not visited[ny, nx]:
-                            visited[ny, nx] = True
-                            q.append((nx, ny))
-                regions.append({'size': region_size, 'coords': region_coords})
-
-    if not regions: return grid # No floor tiles
-
-    # Find the largest region
-    regions.sort(key=lambda r: r['size'], reverse=True)
-    largest_region_coords = set((x,y) for x,y in regions[0]['coords'])
-
-    # Fill smaller regions with walls
+    labels, sizes, _ = label_regions(grid == floor_id)
+    if sizes.size == 0: return grid # No floor tiles
+
+    # Labels are 1-based; argmax keeps the first region found on ties
+    largest_label = int(np.argmax(sizes)) + 1
+
+    # Fill smaller regions with walls in one masked assignment
     new_grid = grid.copy()
-    for y in range(height):
-         for x in range(width):
-              if grid[y,x] == floor_id and (x,y) not in largest_region_coords:
-                   new_grid[y,x] = wall_id
+    new_grid[(labels != 0) & (labels != largest_label)] = wall_id
     return new_grid
 
+# All post-processors take (grid, params, rng) so stochastic steps can be added
+# without touching global random state.
 POST_PROCESSING_FUNCTIONS = {
     "add_border_trees": post_process_add_border, # Example mapping, assumes tree is wall_id
     "add_border_walls": post_process_add_border, # More generic name
@@ -191,57 +374,44 @@ POST_PROCESSING_FUNCTIONS = {
 }
 
 # --- Spawn Point Placement ---
-def find_spawn_points(grid: np.ndarray, floor_id: int, num_player: int = 1, num_enemy: int = 3) -> Dict[str, List[List[int]]]:
-    """Finds valid floor tiles for spawn points."""
-    height, width = grid.shape
-    valid_spawns = []
-    for y in range(height):
-        for x in range(width):
-            if grid[y, x] == floor_id:
-                # Optional: Add checks (e.g., not too close to edge, min distance between points)
-                valid_spawns.append([x, y]) # Store as [col, row] or [x, y]
-
-    if not valid_spawns:
-        print("Warning: No valid floor tiles found for spawn points!")
-        # Default to center if no floor found (shouldn't happen with good generation)
-        return {"player": [[height // 2, width // 2]], "enemy": []}
-
-    random.shuffle(valid_spawns)
-
-    player_spawns = valid_spawns[:num_player]
-    enemy_spawns = valid_spawns[num_player : num_player + num_enemy]
-
-    # Ensure enough unique points were found
-    while len(enemy_spawns) < num_enemy and valid_spawns:
-         # If we ran out, just reuse some (not ideal, but prevents crash)
-         enemy_spawns.append(random.choice(valid_spawns))
-
-    return {
-        "player": player_spawns,
-        "enemy": enemy_spawns
-    }
+def find_spawn_points(grid: np.ndarray, floor_id: int, rng: np.random.Generator, num_player: int = 1, num_enemy: int = 3) -> Dict[str, List[List[int]]]:
+    """Finds spaced-out floor tiles for spawn points (see spawns.place_spawn_points)."""
+    return spawns.place_spawn_points(grid == floor_id, rng, num_player=num_player, num_enemy=num_enemy)
 
 # --- Main Generation Runner ---
-def run_generation(algorithm: Dict[str, Any], seed: str, width_override: Optional[int], height_override: Optional[int]) -> models.MapGenerationResponse:
+def resolve_dimensions(algorithm: Dict[str, Any], width_override: Optional[int], height_override: Optional[int]) -> Tuple[int, int]:
+    """Returns the (width, height) a generation will use, applying overrides over algorithm defaults."""
+    params = algorithm.get("parameters", {})
+    width = width_override or params.get("width", 20)
+    height = height_override or params.get("height", 15)
+    return width, height
+
+def run_generation(algorithm: Dict[str, Any], seed: str, width_override: Optional[int], height_override: Optional[int],
+                   tile_definitions: Optional[Mapping[str, Any]] = None) -> models.MapGenerationResponse:
     """
     Selects and executes the chosen procedural generation algorithm and post-processing.
+    Navigation uses the given tile definitions, or the current snapshot's.
     """
+    if tile_definitions is None:
+        tile_definitions = data_loader.get_snapshot().tile_definitions
     algo_name = algorithm.get("name", "Unknown Algorithm")
     algo_type = algorithm.get("algorithm", "cellular_automata") # Default to CA
     params = algorithm.get("parameters", {})
 
-    width = width_override or params.get("width", 20)
-    height = height_override or params.get("height", 15)
+    width, height = resolve_dimensions(algorithm, width_override, height_override)
 
     print(f"Running generation using algorithm: {algo_name} ({algo_type}) with seed: {seed}")
+    rng = make_rng(seed) # One generator per request, threaded through every step
 
     # --- Select and Run Algorithm ---
     grid_np: Optional[np.ndarray] = None
     if algo_type == "cellular_automata":
-        grid_np = generate_cellular_automata(params, width, height, seed)
+        grid_np = generate_cellular_automata(params, width, height, rng)
     elif algo_type == "drunkards_walk":
-        grid_np = generate_drunkards_walk(params, width, height, seed)
-    # Add more 'elif' blocks for other algorithms (e.g., BSP Trees, Perlin Noise) here
+        grid_np = generate_drunkards_walk(params, width, height, rng)
+    elif algo_type == "fractal_noise":
+        grid_np = generate_fractal_noise(params, width, height, rng)
+    # Add more 'elif' blocks for other algorithms (e.g., BSP Trees) here
     else:
         raise ValueError(f"Unknown algorithm type specified: {algo_type}")
 
@@ -254,13 +424,23 @@ def run_generation(algorithm: Dict[str, Any], seed: str, width_override: Optiona
         func = POST_PROCESSING_FUNCTIONS.get(step_name)
         if func:
             print(f"Applying post-processing step: {step_name}")
-            grid_np = func(grid_np, params)
+            grid_np = func(grid_np, params, rng)
         else:
             print(f"Warning: Unknown post-processing step '{step_name}' defined for algorithm '{algo_name}'")
 
     # --- Find Spawn Points ---
     floor_id = params.get("floor_tile_id", 0) # Use the floor ID from params
-    spawn_points = find_spawn_points(grid_np, floor_id)
+    spawn_points = find_spawn_points(grid_np, floor_id, rng)
+    region_stats = compute_region_stats(grid_np, floor_id)
+    navigation_data = navigation.build_navigation(grid_np, tile_definitions, spawn_points)
+
+    # --- Level of Detail ---
+    # Downsampled copies for zoomed-out views, when the algorithm asks for them
+    lod_factors = params.get("lod_levels", [])
+    lod = [
+        models.LodLevel(scale=factor, map_data=navigation.pack_grid(level))
+        for factor, level in zip(lod_factors, noise.lod_pyramid(grid_np, lod_factors))
+    ] or None
 
     # Convert numpy array to list of lists for JSON serialization
     map_data: List[List[int]] = grid_np.tolist()
@@ -271,5 +451,8 @@ def run_generation(algorithm: Dict[str, Any], seed: str, width_override: Optiona
         map_data=map_data,
         seed_used=seed,
         algorithm_used=algo_name,
-        spawn_points=spawn_points
+        spawn_points=spawn_points,
+        region_stats=region_stats,
+        navigation=navigation_data,
+        lod=lod
     )
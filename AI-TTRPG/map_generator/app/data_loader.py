@@ -1,40 +1,249 @@
+import asyncio
+import hashlib
 import json
 import os
-from typing import Dict, List, Any
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
 
-# Global variables
-TILE_DEFINITIONS: Dict[str, Any] = {}
-GENERATION_ALGORITHMS: List[Dict[str, Any]] = []
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+TILE_FILE = 'tile_definitions.json'
+ALGORITHM_FILE = 'generation_algorithms.json'
 
-def load_data():
-    """Loads map generation data files."""
-    global TILE_DEFINITIONS, GENERATION_ALGORITHMS
+# Seconds between data file checks when watching for changes; 0 disables watching
+MAP_DATA_WATCH_INTERVAL = float(os.getenv("MAP_DATA_WATCH_INTERVAL", "0"))
 
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
 
+class DataValidationError(ValueError):
+    """Raised when data files parse but do not describe usable tiles and algorithms."""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid map data: " + "; ".join(problems))
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    One immutable, fully indexed version of the data files.
+
+    A request takes the current snapshot once and uses it throughout, so a
+    reload never changes data under an in-flight request. The containers
+    are read-only; the tile and algorithm dicts inside were parsed for this
+    snapshot alone and must not be mutated either.
+    """
+    version: str = "empty" # Content hash of both files
+    loaded_at: float = 0.0
+    tile_definitions: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    generation_algorithms: Tuple[Dict[str, Any], ...] = ()
+    # Inverted index: lowercase required tag -> positions of the algorithms that require it
+    algorithm_tag_index: Mapping[str, FrozenSet[int]] = field(default_factory=lambda: MappingProxyType({}))
+    algorithm_tag_counts: Tuple[int, ...] = () # Distinct required tags per algorithm
+    untagged_algorithms: Tuple[int, ...] = () # Algorithms that match any tags
+    algorithms_by_name: Mapping[str, Dict[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+
+
+# The current snapshot. Replaced, never mutated, so swapping it is atomic.
+_SNAPSHOT = DataSnapshot()
+_RELOAD_LOCK = threading.Lock()
+
+
+def get_snapshot() -> DataSnapshot:
+    return _SNAPSHOT
+
+
+def install_snapshot(snapshot: DataSnapshot) -> DataSnapshot:
+    """Makes `snapshot` current and returns the one it replaced."""
+    global _SNAPSHOT
+    previous, _SNAPSHOT = _SNAPSHOT, snapshot
+    return previous
+
+
+# --- Validation ---
+def _is_tile_id(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def validate_data(tile_definitions: Any, algorithms: Any):
+    """Checks the parsed files and raises DataValidationError listing every problem."""
+    problems: List[str] = []
+    tile_ids = set()
+
+    if not isinstance(tile_definitions, dict):
+        problems.append(f"{TILE_FILE} must be an object keyed by tile ID")
+        tile_definitions = {}
+    for key, tile in tile_definitions.items():
+        try:
+            tile_id = int(key)
+        except ValueError:
+            problems.append(f"tile ID '{key}' is not an integer")
+            continue
+        if tile_id < 0:
+            problems.append(f"tile ID {tile_id} is negative")
+        tile_ids.add(tile_id)
+        if not isinstance(tile, dict):
+            problems.append(f"tile {key} must be an object")
+            continue
+        if not isinstance(tile.get("passable"), bool):
+            problems.append(f"tile {key} needs a boolean 'passable'")
+        cost = tile.get("movement_cost")
+        if cost is not None and not (isinstance(cost, int) and 1 <= cost <= 255):
+            problems.append(f"tile {key} movement_cost must be an integer from 1 to 255")
+
+    if not isinstance(algorithms, list):
+        problems.append(f"{ALGORITHM_FILE} must have an 'algorithms' list")
+        algorithms = []
+    names = set()
+    for position, algo in enumerate(algorithms):
+        if not isinstance(algo, dict) or not isinstance(algo.get("name"), str) or not algo["name"]:
+            problems.append(f"algorithm #{position} needs a 'name'")
+            continue
+        name = algo["name"]
+        if name in names:
+            problems.append(f"algorithm name '{name}' is used twice")
+        names.add(name)
+        params = algo.get("parameters", {})
+        if not isinstance(params, dict):
+            problems.append(f"algorithm '{name}' parameters must be an object")
+            params = {}
+        for list_key in ("required_tags", "post_processing"):
+            values = algo.get(list_key, [])
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                problems.append(f"algorithm '{name}' {list_key} must be a list of strings")
+        # Every tile an algorithm writes must be defined, or navigation treats it as impassable
+        used_tiles = [(key, value) for key, value in params.items() if key.endswith("_tile_id")]
+        used_tiles += [("bands", band.get("tile_id")) for band in params.get("bands") or [] if isinstance(band, dict)]
+        for key, tile_id in used_tiles:
+            if not _is_tile_id(tile_id):
+                problems.append(f"algorithm '{name}' {key} must be a tile ID")
+            elif tile_definitions and tile_id not in tile_ids:
+                problems.append(f"algorithm '{name}' {key} uses undefined tile {tile_id}")
+
+    if problems:
+        raise DataValidationError(problems)
+
+
+# --- Building ---
+def build_snapshot(tile_definitions: Dict[str, Any], algorithms: List[Dict[str, Any]],
+                   version: Optional[str] = None) -> DataSnapshot:
+    """
+    Validates parsed data and indexes it into a new snapshot, without
+    touching the current one. The required-tag index makes selection cost
+    follow the request, not the catalogue.
+    """
+    validate_data(tile_definitions, algorithms)
+    if version is None:
+        content = json.dumps([tile_definitions, algorithms], sort_keys=True).encode("utf-8")
+        version = hashlib.sha256(content).hexdigest()[:16]
+
+    tag_index: Dict[str, set] = {}
+    tag_counts: List[int] = []
+    untagged: List[int] = []
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for position, algo in enumerate(algorithms):
+        by_name.setdefault(algo.get("name", ""), algo)
+        required_tags = set(t.lower() for t in algo.get("required_tags", []))
+        for tag in required_tags:
+            tag_index.setdefault(tag, set()).add(position)
+        tag_counts.append(len(required_tags))
+        if not required_tags:
+            untagged.append(position)
+
+    return DataSnapshot(
+        version=version,
+        loaded_at=time.time(),
+        tile_definitions=MappingProxyType(dict(tile_definitions)),
+        generation_algorithms=tuple(algorithms),
+        algorithm_tag_index=MappingProxyType({tag: frozenset(p) for tag, p in tag_index.items()}),
+        algorithm_tag_counts=tuple(tag_counts),
+        untagged_algorithms=tuple(untagged),
+        algorithms_by_name=MappingProxyType(by_name),
+    )
+
+
+def read_snapshot(data_dir: Optional[str] = None) -> DataSnapshot:
+    """Parses, validates and indexes the data files into a new snapshot."""
+    data_dir = data_dir or DATA_DIR
+    with open(os.path.join(data_dir, TILE_FILE), 'r') as f:
+        tile_definitions = json.load(f)
+    with open(os.path.join(data_dir, ALGORITHM_FILE), 'r') as f:
+        algorithms = json.load(f)
+    if isinstance(algorithms, dict):
+        algorithms = algorithms.get("algorithms", [])
+    return build_snapshot(tile_definitions, algorithms)
+
+
+# --- Loading ---
+def load_data(data_dir: Optional[str] = None) -> DataSnapshot:
+    """Loads map generation data files and makes them the current snapshot."""
     print("--- Map Generator: Loading Data ---")
 
     try:
-        # Load Tile Definitions
-        tile_file = os.path.join(DATA_DIR, 'tile_definitions.json')
-        with open(tile_file, 'r') as f:
-            TILE_DEFINITIONS.clear()
-            TILE_DEFINITIONS.update(json.load(f))
-        print(f"Loaded {len(TILE_DEFINITIONS)} tile definitions.")
-
-        # Load Generation Algorithms
-        algo_file = os.path.join(DATA_DIR, 'generation_algorithms.json')
-        with open(algo_file, 'r') as f:
-            GENERATION_ALGORITHMS.clear()
-            GENERATION_ALGORITHMS.extend(json.load(f).get("algorithms", []))
-        print(f"Loaded {len(GENERATION_ALGORITHMS)} generation algorithms.")
-
+        snapshot = read_snapshot(data_dir)
     except FileNotFoundError as e:
         print(f"FATAL ERROR: Data file not found: {e.filename}")
         raise
     except json.JSONDecodeError as e:
         print(f"FATAL ERROR: Failed to decode JSON from {e.doc}")
         raise
+    except DataValidationError as e:
+        print(f"FATAL ERROR: {e}")
+        raise
+
+    with _RELOAD_LOCK:
+        install_snapshot(snapshot)
+    print(f"Loaded {len(snapshot.tile_definitions)} tile definitions.")
+    print(f"Loaded {len(snapshot.generation_algorithms)} generation algorithms.")
+    print("--- Map Generator: Data Loaded ---")
+    return snapshot
+
+
+def reload_data(data_dir: Optional[str] = None) -> Tuple[DataSnapshot, bool]:
+    """
+    Rebuilds the snapshot off to the side and swaps it in only if it is
+    valid and its content changed. Returns (current snapshot, changed).
+    Raises (keeping the current snapshot) if the files are missing or invalid.
+    """
+    with _RELOAD_LOCK: # One reload at a time; readers never wait
+        snapshot = read_snapshot(data_dir)
+        if snapshot.version == _SNAPSHOT.version:
+            return _SNAPSHOT, False
+        previous = install_snapshot(snapshot)
+    print(f"INFO: Map data reloaded: version {previous.version} -> {snapshot.version}.")
+    return snapshot, True
+
+
+# --- Watching ---
+def data_files_signature(data_dir: Optional[str] = None) -> Tuple[Tuple[int, int], ...]:
+    """(mtime_ns, size) of each data file; missing files count as (0, 0)."""
+    data_dir = data_dir or DATA_DIR
+    signature = []
+    for filename in (TILE_FILE, ALGORITHM_FILE):
+        try:
+            stat = os.stat(os.path.join(data_dir, filename))
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((0, 0))
+    return tuple(signature)
+
 
-    print("--- Map Generator: Data Loaded ---")
\ No newline at end of file
+async def watch_data_files(interval: float = MAP_DATA_WATCH_INTERVAL, data_dir: Optional[str] = None):
+    """
+    Polls the data files and reloads when they change. Parsing runs in a
+    thread so the event loop keeps serving; invalid edits are reported and
+    the current snapshot stays in place until the files are fixed.
+    """
+    loop = asyncio.get_running_loop()
+    seen = data_files_signature(data_dir)
+    while True:
+        await asyncio.sleep(interval)
+        current = data_files_signature(data_dir)
+        if current == seen:
+            continue
+        seen = current
+        try:
+            await loop.run_in_executor(None, reload_data, data_dir)
+        except (OSError, ValueError) as e: # JSONDecodeError and DataValidationError are ValueErrors
+            print(f"ERROR: Map data reload failed, keeping version {_SNAPSHOT.version}: {e}")
@@ -1,9 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
+import httpx
+import json
+import os
 import time # For generating seeds
+import numpy as np
 
-from . import core, data_loader, models
+from . import chunks, core, data_loader, models, navigation, spawns, tilecodec, workers
+from .cache import MAP_CACHE, make_cache_key
+
+WORLD_ENGINE_URL = os.getenv("WORLD_ENGINE_URL", "http://127.0.0.1:8002")
+MAP_BATCH_LIMIT = int(os.getenv("MAP_BATCH_LIMIT", "256")) # Items allowed in one /v1/generate/batch call
 
 # --- Lifespan Event ---
 @asynccontextmanager
@@ -16,8 +27,19 @@ async def lifespan(app: FastAPI):
         print("INFO: Map data loaded successfully.")
     except Exception as e:
         print(f"FATAL: Failed to load map data during lifespan startup: {e}")
+    try:
+        workers.start_pool()
+    except Exception as e:
+        print(f"ERROR: Failed to start map generation pool: {e}")
+    watcher = None
+    if data_loader.MAP_DATA_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(data_loader.watch_data_files())
+        print(f"INFO: Watching map data files every {data_loader.MAP_DATA_WATCH_INTERVAL:g}s.")
     yield
     print("INFO: Lifespan shutdown. Shutting down Map Generator.")
+    if watcher:
+        watcher.cancel()
+    workers.shutdown_pool()
 
 # Create the FastAPI app
 app = FastAPI(
@@ -38,37 +60,396 @@ app.add_middleware(
 # --- API Endpoints ---
 @app.get("/")
 def read_root():
-    return {"status": "Map Generator is running."}
+    return {
+        "status": "Map Generator is running.",
+        "data_version": data_loader.get_snapshot().version,
+        "cache": MAP_CACHE.stats(),
+        "generation_pool": workers.pool_stats(),
+    }
 
-@app.post("/v1/generate", response_model=models.MapGenerationResponse)
-def generate_map(request: models.MapGenerationRequest):
+async def _run_pooled(func, *args: Any, wait_for_slot: bool = False) -> str:
     """
-    (AI DM / Story Engine) Provide tags (e.g., 'forest', 'cave')
-    and optionally a seed or dimensions to generate a map.
+    Runs a generation job in the worker pool, mapping a full queue to 503
+    and a timed-out job to 504. Other errors propagate to the caller.
     """
-    # 1. Select the appropriate algorithm based on tags
-    algorithm = core.select_algorithm(request.tags)
+    try:
+        return await workers.get_pool().submit(func, *args, wait_for_slot=wait_for_slot)
+    except workers.QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except workers.JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+def _prepare_generation(request: models.MapGenerationRequest,
+                        snapshot: data_loader.DataSnapshot) -> Tuple[Dict[str, Any], str, Optional[str]]:
+    """
+    Selects the algorithm and seed for a request and builds its cache key.
+    The cache key is None for time-based seeds, which never repeat.
+    """
+    algorithm = core.select_algorithm(request.tags, snapshot)
     if not algorithm:
         raise HTTPException(
             status_code=404,
             detail=f"No generation algorithm found for tags: {request.tags}"
         )
 
-    # 2. Determine the seed
     seed = request.seed or str(time.time()) # Use provided seed or generate one
 
+    cache_key = None
+    if request.seed:
+        width, height = core.resolve_dimensions(algorithm, request.width, request.height)
+        cache_key = make_cache_key(algorithm, seed, width, height, snapshot.version)
+    return algorithm, seed, cache_key
+
+def _negotiated_map_response(generated_map: Union[models.MapGenerationResponse, models.ChunkResponse],
+                             accept: Optional[str], raw_headers: Optional[Dict[str, str]] = None):
+    """
+    Returns the map in the format the client asked for.
+    JSON lists stay the default; packed JSON and raw bytes are opt-in via Accept.
+    raw_headers carry the metadata that raw bytes would otherwise lose.
+    """
+    try:
+        media_type, compression = tilecodec.negotiate(accept)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    if media_type is None:
+        return generated_map
+
+    grid = np.asarray(generated_map.map_data)
+    dtype = tilecodec.pick_dtype(int(grid.max()) if grid.size else 0)
+    raw = grid.astype("<u1" if dtype == "uint8" else "<u2").tobytes()
+
+    if media_type == tilecodec.RAW_MEDIA_TYPE:
+        headers = tilecodec.raw_headers(generated_map.width, generated_map.height, dtype, compression)
+        headers["X-Map-Seed"] = generated_map.seed_used
+        headers["X-Map-Algorithm"] = generated_map.algorithm_used
+        headers.update(raw_headers or {})
+        return Response(
+            content=tilecodec.compress(raw, dtype, compression),
+            media_type=tilecodec.RAW_MEDIA_TYPE,
+            headers=headers
+        )
+
+    body = generated_map.model_dump()
+    body["map_data"] = tilecodec.pack(raw, generated_map.width, generated_map.height, dtype, compression)
+    return JSONResponse(content=body, media_type=tilecodec.PACKED_MEDIA_TYPE)
+
+@app.post("/v1/generate", response_model=models.MapGenerationResponse)
+async def generate_map(request: models.MapGenerationRequest, accept: Optional[str] = Header(None)):
+    """
+    (AI DM / Story Engine) Provide tags (e.g., 'forest', 'cave')
+    and optionally a seed or dimensions to generate a map.
+    Send 'Accept: application/vnd.ttrpg.tilemap+json' for a packed map_data
+    or 'Accept: application/octet-stream' for the raw tile bytes only.
+    Generation runs in the worker pool, so the event loop stays free.
+    """
+    # 1. Select the algorithm and determine the seed, from one data snapshot throughout
+    snapshot = data_loader.get_snapshot()
+    algorithm, seed, cache_key = _prepare_generation(request, snapshot)
+
+    # 2. Return a cached map for explicit seeds
+    if cache_key:
+        cached_map = await MAP_CACHE.get_async(cache_key)
+        if cached_map is not None:
+            return _negotiated_map_response(cached_map, accept)
+
     # 3. Run the generation process
     try:
-        generated_map = core.run_generation(
+        payload = await _run_pooled(
+            workers.generate_to_json,
             algorithm,
             seed,
             request.width,
-            request.height
+            request.height,
+            dict(snapshot.tile_definitions)
         )
-        return generated_map
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR during map generation: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Internal error during map generation: {e}"
         )
+    if cache_key:
+        await MAP_CACHE.put_serialized_async(cache_key, payload.encode("utf-8"))
+    generated_map = models.MapGenerationResponse.model_validate_json(payload)
+    return _negotiated_map_response(generated_map, accept)
+
+def _grid_from_request(map_data: Union[List[List[int]], models.PackedTileMap], field: str) -> np.ndarray:
+    """Turns JSON lists or a packed tilemap/v1 envelope (model or dict) into a 2D array."""
+    if isinstance(map_data, models.PackedTileMap):
+        map_data = map_data.model_dump()
+    if tilecodec.is_packed(map_data):
+        try:
+            map_data = tilecodec.unpack(map_data)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"{field}: {e}")
+    grid = np.asarray(map_data)
+    if grid.ndim != 2 or grid.size == 0:
+        raise HTTPException(status_code=422, detail=f"{field} must be a non-empty rectangular 2D grid.")
+    return grid
+
+async def _read_grid(map_data: Union[List[List[int]], models.PackedTileMap], field: str) -> np.ndarray:
+    """_grid_from_request on a thread, so decoding a large map never holds the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _grid_from_request, map_data, field)
+
+@app.post("/v1/spawn_points", response_model=models.SpawnPointResponse)
+async def place_spawn_points(request: models.SpawnPointRequest):
+    """
+    (Story Engine) Place spaced-out player and enemy spawns on an existing map.
+    map_data may be JSON lists or a packed tilemap/v1 envelope.
+    Placement runs in the worker pool, like generation.
+    """
+    grid = await _read_grid(request.map_data, "map_data")
+
+    if request.walkable_tile_ids is None:
+        lut = navigation.build_cost_lut(data_loader.get_snapshot().tile_definitions)
+        walkable = navigation.cost_grid(grid, lut) > 0
+    else:
+        walkable = np.isin(grid, request.walkable_tile_ids)
+    seed = request.seed or str(time.time())
+
+    payload = await _run_pooled(workers.place_spawn_points_to_json, walkable, seed, {
+        "num_player": request.num_player,
+        "num_enemy": request.num_enemy,
+        "player_spacing": request.player_spacing,
+        "enemy_spacing": request.enemy_spacing,
+        "player_enemy_distance": request.player_enemy_distance,
+        "player_zone": request.player_zone,
+        "enemy_zone": request.enemy_zone,
+    })
+    return models.SpawnPointResponse.model_validate_json(payload)
+
+async def _fetch_location_map(location_id: int) -> Union[List[List[int]], Dict[str, Any]]:
+    """Loads a location's stored map from the World Engine, as JSON lists or a packed envelope."""
+    url = f"{WORLD_ENGINE_URL}/v1/locations/{location_id}/map"
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(url, headers={"Accept": tilecodec.PACKED_MEDIA_TYPE})
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=502, detail=f"World Engine unavailable: {e}")
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Location {location_id} not found")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"World Engine error {response.status_code}: {response.text}")
+
+    map_data = response.json().get("generated_map_data")
+    if isinstance(map_data, str):
+        map_data = json.loads(map_data)
+    if not map_data:
+        raise HTTPException(status_code=404, detail=f"Location {location_id} has no generated map")
+    return map_data
+
+@app.post("/v1/regenerate_region", response_model=models.RegionPatchResponse)
+async def regenerate_region(request: models.RegionRegenerateRequest, accept: Optional[str] = Header(None)):
+    """
+    (AI DM / Story Engine) Regenerate part of an existing map, e.g. a cave
+    collapse or a new clearing. Generation and post-processing rerun only
+    inside the window (or mask), with the surrounding tiles as border
+    conditions, and only the changed patch is returned. Apply it by writing
+    map_data at (origin_x, origin_y). Supports the same Accept-based compact
+    formats as /v1/generate.
+    """
+    snapshot = data_loader.get_snapshot()
+    if request.algorithm:
+        algorithm = core.find_algorithm(request.algorithm, snapshot)
+        if not algorithm:
+            raise HTTPException(status_code=404, detail=f"Unknown generation algorithm: {request.algorithm}")
+    else:
+        algorithm = core.select_algorithm(request.tags, snapshot)
+        if not algorithm:
+            raise HTTPException(status_code=404, detail=f"No generation algorithm found for tags: {request.tags}")
+
+    if request.map_data is not None:
+        grid = await _read_grid(request.map_data, "map_data")
+    elif request.location_id is not None:
+        grid = await _read_grid(await _fetch_location_map(request.location_id), "generated_map_data")
+    else:
+        raise HTTPException(status_code=422, detail="Provide map_data or a location_id.")
+    mask = await _read_grid(request.mask, "mask") if request.mask is not None else None
+    seed = request.seed or str(time.time())
+
+    try:
+        payload = await _run_pooled(
+            workers.regenerate_region_to_json,
+            algorithm, seed, grid, request.window, mask
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    patch = models.RegionPatchResponse.model_validate_json(payload)
+    return _negotiated_map_response(patch, accept, {
+        "X-Map-Origin-X": str(patch.origin_x),
+        "X-Map-Origin-Y": str(patch.origin_y),
+    })
+
+@app.post("/v1/data/reload", response_model=models.DataReloadResponse)
+async def reload_map_data():
+    """
+    (Admin) Re-reads tile_definitions.json and generation_algorithms.json.
+    The new data is parsed, validated and indexed off to the side, then
+    swapped in at once; requests already running keep the data they
+    started with. Invalid files are rejected with 422 and the current data
+    stays in use.
+    """
+    previous = data_loader.get_snapshot()
+    loop = asyncio.get_running_loop()
+    try:
+        snapshot, changed = await loop.run_in_executor(None, data_loader.reload_data)
+    except data_loader.DataValidationError as e:
+        raise HTTPException(status_code=422, detail=e.problems)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON in map data: {e}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=422, detail=f"Data file not found: {e.filename}")
+    return models.DataReloadResponse(
+        version=snapshot.version,
+        previous_version=previous.version,
+        changed=changed,
+        loaded_at=snapshot.loaded_at,
+        tile_definitions=len(snapshot.tile_definitions),
+        generation_algorithms=len(snapshot.generation_algorithms)
+    )
+
+def _batch_line(index: int, status: str, **fields: Any) -> str:
+    return json.dumps({"index": index, "status": status, **fields}) + "\n"
+
+async def _run_batch_item(index: int, request: models.MapGenerationRequest,
+                          snapshot: data_loader.DataSnapshot) -> str:
+    """Generates one batch item in the process pool and returns its NDJSON line."""
+    try:
+        algorithm, seed, cache_key = _prepare_generation(request, snapshot)
+    except HTTPException as e:
+        return _batch_line(index, "error", status_code=e.status_code, detail=e.detail)
+
+    if cache_key:
+        cached_map = await MAP_CACHE.get_async(cache_key)
+        if cached_map is not None:
+            return _batch_line(index, "ok", result=cached_map.model_dump())
+
+    try:
+        payload = await _run_pooled(
+            workers.generate_to_json,
+            algorithm, seed, request.width, request.height, dict(snapshot.tile_definitions),
+            wait_for_slot=True
+        )
+    except HTTPException as e:
+        return _batch_line(index, "error", status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        print(f"ERROR during batch map generation (item {index}): {e}")
+        return _batch_line(index, "error", status_code=500, detail=f"Internal error during map generation: {e}")
+
+    if cache_key:
+        await MAP_CACHE.put_serialized_async(cache_key, payload.encode("utf-8"))
+    # The worker already produced JSON, so splice it in rather than re-encoding
+    return f'{{"index": {index}, "status": "ok", "result": {payload}}}\n'
+
+@app.post("/v1/generate/batch")
+async def generate_map_batch(requests: List[models.MapGenerationRequest]):
+    """
+    (Story Engine / Campaign Prep) Generate many maps in one call.
+    Items run in parallel across the process pool and are streamed back as
+    NDJSON in completion order. Each line carries the item's 'index' in the
+    request list and either a 'result' (MapGenerationResponse) or an error;
+    a failing item does not abort the rest of the batch. Every item uses the
+    data snapshot that was current when the batch arrived. Items wait for a
+    worker rather than being rejected, so a batch may hold at most
+    MAP_BATCH_LIMIT items (413 otherwise).
+    """
+    if len(requests) > MAP_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(requests)} items; at most {MAP_BATCH_LIMIT} are allowed per call."
+        )
+    snapshot = data_loader.get_snapshot()
+
+    async def stream():
+        tasks = [asyncio.create_task(_run_batch_item(i, r, snapshot)) for i, r in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# --- Chunked Maps ---
+def _chunk_algorithm(tags: List[str], seed: str) -> Dict[str, Any]:
+    algorithm = chunks.select_chunk_algorithm(tags, seed)
+    if not algorithm:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No chunkable generation algorithm found for tags: {tags}"
+        )
+    return algorithm
+
+@app.post("/v1/chunks", response_model=models.ChunkResponse)
+async def generate_map_chunk(request: models.ChunkRequest, accept: Optional[str] = Header(None)):
+    """
+    (World Engine / Frontend) Generate one chunk of a large chunked map.
+    Chunks depend only on (seed, chunk_x, chunk_y), so any chunk can be
+    fetched on its own and neighbours line up exactly at their seams.
+    Supports the same Accept-based compact formats as /v1/generate.
+    Generation runs in the worker pool, like /v1/generate.
+    """
+    algorithm = _chunk_algorithm(request.tags, request.seed)
+    try:
+        payload = await _run_pooled(
+            workers.generate_chunk_to_json,
+            algorithm, request.seed, request.chunk_x, request.chunk_y,
+            request.chunk_size, request.region_width, request.region_height
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    chunk = models.ChunkResponse.model_validate_json(payload)
+    return _negotiated_map_response(chunk, accept, {
+        "X-Chunk-X": str(chunk.chunk_x),
+        "X-Chunk-Y": str(chunk.chunk_y),
+        "X-Map-Origin-X": str(chunk.origin_x),
+        "X-Map-Origin-Y": str(chunk.origin_y),
+    })
+
+async def _run_chunk_item(request: models.ChunkStreamRequest, algorithm: Dict[str, Any], coords: List[int]) -> str:
+    """Generates one streamed chunk in the process pool and returns its NDJSON line."""
+    if len(coords) != 2:
+        return json.dumps({"chunk": coords, "status": "error", "status_code": 422,
+                           "detail": "Chunk coordinates must be [chunk_x, chunk_y]."}) + "\n"
+    chunk_x, chunk_y = coords
+    try:
+        payload = await _run_pooled(
+            workers.generate_chunk_to_json,
+            algorithm, request.seed, chunk_x, chunk_y,
+            request.chunk_size, request.region_width, request.region_height,
+            wait_for_slot=True
+        )
+    except HTTPException as e:
+        return json.dumps({"chunk": coords, "status": "error", "status_code": e.status_code, "detail": e.detail}) + "\n"
+    except ValueError as e:
+        return json.dumps({"chunk": coords, "status": "error", "status_code": 400, "detail": str(e)}) + "\n"
+    except Exception as e:
+        print(f"ERROR during chunk generation ({chunk_x}, {chunk_y}): {e}")
+        return json.dumps({"chunk": coords, "status": "error", "status_code": 500,
+                           "detail": f"Internal error during chunk generation: {e}"}) + "\n"
+    return f'{{"chunk": [{chunk_x}, {chunk_y}], "status": "ok", "result": {payload}}}\n'
+
+@app.post("/v1/chunks/stream")
+async def stream_map_chunks(request: models.ChunkStreamRequest):
+    """
+    (World Engine / Frontend) Generate the listed chunks (e.g. those near the
+    player) across the process pool and stream them as NDJSON in completion
+    order. Each line has the 'chunk' coordinates and a 'result'
+    (ChunkResponse) or an error.
+    """
+    algorithm = _chunk_algorithm(request.tags, request.seed)
+
+    async def stream():
+        tasks = [asyncio.create_task(_run_chunk_item(request, algorithm, c)) for c in request.chunks]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,7 +1,36 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Dict, Any, Union
 
-# --- API Request Model ---
+# Chunk coordinates are bounded so global tile coordinates (chunk * chunk_size)
+# stay well inside the integer and float ranges the noise functions use
+CHUNK_COORD_LIMIT = 2 ** 22
+ChunkCoord = Annotated[int, Field(ge=-CHUNK_COORD_LIMIT, le=CHUNK_COORD_LIMIT)]
+
+# --- Shared Models ---
+class PackedTileMap(BaseModel):
+    """
+    Compact 'tilemap/v1' encoding of map_data, returned when the client
+    sends Accept: application/vnd.ttrpg.tilemap+json. See app/tilecodec.py.
+    """
+    encoding: str = "tilemap/v1"
+    width: int
+    height: int
+    dtype: str # "uint8" or "uint16", little-endian, row-major
+    compression: str # "none", "rle" or "zlib"
+    data: str # Base64 of the (compressed) tile bytes
+
+class NavigationData(BaseModel):
+    """
+    Precomputed movement data for a map, packed like map_data.
+    movement_costs holds 0 for impassable tiles and the tile's movement cost
+    otherwise. Each distance field holds BFS steps from the nearest spawn of
+    that group ('player', 'enemy'); unreachable tiles hold `unreachable`.
+    """
+    movement_costs: PackedTileMap # uint8
+    distance_fields: Dict[str, PackedTileMap] = {} # uint16 per spawn group
+    unreachable: int = 65535
+
+# --- API Request Models ---
 class MapGenerationRequest(BaseModel):
     """
     Inputs from the AI DM or story_engine.
@@ -11,14 +40,140 @@ class MapGenerationRequest(BaseModel):
     width: Optional[int] = None # Optional override
     height: Optional[int] = None # Optional override
 
-# --- API Response Model ---
+class ChunkRequest(BaseModel):
+    """
+    A single fixed-size chunk of a (possibly unbounded) chunked map.
+    Chunks are generated independently from (seed, chunk_x, chunk_y), and
+    neighbouring chunks line up exactly at their seams.
+    """
+    tags: List[str]
+    seed: str # Required: chunks only line up when they share a seed
+    chunk_x: ChunkCoord
+    chunk_y: ChunkCoord
+    chunk_size: int = Field(default=64, ge=8, le=512)
+    region_width: Optional[int] = Field(default=None, gt=0) # Bounded region size in tiles; None = unbounded
+    region_height: Optional[int] = Field(default=None, gt=0)
+
+class ChunkStreamRequest(BaseModel):
+    """
+    Several chunks of the same chunked map, streamed back as NDJSON.
+    """
+    tags: List[str]
+    seed: str
+    chunks: List[List[ChunkCoord]] = Field(max_length=1024) # [[chunk_x, chunk_y], ...]
+    chunk_size: int = Field(default=64, ge=8, le=512)
+    region_width: Optional[int] = Field(default=None, gt=0)
+    region_height: Optional[int] = Field(default=None, gt=0)
+
+class SpawnPointRequest(BaseModel):
+    """
+    Places spawn points on an existing map (e.g. the story_engine at combat start).
+    """
+    map_data: Union[List[List[int]], PackedTileMap]
+    seed: Optional[str] = None # Same map + seed gives the same spawns
+    walkable_tile_ids: Optional[List[int]] = None # Default: tiles marked passable in tile_definitions.json
+    num_player: int = Field(default=1, ge=0, le=10000)
+    num_enemy: int = Field(default=3, ge=0, le=10000)
+    player_spacing: float = Field(default=2.0, ge=0) # Min distance between players
+    enemy_spacing: float = Field(default=2.0, ge=0) # Min distance between enemies
+    player_enemy_distance: Optional[float] = Field(default=None, ge=0) # Default: a third of the shorter map side
+    player_zone: Optional[List[int]] = Field(default=None, min_length=4, max_length=4) # [min_x, min_y, max_x, max_y]
+    enemy_zone: Optional[List[int]] = Field(default=None, min_length=4, max_length=4)
+
+class RegionRegenerateRequest(BaseModel):
+    """
+    Regenerates part of an existing map (e.g. a cave collapse or a new clearing).
+    The map comes inline or from the World Engine by location_id; the edited
+    area is a window, a map-sized mask (non-zero = regenerate), or both.
+    """
+    map_data: Optional[Union[List[List[int]], PackedTileMap]] = None
+    location_id: Optional[int] = None # Used when map_data is not given
+    window: Optional[List[int]] = Field(default=None, min_length=4, max_length=4) # [min_x, min_y, max_x, max_y], inclusive
+    mask: Optional[Union[List[List[int]], PackedTileMap]] = None
+    algorithm: Optional[str] = None # Algorithm name; otherwise selected by tags
+    tags: List[str] = []
+    seed: Optional[str] = None
+
+# --- API Response Models ---
+class RegionInfo(BaseModel):
+    """
+    A single connected floor region of a generated map.
+    """
+    size: int # Number of floor tiles in the region
+    bounding_box: List[int] # [min_x, min_y, max_x, max_y], inclusive
+
+class RegionStats(BaseModel):
+    """
+    Connected floor regions of the final map, largest first.
+    """
+    count: int
+    regions: List[RegionInfo]
+
+class LodLevel(BaseModel):
+    """
+    A downsampled copy of the map: each tile is the most common tile of a
+    scale x scale block of the full map.
+    """
+    scale: int # 2 = half resolution, 4 = quarter, ...
+    map_data: PackedTileMap
+
 class MapGenerationResponse(BaseModel):
     """
     The generated map data.
     """
     width: int
     height: int
-    map_data: List[List[int]] # The 2D array of tile IDs
+    map_data: Union[List[List[int]], PackedTileMap] # The 2D array of tile IDs (or its packed form)
     seed_used: str # The actual seed used (generated if none provided)
     algorithm_used: str # Name of the algorithm from the rules file
-    spawn_points: Optional[Dict[str, List[List[int]]]] = None # e.g., {"player": [[5,5]], "enemy": [[10,10],[12,8]]}
\ No newline at end of file
+    spawn_points: Optional[Dict[str, List[List[int]]]] = None # e.g., {"player": [[5,5]], "enemy": [[10,10],[12,8]]}
+    region_stats: Optional[RegionStats] = None # Connected floor regions of the final map
+    navigation: Optional[NavigationData] = None # Walkability and distance fields from the spawns
+    lod: Optional[List[LodLevel]] = None # Level-of-detail pyramid, for algorithms with 'lod_levels'
+
+class ChunkResponse(BaseModel):
+    """
+    One generated chunk. origin_x/origin_y are the global tile coordinates
+    of map_data[0][0]; edge chunks of a bounded region may be smaller than
+    chunk_size.
+    """
+    chunk_x: int
+    chunk_y: int
+    origin_x: int
+    origin_y: int
+    width: int
+    height: int
+    map_data: Union[List[List[int]], PackedTileMap]
+    seed_used: str
+    algorithm_used: str
+    skipped_post_processing: List[str] = [] # Steps that need the whole map and cannot run per chunk
+
+class SpawnPointResponse(BaseModel):
+    spawn_points: Dict[str, List[List[int]]] # {"player": [[x, y], ...], "enemy": [[x, y], ...]}
+    seed_used: str
+
+class DataReloadResponse(BaseModel):
+    """Outcome of reloading the data files."""
+    version: str # Content hash of the data now in use
+    previous_version: str
+    changed: bool # False when the files' content was already loaded
+    loaded_at: float
+    tile_definitions: int
+    generation_algorithms: int
+
+class RegionPatchResponse(BaseModel):
+    """
+    The tiles a region regeneration changed, cropped to their bounding box.
+    origin_x/origin_y are the map coordinates of map_data[0][0]; tiles of
+    the patch that did not change keep their old values. An empty patch
+    means nothing changed.
+    """
+    origin_x: int
+    origin_y: int
+    width: int
+    height: int
+    map_data: Union[List[List[int]], PackedTileMap]
+    changed_tiles: int
+    seed_used: str
+    algorithm_used: str
+    skipped_post_processing: List[str] = []
@@ -0,0 +1,92 @@
+import numpy as np
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from . import models, tilecodec
+
+# Distance value for tiles that no source can reach (the uint16 maximum)
+UNREACHABLE = 0xFFFF
+_MAX_DISTANCE = UNREACHABLE - 1
+
+# 4-connected steps, matching the region labeling in core.label_regions
+_STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# --- Walkability ---
+def build_cost_lut(tile_definitions: Mapping[str, Any]) -> np.ndarray:
+    """
+    Lookup table from tile ID to movement cost: 0 for impassable tiles,
+    otherwise the tile's optional 'movement_cost' (default 1).
+    IDs missing from the definitions are impassable.
+    """
+    ids = [int(tile_id) for tile_id in tile_definitions]
+    lut = np.zeros(max(ids, default=-1) + 1, dtype=np.uint8)
+    for tile_id, tile in tile_definitions.items():
+        if tile.get("passable"):
+            lut[int(tile_id)] = max(1, min(255, int(tile.get("movement_cost", 1))))
+    return lut
+
+def cost_grid(grid: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """Per-tile movement cost for a whole map in one indexing pass; unknown IDs cost 0."""
+    if not len(lut):
+        return np.zeros(grid.shape, dtype=np.uint8)
+    known = (grid >= 0) & (grid < len(lut))
+    return np.where(known, lut[np.clip(grid, 0, len(lut) - 1)], 0).astype(np.uint8)
+
+# --- Distance Fields ---
+def distance_field(walkable: np.ndarray, sources: Sequence[Sequence[int]]) -> np.ndarray:
+    """
+    Multi-source BFS over 4-connected walkable tiles.
+    Returns a uint16 array of step counts from the nearest source ([x, y]);
+    tiles no source can reach hold UNREACHABLE. Each BFS ring is expanded
+    with array ops over the frontier only, so the total work is linear in
+    the map size however winding the map is.
+    """
+    height, width = walkable.shape
+    # A blocked border lets flat-index neighbours skip bounds checks
+    padded_width = width + 2
+    open_cells = np.zeros((height + 2, padded_width), dtype=bool)
+    open_cells[1:-1, 1:-1] = walkable
+    open_flat = open_cells.ravel()
+    distances = np.full(open_flat.size, UNREACHABLE, dtype=np.uint16)
+
+    frontier = np.array(
+        [(y + 1) * padded_width + (x + 1) for x, y in sources if 0 <= x < width and 0 <= y < height],
+        dtype=np.int64
+    )
+    frontier = np.unique(frontier[open_flat[frontier]])
+    offsets = np.array([dy * padded_width + dx for dx, dy in _STEPS], dtype=np.int64)
+
+    distance = 0
+    while frontier.size:
+        distances[frontier] = min(distance, _MAX_DISTANCE)
+        open_flat[frontier] = False # Visited
+        neighbours = (frontier[:, None] + offsets[None, :]).ravel()
+        frontier = np.unique(neighbours[open_flat[neighbours]])
+        distance += 1
+
+    return distances.reshape(height + 2, padded_width)[1:-1, 1:-1].copy()
+
+# --- Response Building ---
+def pack_grid(values: np.ndarray, dtype: Optional[str] = None) -> models.PackedTileMap:
+    """Packs a 2D integer array as tilemap/v1; the dtype defaults to the smallest that fits."""
+    height, width = values.shape
+    if dtype is None:
+        dtype = tilecodec.pick_dtype(int(values.max()) if values.size else 0)
+    raw = values.astype("<u1" if dtype == "uint8" else "<u2").tobytes()
+    return models.PackedTileMap(**tilecodec.pack(raw, width, height, dtype))
+
+def build_navigation(grid: np.ndarray, tile_definitions: Mapping[str, Any],
+                     spawn_points: Optional[Dict[str, List[List[int]]]]) -> models.NavigationData:
+    """
+    Walkability costs for the map plus one BFS distance field per spawn group
+    (e.g. 'player', 'enemy'), all packed in the tilemap/v1 format.
+    """
+    costs = cost_grid(grid, build_cost_lut(tile_definitions))
+    walkable = costs > 0
+    fields = {
+        group: pack_grid(distance_field(walkable, points), "uint16")
+        for group, points in (spawn_points or {}).items() if points
+    }
+    return models.NavigationData(
+        movement_costs=pack_grid(costs, "uint8"),
+        distance_fields=fields,
+        unreachable=UNREACHABLE
+    )
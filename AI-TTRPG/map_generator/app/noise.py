@@ -0,0 +1,135 @@
+import numpy as np
+from typing import Any, Dict, List, Sequence
+
+_MASK64 = (1 << 64) - 1
+_OCTAVE_STEP = 0x9E3779B97F4A7C15
+_LUT_RESOLUTION = 1024 # Elevation levels in a tile lookup table
+
+# --- Per-Cell Hash Noise ---
+# Chunks cannot share a sequential RNG, so every cell's random value is a pure
+# function of (seed, global x, global y). Two chunks that overlap therefore see
+# exactly the same initial state in the overlap; noise lattices rely on the same.
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_X_PRIME = np.uint64(0x8CB92BA72F3D8DD7)
+_Y_PRIME = np.uint64(0xD6E8FEB86659FD93)
+
+def _splitmix64(z: np.ndarray) -> np.ndarray:
+    z = z + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def cell_noise(key: int, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Uniform [0, 1) value for each global (x, y); xs and ys broadcast together.
+    Negative coordinates are fine, so unbounded maps can grow in every direction.
+    """
+    x = np.asarray(xs, dtype=np.int64).astype(np.uint64)
+    y = np.asarray(ys, dtype=np.int64).astype(np.uint64)
+    z = _splitmix64(np.uint64(key) ^ (x * _X_PRIME))
+    z = _splitmix64(z ^ (y * _Y_PRIME))
+    return (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+# --- Fractal Value Noise ---
+def _lattice_axis(origin: int, length: int, spacing: float):
+    """Lattice cell index (relative to the first one), smoothstep weight, and lattice coordinates along one axis."""
+    position = np.arange(origin, origin + length, dtype=np.float64) / spacing
+    cell = np.floor(position).astype(np.int64)
+    t = (position - cell).astype(np.float32)
+    weight = t * t * (3.0 - 2.0 * t) # Smoothstep hides the lattice grid lines
+    lattice = np.arange(cell[0], cell[-1] + 2, dtype=np.int64)
+    return cell - cell[0], weight, lattice
+
+def value_noise(key: int, origin_x: int, origin_y: int, width: int, height: int, spacing: float) -> np.ndarray:
+    """
+    One octave of value noise: random values on a lattice `spacing` tiles
+    apart, smoothly interpolated. Lattice values come from cell_noise, so
+    the result is a pure function of global coordinates and any window of
+    the plane can be generated on its own.
+    """
+    cell_x, weight_x, lattice_x = _lattice_axis(origin_x, width, spacing)
+    cell_y, weight_y, lattice_y = _lattice_axis(origin_y, height, spacing)
+    lattice = cell_noise(key, lattice_x[None, :], lattice_y[:, None]).astype(np.float32)
+
+    # Separable interpolation: along x for every lattice row, then along y
+    rows = lattice[:, cell_x] * (1.0 - weight_x) + lattice[:, cell_x + 1] * weight_x
+    return rows[cell_y, :] * (1.0 - weight_y)[:, None] + rows[cell_y + 1, :] * weight_y[:, None]
+
+def fractal_noise(key: int, origin_x: int, origin_y: int, width: int, height: int,
+                  scale: float = 64.0, octaves: int = 5, persistence: float = 0.5,
+                  lacunarity: float = 2.0) -> np.ndarray:
+    """
+    Fractal (fBm) value noise in [0, 1]: octaves of value noise summed as
+    whole arrays, each `lacunarity` times finer and `persistence` times
+    weaker than the last. `scale` is the feature size of the first octave in tiles.
+    """
+    total = np.zeros((height, width), dtype=np.float32)
+    amplitude, norm, spacing = 1.0, 0.0, float(scale)
+    for octave in range(max(1, octaves)):
+        octave_key = (key + octave * _OCTAVE_STEP) & _MASK64
+        total += np.float32(amplitude) * value_noise(octave_key, origin_x, origin_y, width, height, max(1.0, spacing))
+        norm += amplitude
+        amplitude *= persistence
+        spacing /= lacunarity
+    total /= np.float32(norm)
+    return total
+
+def noise_settings(params: Dict[str, Any]) -> Dict[str, Any]:
+    """fractal_noise keyword arguments from an algorithm's parameters."""
+    return {
+        "scale": params.get("scale", 64.0),
+        "octaves": params.get("octaves", 5),
+        "persistence": params.get("persistence", 0.5),
+        "lacunarity": params.get("lacunarity", 2.0),
+    }
+
+# --- Tile Lookup ---
+# Used when an algorithm defines no bands: water, grass, forest, mountain
+DEFAULT_BANDS = [
+    {"max": 0.38, "tile_id": 2},
+    {"max": 0.55, "tile_id": 0},
+    {"max": 0.66, "tile_id": 1},
+    {"max": 1.0, "tile_id": 4},
+]
+
+def elevation_bands(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return params.get("bands") or DEFAULT_BANDS
+
+def build_tile_lut(bands: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Lookup table from a quantized elevation level to a tile ID.
+    bands are [{"max": 0.4, "tile_id": 2}, ...] in ascending order; values
+    above the last 'max' use the last band.
+    """
+    if not bands:
+        raise ValueError("A noise algorithm needs at least one elevation band.")
+    maxima = np.array([band["max"] for band in bands], dtype=np.float64)
+    tile_ids = np.array([band["tile_id"] for band in bands])
+    levels = (np.arange(_LUT_RESOLUTION) + 0.5) / _LUT_RESOLUTION
+    band = np.minimum(np.searchsorted(maxima, levels, side="right"), len(bands) - 1)
+    return tile_ids[band].astype(np.uint16 if tile_ids.max() > 0xFF else np.uint8)
+
+def elevation_to_tiles(elevation: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """Thresholds an elevation field through a tile LUT in one indexing pass."""
+    levels = np.clip(elevation * _LUT_RESOLUTION, 0, _LUT_RESOLUTION - 1).astype(np.intp)
+    return lut[levels]
+
+# --- Level of Detail ---
+def downsample_tiles(grid: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Shrinks a tile map by `factor` in each direction, keeping each block's
+    most common tile (ties go to the lower ID). Partial blocks at the
+    right/bottom edges count only the tiles they have.
+    """
+    height, width = grid.shape
+    out_h, out_w = -(-height // factor), -(-width // factor)
+    # Count over the IDs actually present, so sparse high IDs cost nothing
+    ids, inverse = np.unique(grid, return_inverse=True)
+    num_ids = max(len(ids), 1)
+    block = (np.arange(height) // factor)[:, None] * out_w + (np.arange(width) // factor)[None, :]
+    counts = np.bincount((block * num_ids + inverse.reshape(grid.shape)).ravel(), minlength=out_h * out_w * num_ids)
+    return ids[counts.reshape(out_h, out_w, num_ids).argmax(axis=2)].astype(grid.dtype)
+
+def lod_pyramid(grid: np.ndarray, factors: Sequence[int] = (2, 4, 8)) -> List[np.ndarray]:
+    """Downsampled copies of a tile map, one per factor."""
+    return [downsample_tiles(grid, factor) for factor in factors]
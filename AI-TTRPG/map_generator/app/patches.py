@@ -0,0 +1,239 @@
+import numpy as np
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import chunks, core, models
+
+# --- Edit Window ---
+def resolve_window(width: int, height: int, window: Optional[List[int]],
+                   mask: Optional[np.ndarray]) -> Tuple[int, int, int, int, np.ndarray]:
+    """
+    Turns a window ([min_x, min_y, max_x, max_y], inclusive) and/or a
+    map-sized mask into (origin_x, origin_y, width, height, editable), where
+    editable marks the tiles inside that rectangle that may change.
+    Without a window the rectangle is the mask's bounding box.
+    """
+    if mask is not None and mask.shape != (height, width):
+        raise ValueError(f"Mask is {mask.shape[1]}x{mask.shape[0]}, but the map is {width}x{height}.")
+    if window is None:
+        if mask is None:
+            raise ValueError("Provide a window, a mask, or both.")
+        ys, xs = np.nonzero(mask)
+        if xs.size == 0:
+            raise ValueError("The mask selects no tiles.")
+        window = [int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())]
+
+    min_x, min_y = max(0, window[0]), max(0, window[1])
+    max_x, max_y = min(width - 1, window[2]), min(height - 1, window[3])
+    if min_x > max_x or min_y > max_y:
+        raise ValueError(f"Window {window} does not overlap the {width}x{height} map.")
+
+    win_w, win_h = max_x - min_x + 1, max_y - min_y + 1
+    if mask is None:
+        editable = np.ones((win_h, win_w), dtype=bool)
+    else:
+        editable = mask[min_y:max_y + 1, min_x:max_x + 1] != 0
+    return min_x, min_y, win_w, win_h, editable
+
+# --- Window Generators ---
+# Each returns new tiles for the window; tiles outside `editable` are ignored.
+def _regenerate_ca(params: Dict[str, Any], grid: np.ndarray, origin_x: int, origin_y: int,
+                   width: int, height: int, editable: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Cellular Automata inside the window. The surrounding tiles never change,
+    so one ring of them is all the CA needs as border conditions; walls and
+    open ground around the edit carry into it.
+    """
+    initial_density = params.get("initial_density", 0.45)
+    iterations = params.get("iterations", 4)
+    wall_id = params.get("wall_tile_id", 1)
+    floor_id = params.get("floor_tile_id", 0)
+
+    context, inner, off_x, off_y = _window_context(grid, origin_x, origin_y, width, height, editable)
+    context[inner] = np.where(rng.random(int(inner.sum())) < initial_density, wall_id, floor_id)
+    for _ in range(iterations):
+        context = np.where(inner, core._run_ca_iteration(context, params), context)
+    return context[off_y:off_y + height, off_x:off_x + width]
+
+def _regenerate_drunkards_walk(params: Dict[str, Any], grid: np.ndarray, origin_x: int, origin_y: int,
+                               width: int, height: int, editable: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Drunkard's Walk inside the window, joined to the cave around it. Editable
+    tiles go back to wall and walkers start next to the floor tiles where
+    corridors enter them, from outside the window or from masked-out tiles.
+    Any entry the walk leaves cut off is then joined to the rest, so the edit
+    cannot split the map. A window no corridor enters is walked from its
+    center, as a whole map would be.
+    """
+    wall_id = params.get("wall_tile_id", 4)
+    floor_id = params.get("floor_tile_id", 3)
+    walkers = max(1, int(params.get("walkers", 1)))
+
+    context, inner, off_x, off_y = _window_context(grid, origin_x, origin_y, width, height, editable)
+    context[inner] = wall_id
+    fixed_floor = ~inner & (context == floor_id)
+    entries = fixed_floor & _touches(inner)
+    starts = np.argwhere(inner & _touches(fixed_floor))[:, ::-1]
+    if starts.size == 0:
+        center = (off_x + width // 2, off_y + height // 2)
+        starts = np.array([center]) if inner[center[1], center[0]] else np.argwhere(inner)[:1, ::-1]
+    starts = starts[rng.integers(0, len(starts), size=walkers)]
+
+    core._carve_walks(context, starts, params, rng, carvable=inner)
+    _join_entries(context, inner, entries, floor_id)
+    return context[off_y:off_y + height, off_x:off_x + width]
+
+WINDOW_GENERATORS: Dict[str, Callable[..., np.ndarray]] = {
+    "cellular_automata": _regenerate_ca,
+    "drunkards_walk": _regenerate_drunkards_walk,
+}
+
+# --- Window Helpers ---
+def _window_context(grid: np.ndarray, origin_x: int, origin_y: int, width: int, height: int,
+                    editable: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    The window plus one ring of surrounding tiles (clipped to the map), and
+    the mask of its editable tiles. Returns (context, inner, off_x, off_y),
+    where (off_x, off_y) is the window's corner inside the context.
+    """
+    map_h, map_w = grid.shape
+    ctx_x, ctx_y = max(0, origin_x - 1), max(0, origin_y - 1)
+    context = grid[ctx_y:min(map_h, origin_y + height + 1), ctx_x:min(map_w, origin_x + width + 1)].copy()
+    inner = np.zeros(context.shape, dtype=bool)
+    off_x, off_y = origin_x - ctx_x, origin_y - ctx_y
+    inner[off_y:off_y + height, off_x:off_x + width] = editable
+    return context, inner, off_x, off_y
+
+def _touches(mask: np.ndarray) -> np.ndarray:
+    """Tiles with at least one 4-neighbour in mask."""
+    touching = np.zeros_like(mask)
+    touching[1:, :] |= mask[:-1, :]
+    touching[:-1, :] |= mask[1:, :]
+    touching[:, 1:] |= mask[:, :-1]
+    touching[:, :-1] |= mask[:, 1:]
+    return touching
+
+def _shortest_path(sources: np.ndarray, targets: np.ndarray, passable: np.ndarray) -> Optional[List[Tuple[int, int]]]:
+    """Breadth-first search from every source tile; the (y, x) tiles of a shortest path to a target, or None."""
+    height, width = passable.shape
+    parent = np.full(passable.size, -1, dtype=np.int64)
+    queue = deque(int(i) for i in np.flatnonzero(sources))
+    parent[list(queue)] = list(queue)
+    flat_passable, flat_targets = passable.reshape(-1), targets.reshape(-1)
+    while queue:
+        cell = queue.popleft()
+        if flat_targets[cell]:
+            path = [cell]
+            while parent[path[-1]] != path[-1]:
+                path.append(int(parent[path[-1]]))
+            return [divmod(i, width) for i in path]
+        y, x = divmod(cell, width)
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            neighbor = ny * width + nx
+            if 0 <= ny < height and 0 <= nx < width and parent[neighbor] < 0 and flat_passable[neighbor]:
+                parent[neighbor] = cell
+                queue.append(neighbor)
+    return None
+
+def _join_entries(context: np.ndarray, inner: np.ndarray, entries: np.ndarray, floor_id: int) -> None:
+    """
+    Carves, in place, the shortest corridor through editable tiles from each
+    floor region touching an entry to the largest such region, until all the
+    entries share one region. Entries that masked-out walls keep apart stay apart.
+    """
+    while True:
+        labels, sizes, _ = core.label_regions(context == floor_id)
+        entry_labels = np.unique(labels[entries])
+        if entry_labels.size <= 1:
+            return
+        main_label = entry_labels[np.argmax(sizes[entry_labels - 1])]
+        path = _shortest_path(labels == main_label,
+                              np.isin(labels, entry_labels) & (labels != main_label),
+                              inner | (labels != 0))
+        if path is None:
+            return
+        for y, x in path:
+            if inner[y, x]:
+                context[y, x] = floor_id
+
+# --- Window Post-Processing ---
+def _fill_unreachable_in_window(grid: np.ndarray, patch: np.ndarray, params: Dict[str, Any],
+                                origin_x: int, origin_y: int, editable: np.ndarray) -> np.ndarray:
+    """
+    Connectivity is a whole-map property, so the patched map is labeled as a
+    whole, but only window tiles outside the largest floor region are filled.
+    """
+    floor_id = params.get("floor_tile_id", 0)
+    wall_id = params.get("wall_tile_id", 1)
+    height, width = patch.shape
+
+    patched = grid.copy()
+    patched[origin_y:origin_y + height, origin_x:origin_x + width] = np.where(
+        editable, patch, patched[origin_y:origin_y + height, origin_x:origin_x + width]
+    )
+    labels, sizes, _ = core.label_regions(patched == floor_id)
+    if sizes.size == 0:
+        return patch
+    largest_label = int(np.argmax(sizes)) + 1
+    window_labels = labels[origin_y:origin_y + height, origin_x:origin_x + width]
+
+    patch = patch.copy()
+    patch[editable & (window_labels != 0) & (window_labels != largest_label)] = wall_id
+    return patch
+
+# --- Runner ---
+def regenerate_region(algorithm: Dict[str, Any], seed: str, grid: np.ndarray,
+                      window: Optional[List[int]] = None, mask: Optional[np.ndarray] = None) -> models.RegionPatchResponse:
+    """
+    Reruns generation and post-processing inside a window of an existing map
+    and returns only the tiles that changed, cropped to their bounding box.
+    Work is proportional to the window, except 'fill_unreachable', which
+    labels the whole patched map.
+    """
+    algo_name = algorithm.get("name", "Unknown Algorithm")
+    algo_type = algorithm.get("algorithm", "cellular_automata")
+    params = algorithm.get("parameters", {})
+
+    generator = WINDOW_GENERATORS.get(algo_type)
+    if generator is None:
+        raise ValueError(f"Algorithm type '{algo_type}' cannot regenerate a region.")
+
+    map_h, map_w = grid.shape
+    origin_x, origin_y, width, height, editable = resolve_window(map_w, map_h, window, mask)
+    original = grid[origin_y:origin_y + height, origin_x:origin_x + width]
+
+    rng = core.make_rng(seed)
+    patch = generator(params, grid, origin_x, origin_y, width, height, editable, rng)
+
+    skipped = []
+    for step_name in algorithm.get("post_processing", []):
+        if step_name == "fill_unreachable":
+            patch = _fill_unreachable_in_window(grid, patch, params, origin_x, origin_y, editable)
+            continue
+        # Border and center steps work in map coordinates, exactly as they do for chunks
+        func = chunks.CHUNK_POST_PROCESSING_FUNCTIONS.get(step_name)
+        result = func(patch.copy(), params, origin_x, origin_y, map_w, map_h) if func else None
+        if result is None:
+            skipped.append(step_name)
+        else:
+            patch = result
+
+    patch = np.where(editable, patch, original)
+    changed = patch != original
+    ys, xs = np.nonzero(changed)
+    if xs.size == 0:
+        patch_x, patch_y, patch = origin_x, origin_y, patch[:0, :0]
+    else:
+        patch = patch[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+        patch_x, patch_y = origin_x + int(xs.min()), origin_y + int(ys.min())
+
+    return models.RegionPatchResponse(
+        origin_x=patch_x,
+        origin_y=patch_y,
+        width=patch.shape[1],
+        height=patch.shape[0],
+        map_data=patch.tolist(),
+        changed_tiles=int(changed.sum()),
+        seed_used=seed,
+        algorithm_used=algo_name,
+        skipped_post_processing=skipped
+    )
@@ -0,0 +1,157 @@
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# A spawn zone is an inclusive rectangle: [min_x, min_y, max_x, max_y]
+Zone = Sequence[int]
+
+# Spacing is relaxed in these steps when a map is too cramped for the requested
+# distances; 0 still keeps every spawn on its own tile.
+_RELAXATION_STEPS = (1.0, 0.5, 0.25, 0.0)
+_MIN_ROUND = 256 # Free candidates tried per round, at least
+_SCAN_PER_SPAWN = 64 # Free candidates a relaxation step may try per requested spawn
+_MIN_SCAN = 4096
+
+def _disk_offsets(radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    """(dy, half_width) per row of the tiles closer than radius to a tile: |dx| <= half_width."""
+    reach = int(math.ceil(radius)) - 1
+    dys = np.arange(-reach, reach + 1)
+    room = radius * radius - dys * dys
+    half = np.floor(np.sqrt(room)).astype(np.int64)
+    half -= half * half >= room # Strictly closer than radius
+    return dys, half
+
+def _near_mask(points: np.ndarray, radius: float, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Tiles closer than radius to any of the points (x, y). Each point covers
+    one run of tiles per row, so the runs are painted into a difference
+    array and summed along rows: O(points * radius + tiles).
+    """
+    height, width = shape
+    if radius <= 0 or len(points) == 0:
+        return np.zeros(shape, dtype=bool)
+    dys, half = _disk_offsets(radius)
+    rows = points[:, 1, None] + dys
+    starts = np.clip(points[:, 0, None] - half, 0, width)
+    ends = np.clip(points[:, 0, None] + half + 1, 0, width)
+    valid = (rows >= 0) & (rows < height) & (starts < ends)
+    row_offsets = rows[valid] * (width + 1)
+    size = height * (width + 1)
+    diff = (np.bincount(row_offsets + starts[valid], minlength=size)
+            - np.bincount(row_offsets + ends[valid], minlength=size))
+    return np.cumsum(diff.reshape(height, width + 1), axis=1)[:, :width] > 0
+
+class _Stamp:
+    """Marks the tiles closer than radius to one point, using a precomputed disk."""
+
+    def __init__(self, radius: float):
+        reach = max(0, int(math.ceil(radius)) - 1)
+        self.reach = reach
+        self.disk = np.zeros((2 * reach + 1, 2 * reach + 1), dtype=bool)
+        if radius > 0:
+            dys, half = _disk_offsets(radius)
+            dxs = np.arange(-reach, reach + 1)
+            self.disk[dys + reach] = np.abs(dxs)[None, :] <= half[:, None]
+
+    def apply(self, mask: np.ndarray, x: int, y: int):
+        height, width = mask.shape
+        x0, y0 = max(0, x - self.reach), max(0, y - self.reach)
+        x1, y1 = min(width, x + self.reach + 1), min(height, y + self.reach + 1)
+        mask[y0:y1, x0:x1] |= self.disk[y0 - y + self.reach:y1 - y + self.reach,
+                                         x0 - x + self.reach:x1 - x + self.reach]
+
+def _in_zone(candidates: np.ndarray, zone: Optional[Zone]) -> np.ndarray:
+    """Candidates (x, y) inside the zone; all of them when no usable zone is given."""
+    if zone is None:
+        return candidates
+    min_x, min_y, max_x, max_y = zone
+    inside = (
+        (candidates[:, 0] >= min_x) & (candidates[:, 0] <= max_x) &
+        (candidates[:, 1] >= min_y) & (candidates[:, 1] <= max_y)
+    )
+    if not inside.any():
+        print(f"Warning: Spawn zone {list(zone)} has no valid tiles. Using the whole map.")
+        return candidates
+    return candidates[inside]
+
+def _place_group(candidates: np.ndarray, count: int, spacing: float, separation: float,
+                 others: np.ndarray, taken: np.ndarray, rng: np.random.Generator) -> List[List[int]]:
+    """
+    Poisson-disk dart throwing over shuffled candidates: a tile is accepted when
+    it is at least `spacing` from this group and `separation` from the `others`
+    points. Distances are held as tile masks, so each round drops every
+    candidate already too close with one array lookup and only the survivors
+    are tried one by one. A relaxation step ends when no candidate is free
+    or after a bounded number of tries. Accepted tiles are marked in `taken`.
+    """
+    placed: List[List[int]] = []
+    if count <= 0:
+        return placed
+    scan_limit = max(_MIN_SCAN, _SCAN_PER_SPAWN * count)
+
+    for scale in _RELAXATION_STEPS:
+        stamp = _Stamp(spacing * scale)
+        blocked = taken | _near_mask(others, separation * scale, taken.shape)
+        blocked |= _near_mask(np.array(placed, dtype=np.int64).reshape(-1, 2), spacing * scale, taken.shape)
+        remaining, scanned = candidates, 0
+        while len(placed) < count and remaining.size and scanned < scan_limit:
+            remaining = remaining[~blocked[remaining[:, 1], remaining[:, 0]]]
+            round_size = min(max(_MIN_ROUND, 2 * (count - len(placed))), scan_limit - scanned)
+            batch, remaining = remaining[:round_size], remaining[round_size:]
+            scanned += len(batch)
+            for x, y in batch.tolist():
+                if blocked[y, x]:
+                    continue
+                blocked[y, x] = taken[y, x] = True
+                stamp.apply(blocked, x, y)
+                placed.append([x, y])
+                if len(placed) >= count:
+                    return placed
+
+    # Fewer free tiles than spawns: reuse this group's tiles rather than failing,
+    # but never a tile that went to another group
+    pool = placed or candidates[~taken[candidates[:, 1], candidates[:, 0]]][:1].tolist()
+    if not pool:
+        print("Warning: No free tiles left for a spawn group.")
+        return placed
+    while len(placed) < count:
+        placed.append(list(pool[int(rng.integers(len(pool)))]))
+    return placed
+
+def place_spawn_points(walkable: np.ndarray, rng: np.random.Generator,
+                       num_player: int = 1, num_enemy: int = 3,
+                       player_spacing: float = 2.0, enemy_spacing: float = 2.0,
+                       player_enemy_distance: Optional[float] = None,
+                       player_zone: Optional[Zone] = None,
+                       enemy_zone: Optional[Zone] = None) -> Dict[str, List[List[int]]]:
+    """
+    Picks player and enemy spawn tiles ([x, y]) from a walkable mask.
+    Spawns in the same group are at least *_spacing apart (the default 2.0
+    keeps them off adjacent and diagonal tiles), and every player is at least
+    player_enemy_distance from every enemy (default: a third of the shorter
+    map side). Zones restrict a group to a rectangle. Distances are relaxed
+    step by step if the map is too small; a group with more spawns than free
+    tiles shares its own tiles, and a group left with no free tile at all
+    gets none. Results depend only on the mask and the rng state.
+    """
+    height, width = walkable.shape
+    candidates = np.argwhere(walkable)[:, ::-1] # (row, col) -> (x, y)
+    if candidates.size == 0:
+        print("Warning: No valid floor tiles found for spawn points!")
+        # Default to center if no floor found (shouldn't happen with good generation)
+        return {"player": [[width // 2, height // 2]], "enemy": []}
+
+    candidates = candidates[rng.permutation(len(candidates))]
+    if player_enemy_distance is None:
+        player_enemy_distance = max(2.0, min(width, height) / 3)
+
+    taken = np.zeros(walkable.shape, dtype=bool)
+    player_spawns = _place_group(
+        _in_zone(candidates, player_zone), num_player, player_spacing,
+        player_enemy_distance, np.zeros((0, 2), dtype=np.int64), taken, rng
+    )
+    enemy_spawns = _place_group(
+        _in_zone(candidates, enemy_zone), num_enemy, enemy_spacing,
+        player_enemy_distance, np.array(player_spawns, dtype=np.int64).reshape(-1, 2), taken, rng
+    )
+    return {"player": player_spawns, "enemy": enemy_spawns}
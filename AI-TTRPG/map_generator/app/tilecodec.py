@@ -0,0 +1,215 @@
+"""
+Compact wire format for tile maps ("tilemap/v1").
+
+Tiles are stored row-major as little-endian unsigned integers (uint8 when
+every tile ID fits, uint16 otherwise), optionally compressed with zlib or a
+simple run-length encoding. The packed form travels either as a JSON
+envelope with a base64 payload, or as a raw application/octet-stream body
+with the metadata in X-Map-* headers.
+
+This module only uses the standard library. Each service can be started
+from its own directory, so there is no shared package both can import:
+map_generator/app/tilecodec.py is the source of truth, and
+world_engine/app/tilecodec.py is a byte-for-byte copy of it. Edit the
+map_generator copy and copy it over; map_generator's test_tilecodec.py
+fails while the two differ.
+"""
+import base64
+import struct
+import sys
+import zlib
+from array import array
+from itertools import chain, groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+ENCODING_NAME = "tilemap/v1"
+PACKED_MEDIA_TYPE = "application/vnd.ttrpg.tilemap+json"
+RAW_MEDIA_TYPE = "application/octet-stream"
+COMPRESSIONS = ("none", "rle", "zlib")
+DEFAULT_COMPRESSION = "zlib"
+
+# Largest map a payload may decode to; checked before anything is expanded
+MAX_TILES = 4096 * 4096
+
+# dtype name -> (array typecode, max tile ID)
+_DTYPES = {"uint8": ("B", 0xFF), "uint16": ("H", 0xFFFF)}
+
+
+# --- Raw Buffers ---
+def pick_dtype(max_tile: int) -> str:
+    """Returns the smallest supported dtype that can hold every tile ID."""
+    for name, (_, limit) in _DTYPES.items():
+        if max_tile <= limit:
+            return name
+    raise ValueError(f"Tile ID {max_tile} does not fit in any supported dtype.")
+
+
+def _to_array(raw: bytes, dtype: str) -> array:
+    values = array(_DTYPES[dtype][0])
+    values.frombytes(raw)
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap() # Wire format is little-endian
+    return values
+
+
+def _to_bytes(values: array) -> bytes:
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def rows_to_buffer(rows: List[List[int]]) -> Tuple[bytes, int, int, str]:
+    """Flattens a list-of-lists grid into (raw bytes, width, height, dtype)."""
+    height = len(rows)
+    width = len(rows[0]) if height else 0
+    if any(len(row) != width for row in rows):
+        raise ValueError("Tile map rows must all have the same length.")
+    flat = list(chain.from_iterable(rows))
+    if flat and min(flat) < 0:
+        raise ValueError("Tile IDs must be non-negative.")
+    dtype = pick_dtype(max(flat, default=0))
+    return _to_bytes(array(_DTYPES[dtype][0], flat)), width, height, dtype
+
+
+def buffer_to_rows(raw: bytes, width: int, height: int, dtype: str) -> List[List[int]]:
+    """Rebuilds a list-of-lists grid from raw row-major tile bytes."""
+    values = _to_array(raw, dtype)
+    if len(values) != width * height:
+        raise ValueError(f"Tile buffer holds {len(values)} tiles, expected {width}x{height}.")
+    return [values[y * width:(y + 1) * width].tolist() for y in range(height)]
+
+
+# --- Compression ---
+def _rle_encode(raw: bytes, dtype: str) -> bytes:
+    """Layout: run count (uint32), run lengths (uint32 each), run values (dtype each)."""
+    counts = []
+    values = array(_DTYPES[dtype][0])
+    for value, run in groupby(_to_array(raw, dtype)):
+        counts.append(sum(1 for _ in run))
+        values.append(value)
+    header = len(counts).to_bytes(4, "little")
+    return header + b"".join(c.to_bytes(4, "little") for c in counts) + _to_bytes(values)
+
+
+def _rle_decode(payload: bytes, dtype: str, num_tiles: int) -> bytes:
+    """Expands an RLE payload, refusing any whose runs do not add up to exactly num_tiles."""
+    typecode = _DTYPES[dtype][0]
+    itemsize = array(typecode).itemsize
+    if len(payload) < 4:
+        raise ValueError("Corrupt RLE tile payload.")
+    num_runs = int.from_bytes(payload[:4], "little")
+    counts_end = 4 + num_runs * 4
+    if len(payload) != counts_end + num_runs * itemsize:
+        raise ValueError("Corrupt RLE tile payload.")
+    counts = struct.unpack(f"<{num_runs}I", payload[4:counts_end])
+    if sum(counts) != num_tiles:
+        raise ValueError(f"RLE tile payload holds {sum(counts)} tiles, expected {num_tiles}.")
+    values = _to_array(payload[counts_end:], dtype)
+    out = array(typecode)
+    for value, run in zip(values, counts):
+        out.extend(array(typecode, (value,)) * run)
+    return _to_bytes(out)
+
+
+def compress(raw: bytes, dtype: str, compression: str) -> bytes:
+    if compression == "none":
+        return raw
+    if compression == "zlib":
+        return zlib.compress(raw)
+    if compression == "rle":
+        return _rle_encode(raw, dtype)
+    raise ValueError(f"Unknown tile map compression '{compression}'. Use one of {COMPRESSIONS}.")
+
+
+def decompress(payload: bytes, dtype: str, compression: str, num_tiles: int) -> bytes:
+    """
+    Decodes a payload that should hold num_tiles tiles. Output is capped
+    at that size, so a small payload cannot expand into a huge buffer.
+    """
+    if compression == "none":
+        return payload
+    if compression == "zlib":
+        expected = num_tiles * array(_DTYPES[dtype][0]).itemsize
+        decompressor = zlib.decompressobj()
+        raw = decompressor.decompress(payload, expected + 1)
+        if len(raw) > expected or decompressor.unconsumed_tail:
+            raise ValueError(f"zlib tile payload expands past {num_tiles} tiles.")
+        return raw
+    if compression == "rle":
+        return _rle_decode(payload, dtype, num_tiles)
+    raise ValueError(f"Unknown tile map compression '{compression}'. Use one of {COMPRESSIONS}.")
+
+
+# --- Envelopes ---
+def pack(raw: bytes, width: int, height: int, dtype: str, compression: str = DEFAULT_COMPRESSION) -> Dict[str, Any]:
+    """Builds the JSON envelope for a raw tile buffer."""
+    return {
+        "encoding": ENCODING_NAME,
+        "width": width,
+        "height": height,
+        "dtype": dtype,
+        "compression": compression,
+        "data": base64.b64encode(compress(raw, dtype, compression)).decode("ascii"),
+    }
+
+
+def pack_rows(rows: List[List[int]], compression: str = DEFAULT_COMPRESSION) -> Dict[str, Any]:
+    raw, width, height, dtype = rows_to_buffer(rows)
+    return pack(raw, width, height, dtype, compression)
+
+
+def is_packed(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("encoding") == ENCODING_NAME
+
+
+def unpack(envelope: Dict[str, Any]) -> List[List[int]]:
+    """Decodes a JSON envelope back into a list-of-lists grid."""
+    try:
+        dtype = envelope["dtype"]
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported tile map dtype '{dtype}'.")
+        width, height = int(envelope["width"]), int(envelope["height"])
+        if width < 0 or height < 0 or width * height > MAX_TILES:
+            raise ValueError(f"Tile map {width}x{height} is outside the supported size (at most {MAX_TILES} tiles).")
+        payload = base64.b64decode(envelope["data"])
+        raw = decompress(payload, dtype, envelope.get("compression", "none"), width * height)
+        return buffer_to_rows(raw, width, height, dtype)
+    except (KeyError, TypeError, zlib.error) as e:
+        raise ValueError(f"Malformed packed tile map: {e}")
+
+
+def raw_headers(width: int, height: int, dtype: str, compression: str) -> Dict[str, str]:
+    """X-Map-* headers that describe a raw application/octet-stream tile body."""
+    return {
+        "X-Map-Encoding": ENCODING_NAME,
+        "X-Map-Width": str(width),
+        "X-Map-Height": str(height),
+        "X-Map-Dtype": dtype,
+        "X-Map-Compression": compression,
+    }
+
+
+# --- Content Negotiation ---
+def negotiate(accept: Optional[str]) -> Tuple[Optional[str], str]:
+    """
+    Picks a tile map format from an Accept header.
+    Returns (media_type, compression); media_type is None when the client
+    should get the default JSON lists. The compression comes from a
+    'compression' media-type parameter, e.g.
+    'application/vnd.ttrpg.tilemap+json; compression=rle'.
+    """
+    for part in (accept or "").split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        media_type = media_type.lower()
+        if media_type not in (PACKED_MEDIA_TYPE, RAW_MEDIA_TYPE):
+            continue
+        compression = DEFAULT_COMPRESSION
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "compression":
+                compression = value.strip().strip('"').lower()
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown tile map compression '{compression}'. Use one of {COMPRESSIONS}.")
+        return media_type, compression
+    return None, DEFAULT_COMPRESSION
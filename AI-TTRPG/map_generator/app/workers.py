@@ -0,0 +1,336 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from . import chunks, core, models, patches, spawns
+
+# --- Configuration ---
+MAP_WORKERS = int(os.getenv("MAP_WORKERS", str(os.cpu_count() or 1)))
+MAP_EXECUTION_MODE = os.getenv("MAP_EXECUTION_MODE", "process") # "process" or "thread"
+MAP_QUEUE_LIMIT = int(os.getenv("MAP_QUEUE_LIMIT", "64")) # Jobs allowed to wait for a worker
+MAP_JOB_TIMEOUT = float(os.getenv("MAP_JOB_TIMEOUT", "60")) # Seconds a single job may run
+
+_LATENCY_WINDOW = 512 # Recent jobs kept for the latency stats
+
+# Global pool, created on startup by start_pool()
+_POOL: Optional["GenerationPool"] = None
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue limit is reached."""
+
+
+class JobTimeoutError(RuntimeError):
+    """Raised when a job runs past its timeout."""
+
+
+# --- Worker-side functions (must be top-level so they can be pickled) ---
+# Jobs carry every piece of data they use (the algorithm, the tile definitions)
+# from the snapshot the request started with, so workers never hold data that
+# a reload could make stale.
+def generate_to_json(algorithm: Dict[str, Any], seed: str, width: Optional[int], height: Optional[int],
+                     tile_definitions: Mapping[str, Any]) -> str:
+    """Runs one generation inside a worker and returns the serialized response."""
+    return core.run_generation(algorithm, seed, width, height, tile_definitions).model_dump_json()
+
+
+def generate_chunk_to_json(algorithm: Dict[str, Any], seed: str, chunk_x: int, chunk_y: int, chunk_size: int,
+                           region_width: Optional[int], region_height: Optional[int]) -> str:
+    """Generates one map chunk inside a worker and returns the serialized response."""
+    return chunks.generate_chunk(
+        algorithm, seed, chunk_x, chunk_y, chunk_size, region_width, region_height
+    ).model_dump_json()
+
+
+def regenerate_region_to_json(algorithm: Dict[str, Any], seed: str, grid: np.ndarray,
+                              window: Optional[List[int]], mask: Optional[np.ndarray]) -> str:
+    """Regenerates part of a map inside a worker and returns the serialized patch."""
+    return patches.regenerate_region(algorithm, seed, grid, window, mask).model_dump_json()
+
+
+def place_spawn_points_to_json(walkable: np.ndarray, seed: str, placement: Dict[str, Any]) -> str:
+    """Places spawn points inside a worker; placement holds place_spawn_points' keyword arguments."""
+    spawn_points = spawns.place_spawn_points(walkable, core.make_rng(seed), **placement)
+    return models.SpawnPointResponse(spawn_points=spawn_points, seed_used=seed).model_dump_json()
+
+
+def _worker_main(conn: Connection):
+    """Worker process loop: runs (func, args) jobs until a None arrives."""
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        func, args = job
+        try:
+            conn.send(("ok", func(*args)))
+        except Exception as e:
+            try:
+                conn.send(("error", e))
+            except Exception: # The exception itself could not be pickled
+                conn.send(("error", RuntimeError(repr(e))))
+
+
+# --- Parent Side ---
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self):
+        # 'spawn': forking a server that already runs threads can deadlock the child
+        context = get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        _, self.pid = self.conn.recv() # Blocks until the worker is up
+
+    def run(self, func: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[str, Any]:
+        """Sends one job and blocks for its result; raises EOFError if the worker dies."""
+        self.conn.send((func, args))
+        return self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _consume_result(job: "asyncio.Future"):
+    # Marks an abandoned job's outcome as seen so asyncio does not log it
+    if not job.cancelled():
+        job.exception()
+
+
+class GenerationPool:
+    """
+    Dedicated pool for CPU-bound generation jobs, driven from the event loop.
+
+    In 'process' mode each job runs in a pre-warmed worker process, so numpy
+    work never holds the server's GIL; a job that exceeds its timeout is
+    stopped by killing its worker, which is then replaced. 'thread' mode runs
+    jobs on a private thread pool instead (timeouts are reported, but a
+    running thread cannot be stopped).
+
+    At most queue_limit jobs may wait for a free worker; further submissions
+    raise QueueFullError unless they ask to wait for a slot.
+    """
+
+    def __init__(self, size: int = MAP_WORKERS, mode: str = MAP_EXECUTION_MODE,
+                 queue_limit: int = MAP_QUEUE_LIMIT, job_timeout: float = MAP_JOB_TIMEOUT):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown execution mode '{mode}'. Use 'process' or 'thread'.")
+        self.size = max(1, size)
+        self.mode = mode
+        self.queue_limit = max(0, queue_limit)
+        self.job_timeout = job_timeout
+        # One thread per worker: it waits on the worker's pipe, or runs the job in thread mode
+        self._threads = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="map-generation")
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: Set[_Worker] = set()
+        self._closed = False
+        self.waiting = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._queue_waits: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts every worker and waits until each one is up."""
+        self._idle = asyncio.Queue()
+        if self.mode == "thread":
+            for slot in range(self.size):
+                self._idle.put_nowait(slot)
+            return
+        for worker in self._threads.map(lambda _: _Worker(), range(self.size)):
+            self._workers.add(worker)
+            self._idle.put_nowait(worker)
+
+    def shutdown(self):
+        self._closed = True
+        for worker in list(self._workers):
+            worker.stop()
+        self._workers.clear()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    async def _replace(self, worker: _Worker):
+        """Kills a timed-out or crashed worker and puts a fresh one in its place."""
+        self._workers.discard(worker)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.kill)
+        if self._closed:
+            return
+        fresh = await loop.run_in_executor(None, _Worker)
+        self.restarts += 1
+        self._workers.add(fresh)
+        self._idle.put_nowait(fresh)
+
+    def _release(self, worker: Any, job: "asyncio.Future"):
+        """Frees the worker of an abandoned job once that job finishes."""
+        if self.mode == "process" and (job.cancelled() or isinstance(job.exception(), (EOFError, OSError))):
+            asyncio.ensure_future(self._replace(worker)) # Its pipe broke
+        else:
+            _consume_result(job)
+            self._idle.put_nowait(worker)
+
+    # --- Jobs ---
+    async def submit(self, func: Callable[..., Any], *args: Any,
+                     timeout: Optional[float] = None, wait_for_slot: bool = False) -> Any:
+        """
+        Runs func(*args) on a free worker and returns its result; exceptions
+        raised by func are re-raised here. Raises QueueFullError when the
+        queue is full, unless wait_for_slot is set (batch endpoints queue up
+        instead), and JobTimeoutError when the job runs past its timeout.
+        """
+        if self._idle is None:
+            raise RuntimeError("Map generation pool has not been started.")
+        if self.waiting >= self.queue_limit and not wait_for_slot:
+            self.rejected += 1
+            raise QueueFullError(f"Map generation queue is full ({self.waiting} jobs waiting).")
+        timeout = timeout or self.job_timeout
+
+        self.submitted += 1
+        self.waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+        self._queue_waits.append(time.perf_counter() - queued_at)
+
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            job = loop.run_in_executor(self._threads, worker.run, func, args)
+        else:
+            job = loop.run_in_executor(self._threads, lambda: func(*args))
+
+        self.running += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(job), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.failed += 1
+            if self.mode == "process":
+                job.add_done_callback(_consume_result)
+                asyncio.ensure_future(self._replace(worker)) # Killing it also frees its pipe thread
+                raise JobTimeoutError(f"Map generation job exceeded {timeout:g}s; its worker was restarted.")
+            job.add_done_callback(lambda done: self._release(worker, done))
+            raise JobTimeoutError(f"Map generation job exceeded {timeout:g}s.")
+        except asyncio.CancelledError:
+            # The caller went away; the worker stays busy until its job is done
+            job.add_done_callback(lambda done: self._release(worker, done))
+            raise
+        except (EOFError, OSError, BrokenPipeError) as e:
+            self.failed += 1
+            if self.mode == "process": # The pipe broke: the worker is gone
+                asyncio.ensure_future(self._replace(worker))
+                raise RuntimeError(f"Map generation worker failed: {e!r}")
+            self._idle.put_nowait(worker)
+            raise
+        except Exception:
+            # e.g. arguments that cannot be pickled; the pipe is intact, so keep the worker
+            self.failed += 1
+            self._idle.put_nowait(worker)
+            raise
+        finally:
+            self.running -= 1
+
+        self._idle.put_nowait(worker)
+        self._latencies.append(time.perf_counter() - queued_at)
+        if self.mode == "process":
+            status, result = result
+            if status == "error":
+                self.failed += 1
+                raise result
+        self.completed += 1
+        return result
+
+    # --- Stats ---
+    @staticmethod
+    def _summarize(samples: Deque[float]) -> Dict[str, Optional[float]]:
+        if not samples:
+            return {"avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(samples)
+        def at(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2)
+        return {
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p50_ms": at(0.5),
+            "p95_ms": at(0.95),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.size,
+            "queue_depth": self.waiting,
+            "queue_limit": self.queue_limit,
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "worker_restarts": self.restarts,
+            "job_timeout_s": self.job_timeout,
+            "job_latency": self._summarize(self._latencies), # Queue wait plus run time
+            "queue_wait": self._summarize(self._queue_waits),
+        }
+
+
+# --- Pool Lifecycle ---
+def start_pool(max_workers: int = MAP_WORKERS) -> GenerationPool:
+    """Creates the generation pool and waits for every worker to come up."""
+    global _POOL
+    if _POOL is None:
+        pool = GenerationPool(size=max_workers)
+        pool.start()
+        _POOL = pool
+        print(f"INFO: Map generation pool started with {pool.size} {pool.mode} workers.")
+    return _POOL
+
+
+def get_pool() -> GenerationPool:
+    """Returns the running pool. start_pool() must have run (the app lifespan does this)."""
+    if _POOL is None:
+        raise RuntimeError("Map generation pool has not been started.")
+    return _POOL
+
+
+def shutdown_pool():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
+        print("INFO: Map generation pool shut down.")
+
+
+def pool_stats() -> Optional[Dict[str, Any]]:
+    return _POOL.stats() if _POOL is not None else None
@@ -0,0 +1,62 @@
+"""
+Compares the per-cell reference CA iteration with the vectorized kernel.
+
+Run from the AI-TTRPG directory:
+    python -m map_generator.benchmarks.bench_ca
+    python -m map_generator.benchmarks.bench_ca --sizes 64 256 --iterations 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from map_generator.app import core
+
+DEFAULT_PARAMS = {
+    "initial_density": 0.45,
+    "birth_limit": 4,
+    "death_limit": 3,
+    "wall_tile_id": 1,
+    "floor_tile_id": 0,
+}
+
+
+def _initial_grid(size: int, seed: int) -> np.ndarray:
+    rng = np.random.RandomState(seed)
+    density = DEFAULT_PARAMS["initial_density"]
+    return rng.choice([0, 1], size=(size, size), p=[1 - density, density])
+
+
+def _time_iterations(step, grid: np.ndarray, iterations: int) -> (float, np.ndarray):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        grid = step(grid, DEFAULT_PARAMS)
+    return time.perf_counter() - start, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--iterations", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--skip-scalar-above", type=int, default=256,
+                        help="Skip the slow reference loop for sizes larger than this.")
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'scalar (s)':>12} {'vectorized (s)':>15} {'speedup':>9}  match")
+    for size in args.sizes:
+        grid = _initial_grid(size, args.seed)
+        vec_time, vec_grid = _time_iterations(core._run_ca_iteration, grid, args.iterations)
+
+        if size > args.skip_scalar_above:
+            print(f"{size:>6} {'-':>12} {vec_time:>15.4f} {'-':>9}  -")
+            continue
+
+        scalar_time, scalar_grid = _time_iterations(core._run_ca_iteration_scalar, grid, args.iterations)
+        match = np.array_equal(scalar_grid, vec_grid)
+        speedup = scalar_time / vec_time if vec_time else float("inf")
+        print(f"{size:>6} {scalar_time:>12.4f} {vec_time:>15.4f} {speedup:>8.1f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
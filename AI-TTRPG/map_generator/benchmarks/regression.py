@@ -0,0 +1,255 @@
+"""
+Benchmark and regression suite for map generation.
+
+Runs every algorithm in generation_algorithms.json through run_generation,
+plus the CA iteration, the drunkard's walk, the overworld noise with its
+LOD pyramid and each post-processing step on their own, across a ladder
+of map sizes with fixed seeds. For every case it
+records wall time (best of --repeat runs), peak traced memory (tracemalloc)
+and a checksum of the output, and compares them with the baselines stored
+in baselines.json next to this file.
+
+A case fails when its checksum differs from the baseline (the output for a
+fixed seed changed) or when it is slower than the baseline by more than the
+tolerance. Pass --update to rewrite the baselines after an intended change.
+
+Run from the AI-TTRPG directory:
+    python -m map_generator.benchmarks.regression
+    python -m map_generator.benchmarks.regression --sizes 32 128 --tolerance 0.5
+    python -m map_generator.benchmarks.regression --update
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from map_generator.app import core, data_loader, noise
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SIZES = [32, 128, 512, 2048]
+DEFAULT_TOLERANCE = float(os.getenv("MAP_BENCH_TOLERANCE", "0.5")) # 0.5 = fail when 50% slower
+DEFAULT_MEMORY_TOLERANCE = float(os.getenv("MAP_BENCH_MEMORY_TOLERANCE", "0.5"))
+# Cases below these are too noisy to fail on time or memory alone
+MIN_COMPARABLE_SECONDS = 0.005
+MIN_COMPARABLE_BYTES = 1 << 20
+SEED = "benchmark-seed"
+
+CA_PARAMS = {"initial_density": 0.45, "birth_limit": 4, "death_limit": 3, "wall_tile_id": 1, "floor_tile_id": 0}
+WALK_PARAMS = {"walk_steps": 2000, "walkers": 4, "wall_tile_id": 4, "floor_tile_id": 3}
+
+
+# --- Checksums ---
+def grid_checksum(grid: Any) -> str:
+    """sha256 of a grid's shape and tiles, independent of its integer dtype."""
+    values = np.ascontiguousarray(np.asarray(grid, dtype=np.int64))
+    digest = hashlib.sha256(str(values.shape).encode("utf-8"))
+    digest.update(values.astype("<i8").tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _generation_checksum(response) -> str:
+    digest = hashlib.sha256(grid_checksum(response.map_data).encode("utf-8"))
+    digest.update(json.dumps(response.spawn_points, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# --- Cases ---
+# A case is (case_id, setup): setup() prepares the inputs and returns the
+# measured zero-argument callable together with the checksum for its output.
+Work = Tuple[Callable[[], Any], Callable[[Any], str]]
+Case = Tuple[str, Callable[[], Work]]
+
+
+def _ca_grid(size: int) -> np.ndarray:
+    return core.generate_cellular_automata(dict(CA_PARAMS, iterations=0), size, size, core.make_rng(SEED))
+
+
+def _generation_case(algorithm: Dict[str, Any], size: int) -> Case:
+    def setup():
+        return lambda: core.run_generation(algorithm, SEED, size, size), _generation_checksum
+    return f"generate/{algorithm.get('name')}/{size}", setup
+
+
+def _ca_iteration_case(size: int) -> Case:
+    def setup():
+        grid = _ca_grid(size)
+        return lambda: core._run_ca_iteration(grid, CA_PARAMS), grid_checksum
+    return f"ca_iteration/{size}", setup
+
+
+def _walk_case(size: int) -> Case:
+    def setup():
+        return lambda: core.generate_drunkards_walk(WALK_PARAMS, size, size, core.make_rng(SEED)), grid_checksum
+    return f"drunkards_walk/{size}", setup
+
+
+def _post_processing_case(step_name: str, size: int) -> Case:
+    def setup():
+        func = core.POST_PROCESSING_FUNCTIONS[step_name]
+        grid = _ca_grid(size)
+        for _ in range(4):
+            grid = core._run_ca_iteration(grid, CA_PARAMS)
+        return lambda: func(grid.copy(), CA_PARAMS, core.make_rng(SEED)), grid_checksum
+    return f"post_processing/{step_name}/{size}", setup
+
+
+def _overworld_lod_case(size: int) -> Case:
+    def setup():
+        def work():
+            elevation = noise.fractal_noise(7, 0, 0, size, size, scale=256, octaves=6)
+            tiles = noise.elevation_to_tiles(elevation, noise.build_tile_lut(noise.DEFAULT_BANDS))
+            return [tiles] + noise.lod_pyramid(tiles)
+        return work, lambda levels: "".join(grid_checksum(level) for level in levels)[:16]
+    return f"overworld_lod/{size}", setup
+
+
+def build_cases(sizes: List[int]) -> List[Case]:
+    cases: List[Case] = []
+    for size in sizes:
+        for algorithm in data_loader.get_snapshot().generation_algorithms:
+            cases.append(_generation_case(algorithm, size))
+        cases.append(_ca_iteration_case(size))
+        cases.append(_walk_case(size))
+        cases.append(_overworld_lod_case(size))
+        for step_name in sorted(set(core.POST_PROCESSING_FUNCTIONS)):
+            cases.append(_post_processing_case(step_name, size))
+    return cases
+
+
+# --- Measurement ---
+def measure(setup: Callable[[], Work], repeat: int, timed: bool = True) -> Dict[str, Any]:
+    """
+    One traced run for peak memory and the checksum (it also warms up the
+    code path), then the best wall time of `repeat` untraced runs.
+    """
+    work, digest = setup()
+    tracemalloc.start()
+    try:
+        output = work()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    checksum = digest(output)
+    del output
+
+    seconds = None
+    if timed:
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            work()
+            best = min(best, time.perf_counter() - start)
+        seconds = round(best, 6)
+    return {"seconds": seconds, "peak_bytes": peak, "checksum": checksum}
+
+
+def run_cases(sizes: List[int], repeat: int = 3, timed: bool = True,
+              case_filter: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    if not data_loader.get_snapshot().generation_algorithms:
+        data_loader.load_data()
+    results = {}
+    for case_id, setup in build_cases(sizes):
+        if case_filter and case_filter not in case_id:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()): # Generation logs each step
+            results[case_id] = measure(setup, repeat, timed)
+    return results
+
+
+# --- Baselines ---
+def load_baselines(path: str = BASELINE_FILE) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("cases", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: Dict[str, Dict[str, Any]], path: str = BASELINE_FILE):
+    """Merges results into the baseline file, keeping cases that were not rerun."""
+    cases = load_baselines(path)
+    cases.update(results)
+    document = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor() or "unknown",
+        },
+        "cases": dict(sorted(cases.items())),
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Dict[str, Any]],
+            tolerance: float = DEFAULT_TOLERANCE,
+            memory_tolerance: Optional[float] = DEFAULT_MEMORY_TOLERANCE) -> List[str]:
+    """Returns one message per regression; an empty list means every case passed."""
+    failures = []
+    for case_id, result in results.items():
+        baseline = baselines.get(case_id)
+        if baseline is None:
+            continue # New case: nothing to compare against until --update
+        if result["checksum"] != baseline["checksum"]:
+            failures.append(f"{case_id}: output changed (checksum {result['checksum']} != {baseline['checksum']})")
+        base_seconds, seconds = baseline.get("seconds"), result.get("seconds")
+        if seconds is not None and base_seconds and max(seconds, base_seconds) >= MIN_COMPARABLE_SECONDS:
+            if seconds > base_seconds * (1 + tolerance):
+                failures.append(f"{case_id}: {seconds:.4f}s is over {tolerance:.0%} slower than {base_seconds:.4f}s")
+        base_peak = baseline.get("peak_bytes")
+        if memory_tolerance is not None and base_peak and result["peak_bytes"] >= MIN_COMPARABLE_BYTES \
+                and result["peak_bytes"] > base_peak * (1 + memory_tolerance):
+            failures.append(f"{case_id}: peak memory {result['peak_bytes']} B is over {memory_tolerance:.0%} "
+                            f"above {base_peak} B")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the best one counts.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown as a fraction of the baseline time (env MAP_BENCH_TOLERANCE).")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="Allowed growth in peak memory (env MAP_BENCH_MEMORY_TOLERANCE); negative disables.")
+    parser.add_argument("--filter", help="Only run cases whose id contains this text.")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baselines.")
+    args = parser.parse_args()
+
+    results = run_cases(args.sizes, args.repeat, case_filter=args.filter)
+    baselines = load_baselines()
+
+    print(f"{'case':<52} {'time (s)':>10} {'baseline':>10} {'peak (KiB)':>11}  checksum")
+    for case_id, result in results.items():
+        base = baselines.get(case_id, {})
+        base_seconds = f"{base['seconds']:.4f}" if base.get("seconds") else "-"
+        print(f"{case_id:<52} {result['seconds']:>10.4f} {base_seconds:>10} "
+              f"{result['peak_bytes'] / 1024:>11.1f}  {result['checksum']}")
+
+    if args.update:
+        save_baselines(results)
+        print(f"Baselines written to {BASELINE_FILE}")
+        return
+
+    memory_tolerance = args.memory_tolerance if args.memory_tolerance >= 0 else None
+    failures = compare(results, baselines, args.tolerance, memory_tolerance)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    if failures:
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
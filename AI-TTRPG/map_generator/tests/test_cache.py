@@ -0,0 +1,56 @@
+import asyncio
+
+from map_generator.app import models
+from map_generator.app.cache import MapCache, make_cache_key
+
+ALGORITHM = {"name": "Test", "algorithm": "cellular_automata", "parameters": {"width": 4}}
+
+
+def _response(seed):
+    return models.MapGenerationResponse(
+        width=2, height=1, map_data=[[0, 1]], seed_used=seed, algorithm_used="Test"
+    )
+
+
+def test_cache_key_changes_with_parameters():
+    changed = dict(ALGORITHM, parameters={"width": 5})
+    assert make_cache_key(ALGORITHM, "1", 4, 4) == make_cache_key(dict(ALGORITHM), "1", 4, 4)
+    assert make_cache_key(ALGORITHM, "1", 4, 4) != make_cache_key(changed, "1", 4, 4)
+
+
+def test_lru_eviction_and_disk_tier(tmp_path):
+    cache = MapCache(max_entries=2, max_bytes=1_000_000, disk_dir=str(tmp_path))
+    for seed in ["a", "b", "c"]:
+        cache.put(seed, _response(seed))
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+
+    # "a" was evicted from memory but survives on disk
+    assert cache.get("a").seed_used == "a"
+    assert cache.stats()["disk_hits"] == 1
+
+    # A fresh cache over the same directory sees earlier entries
+    restarted = MapCache(max_entries=2, max_bytes=1_000_000, disk_dir=str(tmp_path))
+    assert restarted.get("c").seed_used == "c"
+    assert restarted.get("missing") is None
+    assert restarted.stats()["misses"] == 1
+
+
+def test_disk_tier_is_bounded_and_evicts_least_recently_used(tmp_path):
+    cache = MapCache(max_entries=1, max_bytes=1_000_000, disk_dir=str(tmp_path), disk_max_entries=2)
+    cache.put("a", _response("a"))
+    cache.put("b", _response("b"))
+    cache.clear()
+    assert asyncio.run(cache.get_async("a")).seed_used == "a" # Now "b" is least recently used
+    asyncio.run(cache.put_serialized_async("c", _response("c").model_dump_json().encode("utf-8")))
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    assert cache.stats()["disk_evictions"] == 1
+
+    cache.clear()
+    assert cache.get("b") is None
+    assert cache.get("a").seed_used == "a" and cache.get("c").seed_used == "c"
+
+    # A restart with a smaller limit trims what it finds
+    restarted = MapCache(max_entries=1, max_bytes=1_000_000, disk_dir=str(tmp_path), disk_max_entries=1)
+    assert restarted.stats()["disk_entries"] == 1
+    assert len(list(tmp_path.glob("*.json"))) == 1
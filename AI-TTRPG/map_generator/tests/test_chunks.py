@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from map_generator.app import chunks
+
+FOREST = {
+    "name": "Forest Clearing",
+    "algorithm": "cellular_automata",
+    "parameters": {"initial_density": 0.45, "iterations": 4, "wall_tile_id": 1, "floor_tile_id": 0},
+    "post_processing": ["add_border_trees", "clear_center", "fill_unreachable"],
+}
+
+
+def _stitch(seed, chunk_size, region):
+    count = -(-region // chunk_size)
+    rows = []
+    for cy in range(count):
+        row = [np.array(chunks.generate_chunk(FOREST, seed, cx, cy, chunk_size, region, region).map_data)
+               for cx in range(count)]
+        rows.append(np.hstack(row))
+    return np.vstack(rows)
+
+
+def test_chunks_line_up_with_one_large_chunk():
+    whole = np.array(chunks.generate_chunk(FOREST, "seam", 0, 0, 100, 100, 100).map_data)
+    assert np.array_equal(_stitch("seam", 32, 100), whole)
+    assert np.array_equal(_stitch("seam", 25, 100), whole)
+
+
+def test_unbounded_chunks_line_up_across_negative_coordinates():
+    left = chunks.generate_chunk(FOREST, "seam", -1, 0, 16)
+    right = chunks.generate_chunk(FOREST, "seam", 0, 0, 16)
+    wide_left = np.array(chunks.generate_chunk(FOREST, "seam", -1, 0, 32).map_data)
+    wide_right = np.array(chunks.generate_chunk(FOREST, "seam", 0, 0, 32).map_data)
+    stitched = np.hstack([np.array(left.map_data), np.array(right.map_data)])
+    assert np.array_equal(stitched, np.hstack([wide_left, wide_right])[:16, 16:48])
+    assert left.skipped_post_processing == ["add_border_trees", "clear_center", "fill_unreachable"]
+
+
+def test_chunk_outside_bounded_region_is_rejected():
+    with pytest.raises(ValueError):
+        chunks.generate_chunk(FOREST, "seam", 4, 0, 32, 100, 100)
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+
+import numpy as np
+
+from map_generator.app import core, data_loader
+
+
+def test_vectorized_ca_iteration_matches_scalar():
+    params = {"wall_tile_id": 1, "floor_tile_id": 0, "birth_limit": 4, "death_limit": 3}
+    rng = np.random.RandomState(7)
+    for height, width in [(1, 1), (5, 9), (20, 30), (33, 17)]:
+        grid = rng.choice([0, 1], size=(height, width), p=[0.55, 0.45])
+        for _ in range(4):
+            expected = core._run_ca_iteration_scalar(grid, params)
+            grid = core._run_ca_iteration(grid, params)
+            assert np.array_equal(grid, expected)
+
+
+def test_cellular_automata_is_reproducible_for_seed():
+    params = {"initial_density": 0.45, "iterations": 4, "wall_tile_id": 1, "floor_tile_id": 0}
+    first = core.generate_cellular_automata(params, 30, 20, core.make_rng("12345"))
+    second = core.generate_cellular_automata(params, 30, 20, core.make_rng("12345"))
+    assert np.array_equal(first, second)
+
+
+def _reference_regions(mask):
+    """Plain BFS labeling used to check label_regions."""
+    height, width = mask.shape
+    seen = np.zeros_like(mask, dtype=bool)
+    regions = []
+    for y in range(height):
+        for x in range(width):
+            if mask[y, x] and not seen[y, x]:
+                seen[y, x] = True
+                stack, cells = [(x, y)], []
+                while stack:
+                    cx, cy = stack.pop()
+                    cells.append((cx, cy))
+                    for nx, ny in [(cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)]:
+                        if 0 <= nx < width and 0 <= ny < height and mask[ny, nx] and not seen[ny, nx]:
+                            seen[ny, nx] = True
+                            stack.append((nx, ny))
+                regions.append(cells)
+    return regions
+
+
+def test_label_regions_matches_bfs():
+    rng = np.random.RandomState(3)
+    for height, width in [(1, 8), (8, 1), (12, 12), (25, 40)]:
+        mask = rng.rand(height, width) < 0.55
+        labels, sizes, boxes = core.label_regions(mask)
+        expected = _reference_regions(mask)
+        assert len(sizes) == len(expected)
+        for label, cells in enumerate(expected, start=1):
+            xs, ys = zip(*cells)
+            assert sizes[label - 1] == len(cells)
+            assert boxes[label - 1].tolist() == [min(xs), min(ys), max(xs), max(ys)]
+            assert all(labels[y, x] == label for x, y in cells)
+        assert np.count_nonzero(labels) == mask.sum()
+
+
+def test_fill_unreachable_keeps_only_largest_region():
+    grid = np.array([
+        [3, 3, 4, 3],
+        [3, 4, 4, 4],
+        [3, 3, 4, 3],
+    ])
+    filled = core.post_process_fill_unreachable(grid, {"floor_tile_id": 3, "wall_tile_id": 4}, core.make_rng("0"))
+    stats = core.compute_region_stats(filled, 3)
+    assert stats.count == 1
+    assert stats.regions[0].size == 5
+    assert stats.regions[0].bounding_box == [0, 0, 1, 2]
+
+
+def test_concurrent_generations_are_deterministic():
+    algorithm = {
+        "name": "Simple Cave",
+        "algorithm": "drunkards_walk",
+        "parameters": {"width": 25, "height": 25, "walk_steps": 500, "wall_tile_id": 4, "floor_tile_id": 3},
+        "post_processing": ["fill_unreachable"],
+    }
+    expected = core.run_generation(algorithm, "not-a-number", None, None)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: core.run_generation(algorithm, "not-a-number", None, None), range(16)))
+    assert all(r == expected for r in results)
+
+
+def _reference_walk(params, width, height, rng):
+    """Single-walker loop the vectorized walk must reproduce."""
+    grid = np.full((height, width), params["wall_tile_id"], dtype=int)
+    draws = rng.integers(0, 4, size=(params["walk_steps"], 1))[:, 0]
+    x, y = width // 2, height // 2
+    for draw in draws:
+        grid[y, x] = params["floor_tile_id"]
+        dx, dy = core._WALK_DELTAS[draw]
+        x, y = max(0, min(width - 1, x + dx)), max(0, min(height - 1, y + dy))
+    return grid
+
+
+def test_single_walker_matches_reference_loop():
+    params = {"walk_steps": 200, "wall_tile_id": 4, "floor_tile_id": 3}
+    walked = core.generate_drunkards_walk(params, 9, 7, core.make_rng("walk"))
+    assert np.array_equal(walked, _reference_walk(params, 9, 7, core.make_rng("walk")))
+
+
+def test_multi_walker_stops_at_target_floor_ratio():
+    params = {"walk_steps": 100000, "walkers": 8, "target_floor_ratio": 0.4, "wall_tile_id": 4, "floor_tile_id": 3}
+    grid = core.generate_drunkards_walk(params, 64, 48, core.make_rng("cave"))
+    assert np.count_nonzero(grid == 3) == int(np.ceil(0.4 * 64 * 48))
+    assert core.compute_region_stats(grid, 3).count == 1
+
+
+def test_tag_index_matches_linear_scan(monkeypatch):
+    rng = random.Random(7)
+    vocabulary = [f"tag{i}" for i in range(12)]
+    catalogue = [{"name": f"algo{i}", "required_tags": rng.sample(vocabulary, rng.randint(0, 3))} for i in range(300)]
+    catalogue[5]["required_tags"] = ["Tag1", "TAG2"] # Matching is case-insensitive
+    monkeypatch.setattr(data_loader, "_SNAPSHOT", data_loader.build_snapshot({}, catalogue))
+
+    for _ in range(50):
+        tags = rng.sample(vocabulary, rng.randint(0, 6))
+        expected = [a for a in catalogue if {t.lower() for t in a["required_tags"]} <= set(tags)]
+        assert core.find_matching_algorithms([t.upper() for t in tags]) == expected
@@ -0,0 +1,62 @@
+import json
+import shutil
+
+import pytest
+
+from map_generator.app import core, data_loader
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for filename in (data_loader.TILE_FILE, data_loader.ALGORITHM_FILE):
+        shutil.copy(f"{data_loader.DATA_DIR}/{filename}", tmp_path / filename)
+    return tmp_path
+
+
+def _edit_algorithms(data_dir, edit):
+    path = data_dir / data_loader.ALGORITHM_FILE
+    document = json.loads(path.read_text())
+    edit(document["algorithms"])
+    path.write_text(json.dumps(document))
+
+
+def test_reload_swaps_snapshot_and_keeps_old_one_intact(data_dir, monkeypatch):
+    monkeypatch.setattr(data_loader, "_SNAPSHOT", data_loader.DataSnapshot())
+    old = data_loader.load_data(str(data_dir))
+    assert data_loader.reload_data(str(data_dir)) == (old, False) # Same content: no swap
+
+    _edit_algorithms(data_dir, lambda algos: algos[0].update(name="Renamed Clearing"))
+    new, changed = data_loader.reload_data(str(data_dir))
+    assert changed and new.version != old.version
+    assert data_loader.get_snapshot() is new
+    assert core.find_algorithm("Renamed Clearing") is not None
+    # A request holding the old snapshot still sees the old data
+    assert core.find_algorithm("Renamed Clearing", old) is None
+    assert old.algorithms_by_name[old.generation_algorithms[0]["name"]] is old.generation_algorithms[0]
+
+
+def test_invalid_reload_keeps_current_snapshot(data_dir, monkeypatch):
+    monkeypatch.setattr(data_loader, "_SNAPSHOT", data_loader.DataSnapshot())
+    current = data_loader.load_data(str(data_dir))
+
+    def break_data(algos):
+        algos[1]["name"] = algos[0]["name"]
+        algos[0]["parameters"]["wall_tile_id"] = 99
+    _edit_algorithms(data_dir, break_data)
+    with pytest.raises(data_loader.DataValidationError) as error:
+        data_loader.reload_data(str(data_dir))
+    assert len(error.value.problems) == 2
+    assert data_loader.get_snapshot() is current
+
+    (data_dir / data_loader.TILE_FILE).write_text("{not json")
+    with pytest.raises(json.JSONDecodeError):
+        data_loader.reload_data(str(data_dir))
+    assert data_loader.get_snapshot() is current
+
+
+def test_snapshot_is_read_only():
+    snapshot = data_loader.build_snapshot({"0": {"passable": True}}, [{"name": "a", "required_tags": ["x"]}])
+    with pytest.raises(TypeError):
+        snapshot.tile_definitions["1"] = {"passable": False}
+    with pytest.raises(AttributeError):
+        snapshot.version = "other"
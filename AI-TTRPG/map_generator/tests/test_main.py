@@ -1,4 +1,7 @@
+import json
+
 from fastapi.testclient import TestClient
+from map_generator.app import main, tilecodec
 from map_generator.app.main import app
 
 def test_generate_map():
@@ -14,3 +17,128 @@ def test_generate_map():
         data = response.json()
         assert "map_data" in data
         assert len(data["map_data"]) > 0
+
+        player_x, player_y = data["spawn_points"]["player"][0]
+        player_field = tilecodec.unpack(data["navigation"]["distance_fields"]["player"])
+        assert player_field[player_y][player_x] == 0
+
+        pool = client.get("/").json()["generation_pool"]
+        assert pool["completed"] >= 1 and pool["queue_depth"] == 0
+
+
+def test_generate_map_reuses_cached_result_for_seed():
+    with TestClient(app) as client:
+        request = {"tags": ["forest", "outside", "clearing"], "seed": "777"}
+        first = client.post("/v1/generate", json=request).json()
+        hits_before = client.get("/").json()["cache"]["hits"]
+        second = client.post("/v1/generate", json=request).json()
+        assert client.get("/").json()["cache"]["hits"] == hits_before + 1
+        assert first == second
+
+
+def test_generate_map_batch_streams_ndjson():
+    with TestClient(app) as client:
+        response = client.post(
+            "/v1/generate/batch",
+            json=[
+                {"tags": ["cave", "inside", "dungeon"], "seed": "1"},
+                {"tags": ["no-such-tag"]},
+                {"tags": ["forest", "outside", "clearing"], "seed": "2", "width": 12, "height": 10},
+            ],
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+        assert sorted(lines) == [0, 1, 2]
+        assert lines[0]["status"] == "ok"
+        assert lines[1]["status"] == "error" and lines[1]["status_code"] == 404
+        assert len(lines[2]["result"]["map_data"]) == 10
+
+        # Workers load the tile definitions too, so navigation data is real
+        costs = tilecodec.unpack(lines[0]["result"]["navigation"]["movement_costs"])
+        assert any(any(row) for row in costs)
+
+
+def test_generate_map_batch_rejects_oversize_batches(monkeypatch):
+    monkeypatch.setattr(main, "MAP_BATCH_LIMIT", 2)
+    with TestClient(app) as client:
+        response = client.post("/v1/generate/batch", json=[{"tags": ["cave"], "seed": str(i)} for i in range(3)])
+        assert response.status_code == 413
+
+
+def test_generate_map_packed_and_raw_formats():
+    request = {"tags": ["cave", "inside", "dungeon"], "seed": "12345"}
+    with TestClient(app) as client:
+        plain = client.post("/v1/generate", json=request).json()
+
+        packed = client.post(
+            "/v1/generate", json=request,
+            headers={"Accept": "application/vnd.ttrpg.tilemap+json; compression=rle"},
+        )
+        assert packed.headers["content-type"].startswith("application/vnd.ttrpg.tilemap+json")
+        assert tilecodec.unpack(packed.json()["map_data"]) == plain["map_data"]
+
+        raw = client.post("/v1/generate", json=request, headers={"Accept": "application/octet-stream"})
+        assert raw.headers["x-map-dtype"] == "uint8"
+        tiles = tilecodec.decompress(raw.content, "uint8", raw.headers["x-map-compression"], plain["width"] * plain["height"])
+        assert tilecodec.buffer_to_rows(tiles, plain["width"], plain["height"], "uint8") == plain["map_data"]
+
+
+def test_chunk_endpoints():
+    base = {"tags": ["forest", "outside", "clearing"], "seed": "42", "chunk_size": 16}
+    with TestClient(app) as client:
+        submitted = client.get("/").json()["generation_pool"]["submitted"]
+        single = client.post("/v1/chunks", json={**base, "chunk_x": 1, "chunk_y": -2})
+        assert single.status_code == 200
+        assert (single.json()["origin_x"], single.json()["origin_y"]) == (16, -32)
+        assert client.get("/").json()["generation_pool"]["submitted"] == submitted + 1
+
+        streamed = client.post("/v1/chunks/stream", json={**base, "chunks": [[1, -2], [0, 0]]})
+        lines = {tuple(item["chunk"]): item for item in map(json.loads, streamed.text.splitlines())}
+        assert lines[(1, -2)]["result"]["map_data"] == single.json()["map_data"]
+        assert lines[(0, 0)]["status"] == "ok"
+
+        # Coordinates are bounded, so oversized ones are rejected before any work
+        assert client.post("/v1/chunks", json={**base, "chunk_x": 10 ** 30, "chunk_y": 0}).status_code == 422
+        assert client.post("/v1/chunks/stream", json={**base, "chunks": [[0, -(2 ** 40)]]}).status_code == 422
+
+
+def test_spawn_points_endpoint():
+    map_data = [[1] * 12] + [[1] + [0] * 10 + [1] for _ in range(10)] + [[1] * 12]
+    request = {"map_data": map_data, "seed": "spawn", "num_player": 1, "num_enemy": 3}
+    with TestClient(app) as client:
+        response = client.post("/v1/spawn_points", json=request)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["spawn_points"]["enemy"]) == 3
+        assert all(map_data[y][x] == 0 for x, y in data["spawn_points"]["enemy"] + data["spawn_points"]["player"])
+
+        packed = client.post("/v1/spawn_points", json={**request, "map_data": tilecodec.pack_rows(map_data)})
+        assert packed.json() == data
+        assert client.get("/").json()["generation_pool"]["completed"] >= 2 # Placed in the pool
+
+
+def test_regenerate_region_endpoint():
+    with TestClient(app) as client:
+        base = client.post("/v1/generate", json={"tags": ["forest", "outside", "clearing"], "seed": "7"}).json()
+        request = {"map_data": base["map_data"], "algorithm": base["algorithm_used"], "seed": "edit", "window": [2, 2, 9, 9]}
+        response = client.post("/v1/regenerate_region", json=request)
+        assert response.status_code == 200
+        patch = response.json()
+        assert patch["origin_x"] >= 2 and patch["origin_x"] + patch["width"] <= 10
+        assert len(patch["map_data"]) == patch["height"]
+
+        packed = client.post("/v1/regenerate_region", json=request,
+                             headers={"Accept": "application/vnd.ttrpg.tilemap+json"})
+        assert tilecodec.unpack(packed.json()["map_data"]) == patch["map_data"]
+
+        assert client.post("/v1/regenerate_region", json={**request, "algorithm": "Nope"}).status_code == 404
+        assert client.post("/v1/regenerate_region", json={**request, "window": [90, 90, 99, 99]}).status_code == 400
+
+
+def test_reload_endpoint_reports_data_version():
+    with TestClient(app) as client:
+        version = client.get("/").json()["data_version"]
+        body = client.post("/v1/data/reload").json()
+        assert body["changed"] is False and body["version"] == body["previous_version"] == version
+        assert body["generation_algorithms"] >= 1
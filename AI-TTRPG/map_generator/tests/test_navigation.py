@@ -0,0 +1,54 @@
+from collections import deque
+
+import numpy as np
+
+from map_generator.app import core, navigation, tilecodec
+
+TILES = {
+    "0": {"name": "Grass", "passable": True},
+    "1": {"name": "Tree", "passable": False},
+    "3": {"name": "Mud", "passable": True, "movement_cost": 3},
+}
+
+
+def _reference_bfs(walkable, sources):
+    height, width = walkable.shape
+    distances = np.full((height, width), navigation.UNREACHABLE, dtype=np.int64)
+    queue = deque()
+    for x, y in sources:
+        if walkable[y, x] and distances[y, x] != 0:
+            distances[y, x] = 0
+            queue.append((x, y))
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and walkable[ny, nx] and distances[ny, nx] == navigation.UNREACHABLE:
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((nx, ny))
+    return distances
+
+
+def test_cost_lut_marks_unknown_and_blocked_tiles_impassable():
+    grid = np.array([[0, 1, 3], [7, -1, 0]])
+    costs = navigation.cost_grid(grid, navigation.build_cost_lut(TILES))
+    assert costs.tolist() == [[1, 0, 3], [0, 0, 1]]
+
+
+def test_distance_field_matches_reference_bfs():
+    rng = core.make_rng("nav")
+    walkable = rng.random((48, 64)) < 0.6
+    sources = [[3, 4], [60, 40], [10, 30]]
+    expected = _reference_bfs(walkable, sources)
+    assert np.array_equal(navigation.distance_field(walkable, sources), expected)
+
+
+def test_build_navigation_packs_fields_per_spawn_group():
+    grid = np.zeros((6, 8), dtype=int)
+    grid[:, 4] = 1 # A wall splitting the map in two
+    nav = navigation.build_navigation(grid, TILES, {"player": [[0, 0]], "enemy": []})
+    assert set(nav.distance_fields) == {"player"}
+    player = np.array(tilecodec.unpack(nav.distance_fields["player"].model_dump()))
+    assert player[0, 0] == 0 and player[5, 3] == 8
+    assert (player[:, 4:] == nav.unreachable).all()
+    assert tilecodec.unpack(nav.movement_costs.model_dump()) == (grid == 0).astype(int).tolist()
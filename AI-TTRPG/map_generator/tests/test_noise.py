@@ -0,0 +1,49 @@
+import numpy as np
+
+from map_generator.app import chunks, core, noise
+
+OVERWORLD = {
+    "name": "Overworld Region",
+    "algorithm": "fractal_noise",
+    "parameters": {"scale": 32, "octaves": 4, "lod_levels": [2, 4, 8], "floor_tile_id": 0},
+    "post_processing": [],
+}
+
+
+def test_fractal_noise_is_a_function_of_global_coordinates():
+    whole = noise.fractal_noise(99, -16, 8, 64, 48, scale=16)
+    part = noise.fractal_noise(99, 4, 20, 20, 10, scale=16)
+    assert np.allclose(whole[12:22, 20:40], part)
+    assert 0.0 <= whole.min() and whole.max() <= 1.0
+
+
+def test_tile_lut_follows_bands():
+    lut = noise.build_tile_lut([{"max": 0.25, "tile_id": 2}, {"max": 0.75, "tile_id": 0}, {"max": 1.0, "tile_id": 4}])
+    tiles = noise.elevation_to_tiles(np.array([[0.0, 0.2, 0.3, 0.74, 0.8, 1.0]]), lut)
+    assert tiles.tolist() == [[2, 2, 0, 0, 4, 4]]
+
+
+def test_downsample_keeps_majority_tile():
+    grid = np.array([
+        [1, 1, 0, 0, 2],
+        [1, 0, 0, 2, 2],
+        [3, 3, 2, 2, 2],
+    ])
+    assert noise.downsample_tiles(grid, 2).tolist() == [[1, 0, 2], [3, 2, 2]]
+    # Sparse, large IDs are counted by what is present, not by the largest ID
+    assert noise.downsample_tiles(grid * 30000, 2).tolist() == [[30000, 0, 60000], [90000, 60000, 60000]]
+
+
+def test_overworld_generation_emits_lod_pyramid():
+    result = core.run_generation(OVERWORLD, "world", 100, 60)
+    assert [(level.scale, level.map_data.width, level.map_data.height) for level in result.lod] == [
+        (2, 50, 30), (4, 25, 15), (8, 13, 8)
+    ]
+
+
+def test_noise_chunks_match_each_other():
+    left = np.array(chunks.generate_chunk(OVERWORLD, "seam", 0, 0, 16).map_data)
+    right = np.array(chunks.generate_chunk(OVERWORLD, "seam", 1, 0, 16).map_data)
+    wide = np.array(chunks.generate_chunk(OVERWORLD, "seam", 0, 0, 32).map_data)
+    assert np.array_equal(np.hstack([left, right]), wide[:16, :])
+
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from map_generator.app import core, patches
+
+FOREST = {
+    "name": "Forest Clearing",
+    "algorithm": "cellular_automata",
+    "parameters": {"initial_density": 0.45, "iterations": 4, "wall_tile_id": 1, "floor_tile_id": 0},
+    "post_processing": ["add_border_trees", "clear_center", "fill_unreachable"],
+}
+CAVE = {
+    "name": "Cave",
+    "algorithm": "drunkards_walk",
+    "parameters": {"walk_steps": 400, "wall_tile_id": 4, "floor_tile_id": 3},
+    "post_processing": ["add_border_walls"],
+}
+
+
+def _base_map(algorithm, size=40):
+    return np.array(core.run_generation(algorithm, "base", size, size).map_data)
+
+
+def _apply(grid, patch):
+    patched = grid.copy()
+    patched[patch.origin_y:patch.origin_y + patch.height, patch.origin_x:patch.origin_x + patch.width] = patch.map_data
+    return patched
+
+
+@pytest.mark.parametrize("algorithm", [FOREST, CAVE])
+def test_patch_only_changes_the_window(algorithm):
+    grid = _base_map(algorithm)
+    patch = patches.regenerate_region(algorithm, "edit", grid, window=[0, 5, 14, 20])
+    patched = _apply(grid, patch)
+
+    outside = np.ones(grid.shape, dtype=bool)
+    outside[5:21, 0:15] = False
+    assert np.array_equal(patched[outside], grid[outside])
+    assert patch.changed_tiles == int((patched != grid).sum()) > 0
+    # The window touches the map edge, so the border post-processing still holds there
+    wall_id = algorithm["parameters"]["wall_tile_id"]
+    assert (patched[5:21, 0] == wall_id).all()
+
+    again = patches.regenerate_region(algorithm, "edit", grid, window=[0, 5, 14, 20])
+    assert again == patch
+
+
+def test_mask_limits_edits_and_sets_the_window():
+    grid = _base_map(FOREST)
+    mask = np.zeros(grid.shape, dtype=int)
+    mask[10:20, 10:20] = 1
+    mask[12:18, 12:18] = 0 # Keep a hole untouched
+    patch = patches.regenerate_region(FOREST, "mask", grid, mask=mask)
+    changed = _apply(grid, patch) != grid
+    assert not (changed & (mask == 0)).any()
+    assert 10 <= patch.origin_x and patch.origin_x + patch.width <= 20
+
+
+def test_invalid_windows_are_rejected():
+    grid = _base_map(FOREST)
+    with pytest.raises(ValueError):
+        patches.regenerate_region(FOREST, "x", grid, window=[50, 50, 60, 60])
+    with pytest.raises(ValueError):
+        patches.regenerate_region(FOREST, "x", grid)
+
+
+def test_cave_patch_stays_joined_to_the_surrounding_cave():
+    cave = {
+        "name": "Simple Cave",
+        "algorithm": "drunkards_walk",
+        "parameters": {"walk_steps": 500, "walkers": 4, "target_floor_ratio": 0.35,
+                       "wall_tile_id": 4, "floor_tile_id": 3},
+        "post_processing": ["fill_unreachable"],
+    }
+    grid = _base_map(cave, size=64)
+    assert core.label_regions(grid == 3)[1].size == 1
+
+    mask = np.zeros(grid.shape, dtype=int)
+    mask[20:41, 20:41] = 1
+    mask[28:33, 28:33] = 0 # Masked-out tiles inside the window are surroundings too
+    for seed in range(5):
+        for area in ({"window": [20, 20, 40, 40]}, {"mask": mask}):
+            patched = _apply(grid, patches.regenerate_region(cave, f"edit-{seed}", grid, **area))
+            assert core.label_regions(patched == 3)[1].size == 1
@@ -0,0 +1,27 @@
+from map_generator.benchmarks import regression
+
+
+def test_fixed_seed_output_matches_baselines():
+    # Output checks only: timing is left to the full benchmark run
+    baselines = regression.load_baselines()
+    results = regression.run_cases([32, 128], timed=False)
+    assert set(results) <= set(baselines), "New benchmark cases need a baseline (--update)"
+    changed = [case_id for case_id, result in results.items() if result["checksum"] != baselines[case_id]["checksum"]]
+    assert changed == []
+
+
+def test_compare_flags_slowdowns_and_changed_output():
+    baselines = {
+        "a": {"seconds": 0.1, "peak_bytes": 4 << 20, "checksum": "x"},
+        "b": {"seconds": 0.1, "peak_bytes": 4 << 20, "checksum": "y"},
+        "fast": {"seconds": 0.0001, "peak_bytes": 1024, "checksum": "z"},
+    }
+    results = {
+        "a": {"seconds": 0.12, "peak_bytes": 4 << 20, "checksum": "x"},
+        "b": {"seconds": 0.2, "peak_bytes": 8 << 20, "checksum": "changed"},
+        "fast": {"seconds": 0.001, "peak_bytes": 4096, "checksum": "z"},
+        "new": {"seconds": 1.0, "peak_bytes": 1, "checksum": "w"},
+    }
+    failures = regression.compare(results, baselines, tolerance=0.5, memory_tolerance=0.5)
+    assert len(failures) == 3
+    assert all(failure.startswith("b:") for failure in failures)
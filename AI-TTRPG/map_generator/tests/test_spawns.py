@@ -0,0 +1,74 @@
+import itertools
+import time
+
+import numpy as np
+
+from map_generator.app import core, spawns
+
+
+def _open_room(size=40):
+    walkable = np.ones((size, size), dtype=bool)
+    walkable[0, :] = walkable[-1, :] = walkable[:, 0] = walkable[:, -1] = False
+    return walkable
+
+
+def _min_distance(a, b):
+    return min(np.hypot(p[0] - q[0], p[1] - q[1]) for p, q in itertools.product(a, b))
+
+
+def test_spawn_points_are_spaced_and_walkable():
+    walkable = _open_room()
+    result = spawns.place_spawn_points(walkable, core.make_rng("spacing"), num_player=4, num_enemy=6)
+    players, enemies = result["player"], result["enemy"]
+    assert (len(players), len(enemies)) == (4, 6)
+    everyone = players + enemies
+    assert len({tuple(p) for p in everyone}) == len(everyone)
+    assert all(walkable[y, x] for x, y in everyone)
+    for group in (players, enemies):
+        assert all(np.hypot(a[0] - b[0], a[1] - b[1]) >= 2.0 for a, b in itertools.combinations(group, 2))
+    assert _min_distance(players, enemies) >= 40 / 3
+
+
+def test_spawn_points_are_deterministic_per_seed():
+    walkable = _open_room()
+    first = spawns.place_spawn_points(walkable, core.make_rng("same"), num_enemy=5)
+    second = spawns.place_spawn_points(walkable, core.make_rng("same"), num_enemy=5)
+    assert first == second
+
+
+def test_spawn_points_respect_zones():
+    walkable = _open_room()
+    result = spawns.place_spawn_points(walkable, core.make_rng("zones"), num_player=2, num_enemy=3,
+                                       player_zone=[1, 1, 8, 8], enemy_zone=[30, 30, 38, 38])
+    assert all(1 <= x <= 8 and 1 <= y <= 8 for x, y in result["player"])
+    assert all(30 <= x <= 38 and 30 <= y <= 38 for x, y in result["enemy"])
+
+
+def test_spawn_points_relax_on_cramped_maps():
+    walkable = np.zeros((5, 5), dtype=bool)
+    walkable[2, 1:4] = True
+    result = spawns.place_spawn_points(walkable, core.make_rng("tiny"), num_player=1, num_enemy=4)
+    assert len(result["enemy"]) == 4
+    assert all(walkable[y, x] for x, y in result["player"] + result["enemy"])
+    assert not {tuple(p) for p in result["player"]} & {tuple(e) for e in result["enemy"]}
+
+
+def test_spawn_groups_never_share_a_tile():
+    walkable = np.zeros((5, 5), dtype=bool)
+    walkable[2, 2] = True
+    result = spawns.place_spawn_points(walkable, core.make_rng("one"), num_player=2, num_enemy=3)
+    assert result == {"player": [[2, 2], [2, 2]], "enemy": []}
+
+
+def test_spawn_points_scale_to_thousands_on_large_maps():
+    walkable = np.ones((1024, 1024), dtype=bool)
+    start = time.perf_counter()
+    result = spawns.place_spawn_points(walkable, core.make_rng("scale"), num_player=3000, num_enemy=3000)
+    assert time.perf_counter() - start < 5.0
+    players, enemies = np.array(result["player"]), np.array(result["enemy"])
+    assert (len(players), len(enemies)) == (3000, 3000)
+    assert len({tuple(p) for p in players.tolist() + enemies.tolist()}) == 6000
+    # Players are placed at full spacing; check it on a sample to keep the test quick
+    sample = players[:300]
+    gaps = np.hypot(*(sample[:, None, :] - sample[None, :, :]).transpose(2, 0, 1))
+    assert gaps[~np.eye(len(sample), dtype=bool)].min() >= 2.0
@@ -0,0 +1,62 @@
+import base64
+import zlib
+from pathlib import Path
+
+import pytest
+
+from map_generator.app import tilecodec
+
+WORLD_ENGINE_COPY = Path(__file__).resolve().parents[2] / "world_engine" / "app" / "tilecodec.py"
+
+ROWS = [[0, 0, 0, 1], [1, 1, 2, 2], [3, 3, 3, 3]]
+
+
+@pytest.mark.parametrize("compression", tilecodec.COMPRESSIONS)
+def test_pack_roundtrip(compression):
+    envelope = tilecodec.pack_rows(ROWS, compression)
+    assert envelope["dtype"] == "uint8"
+    assert (envelope["width"], envelope["height"]) == (4, 3)
+    assert tilecodec.unpack(envelope) == ROWS
+
+
+def test_large_tile_ids_use_uint16():
+    rows = [[0, 300], [65535, 7]]
+    envelope = tilecodec.pack_rows(rows, "rle")
+    assert envelope["dtype"] == "uint16"
+    assert tilecodec.unpack(envelope) == rows
+
+
+def _envelope(payload, compression, width=4, height=3):
+    return {"encoding": tilecodec.ENCODING_NAME, "width": width, "height": height, "dtype": "uint8",
+            "compression": compression, "data": base64.b64encode(payload).decode("ascii")}
+
+
+@pytest.mark.parametrize("envelope", [
+    # One run of 200 million tiles for a 4x3 map
+    _envelope((1).to_bytes(4, "little") + (200_000_000).to_bytes(4, "little") + b"\x00", "rle"),
+    # A run count header that the payload does not back up
+    _envelope(b"\xff\xff\xff\xff", "rle"),
+    # 100 MB of zeros compressed into about 100 KB
+    _envelope(zlib.compress(bytes(100_000_000)), "zlib"),
+    # More tiles than any map may have
+    _envelope(b"", "none", width=100_000, height=100_000),
+])
+def test_oversized_payloads_are_rejected_before_expanding(envelope):
+    with pytest.raises(ValueError):
+        tilecodec.unpack(envelope)
+
+
+def test_negotiate():
+    assert tilecodec.negotiate(None) == (None, "zlib")
+    assert tilecodec.negotiate("application/json") == (None, "zlib")
+    assert tilecodec.negotiate("application/vnd.ttrpg.tilemap+json; compression=rle") == (
+        tilecodec.PACKED_MEDIA_TYPE, "rle"
+    )
+    assert tilecodec.negotiate("text/html, application/octet-stream") == (tilecodec.RAW_MEDIA_TYPE, "zlib")
+    with pytest.raises(ValueError):
+        tilecodec.negotiate("application/octet-stream; compression=lz4")
+
+
+def test_world_engine_copy_matches():
+    # Both services must speak the same wire format; see the module docstring
+    assert WORLD_ENGINE_COPY.read_bytes() == Path(tilecodec.__file__).read_bytes()
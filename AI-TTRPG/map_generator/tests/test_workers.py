@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from map_generator.app import workers
+
+
+def test_timed_out_job_is_killed_and_worker_replaced():
+    async def scenario():
+        pool = workers.GenerationPool(size=1, mode="process", queue_limit=4, job_timeout=30)
+        pool.start()
+        try:
+            first_pid = next(iter(pool._workers)).pid
+            started = time.perf_counter()
+            with pytest.raises(workers.JobTimeoutError):
+                await pool.submit(time.sleep, 30, timeout=0.5)
+            assert time.perf_counter() - started < 5
+
+            # The replacement worker picks up the next job
+            assert await pool.submit(max, 3, 7) == 7
+            assert next(iter(pool._workers)).pid != first_pid
+            stats = pool.stats()
+            assert stats["timeouts"] == 1 and stats["worker_restarts"] == 1
+            assert stats["completed"] == 1 and stats["job_latency"]["max_ms"] is not None
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_queue_limit_rejects_and_job_errors_propagate():
+    async def scenario():
+        pool = workers.GenerationPool(size=1, mode="thread", queue_limit=1, job_timeout=5)
+        pool.start()
+        try:
+            running = asyncio.create_task(pool.submit(time.sleep, 0.3))
+            queued = asyncio.create_task(pool.submit(time.sleep, 0.01))
+            await asyncio.sleep(0.05)
+            assert pool.stats()["queue_depth"] == 1
+            with pytest.raises(workers.QueueFullError):
+                await pool.submit(time.sleep, 0.01)
+            # Batch callers wait for a slot instead of being rejected
+            waiting = asyncio.create_task(pool.submit(time.sleep, 0.01, wait_for_slot=True))
+            await asyncio.gather(running, queued, waiting)
+
+            with pytest.raises(ValueError):
+                await pool.submit(int, "not a number")
+            assert pool.stats()["rejected"] == 1 and pool.stats()["failed"] == 1
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_job_that_cannot_be_sent_keeps_its_worker():
+    async def scenario():
+        pool = workers.GenerationPool(size=1, mode="process", queue_limit=4, job_timeout=30)
+        pool.start()
+        try:
+            pid = next(iter(pool._workers)).pid
+            with pytest.raises(Exception):
+                await pool.submit(max, lambda: 1) # Lambdas cannot be pickled
+            assert await pool.submit(max, 3, 7) == 7
+            assert next(iter(pool._workers)).pid == pid
+            assert pool.stats()["worker_restarts"] == 0 and pool.stats()["failed"] == 1
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_get_pool_requires_a_started_pool(monkeypatch):
+    monkeypatch.setattr(workers, "_POOL", None)
+    with pytest.raises(RuntimeError):
+        workers.get_pool()
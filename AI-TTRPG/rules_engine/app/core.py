@@ -3,9 +3,11 @@ import random
 import math
 from typing import Dict, List, Optional, Any
 
+import numpy as np
+
 # Use relative import for models within the same package
-from . import models
-from .models import RollResult, TalentInfo, FeatureStatsResponse
+from . import dice, models, probability, rng, talents
+from .models import RollResult, TalentInfo, FeatureStatsResponse, AbilitySchoolResponse
 
 
 # ADD THIS FUNCTION
@@ -79,7 +81,7 @@ def generate_npc_template_core(
             skills[skill_name] = skill_rank_value
 
     # 6. ID, Name, Description, Behavior Tags
-    generated_id = f"procgen_{request.biome or 'unk'}_{request.kingdom}_{request.offense_style}_{request.difficulty}_{random.randint(100,999)}"
+    generated_id = f"procgen_{request.biome or 'unk'}_{request.kingdom}_{request.offense_style}_{request.difficulty}_{rng.rng_for(request.rng_stream).randint(100,999)}"
     name = request.custom_name or f"{request.difficulty.capitalize()} {request.kingdom.capitalize()} {request.offense_style.replace('_',' ').title()}"
     description = f"A {request.difficulty} {request.kingdom} exhibiting a {request.offense_style} style and {request.defense_style} defense."
     if request.biome:
@@ -87,8 +89,111 @@ def generate_npc_template_core(
 
     behavior_tags = generation_rules.get("behavior_map",{}).get(request.behavior.lower(), [])
 
-    # 7. Build Response
-    return {"generated_id": generated_id, "name": name, "description": description, "stats": final_stats, "skills": skills, "abilities": abilities, "max_hp": max_hp, "behavior_tags": behavior_tags, "loot_table_ref": f"{request.kingdom}_{request.difficulty}_loot"}
+    # 7. Combat Profile & Power Rating
+    combat_profiles = generation_rules.get("combat_profile_by_style", {})
+    offense_profile = combat_profiles.get("offense", {}).get(request.offense_style.lower(), {})
+    defense_profile = combat_profiles.get("defense", {}).get(request.defense_style.lower(), {})
+    attack_stat = offense_profile.get("attack_stat", "Might")
+    damage_dice = offense_profile.get("damage_dice", "1d6")
+    defense_stat = defense_profile.get("defense_stat", "Reflexes")
+    rating = calculate_power_rating(final_stats, max_hp, attack_stat, defense_stat, damage_dice, skill_rank_value)
+
+    # 8. Build Response
+    return {"generated_id": generated_id, "name": name, "description": description, "stats": final_stats, "skills": skills, "abilities": abilities, "max_hp": max_hp, "behavior_tags": behavior_tags, "loot_table_ref": f"{request.kingdom}_{request.difficulty}_loot",
+            "attack_stat": attack_stat, "defense_stat": defense_stat, "damage_dice": damage_dice, "combat_skill_rank": skill_rank_value, "power_rating": rating["power"]}
+
+
+def build_npc_statblocks(
+    npc_templates: Dict[str, Dict[str, Any]],
+    all_skills_map: Dict[str, Dict[str, str]],
+    generation_rules: Dict[str, Any]
+) -> Dict[str, Dict]:
+    """
+    Generates one stat block per template in npc_templates.json, keyed and
+    named by the template. Generation is deterministic apart from the ID
+    suffix, so this runs once at startup instead of on every lookup.
+    Templates that fail to generate are skipped with a warning.
+    """
+    statblocks = {}
+    for template_id, template in npc_templates.items():
+        try:
+            request = models.NpcGenerationRequest(
+                custom_name=template.get("name"), **template.get("generation_params", {})
+            )
+            statblock = generate_npc_template_core(request, all_skills_map, generation_rules)
+        except Exception as e:
+            print(f"Warning: Could not build stat block for NPC template '{template_id}': {e}")
+            continue
+        statblock["generated_id"] = template_id
+        statblock["description"] = template.get("description", statblock["description"])
+        statblocks[template_id] = statblock
+    return statblocks
+
+
+# --- Power Ratings ---
+# Ratings are measured against a reference combatant with average stats
+# (modifier +0) and no skill bonus on either attack or defense.
+REFERENCE_MODIFIER = 0
+REFERENCE_DAMAGE_DICE = "1d8"
+
+
+def hit_probability(attack_modifier: int, defense_modifier: int) -> float:
+    """
+    Exact chance that a contested attack lands (hit, solid hit or critical
+    hit) under calculate_contested_attack.
+    """
+    counts = dict(probability.contested_outcome_counts(attack_modifier - defense_modifier))
+    return sum(counts[outcome] for outcome in HIT_OUTCOMES) / 400
+
+
+def expected_damage(dice_str: str, stat_score: int, damage_bonus: int = 0, damage_reduction: int = 0) -> float:
+    """
+    Exact mean of calculate_damage's final damage: dice + stat modifier +
+    bonus, less DR, never below 0.
+    """
+    flat = calculate_modifier(stat_score) + damage_bonus
+    lowest, counts, total_ways = probability.final_damage_counts(dice.compile_dice(dice_str), flat, damage_reduction)
+    return lowest + int(counts @ np.arange(len(counts))) / total_ways
+
+
+def calculate_power_rating(
+    stats: Dict[str, int],
+    max_hp: int,
+    attack_stat: str,
+    defense_stat: str,
+    damage_dice: str,
+    skill_rank: int = 0,
+    damage_bonus: int = 0,
+    damage_reduction: int = 0,
+) -> Dict[str, float]:
+    """
+    Rates a combatant against the reference combatant so encounters can be
+    budgeted by adding ratings up.
+
+    - hit_chance: chance its attacks land on the reference.
+    - expected_damage: mean damage per attack, counting misses.
+    - effective_hp: max_hp, stretched by damage reduction and divided by
+      the chance the reference lands a hit.
+    - power: geometric mean of expected_damage and effective_hp, so
+      doubling either one raises power by the same factor.
+    """
+    skill_bonus = calculate_skill_mt_bonus(skill_rank)
+    attack_score = stats.get(attack_stat, 10)
+    attack_modifier = calculate_modifier(attack_score) + skill_bonus
+    defense_modifier = calculate_modifier(stats.get(defense_stat, 10)) + skill_bonus
+
+    hit_chance = hit_probability(attack_modifier, REFERENCE_MODIFIER)
+    damage = hit_chance * expected_damage(damage_dice, attack_score, damage_bonus)
+    # DR stretches HP by how much it cuts the reference's blows (an average 1d8 weapon)
+    damage_taken = max(expected_damage(REFERENCE_DAMAGE_DICE, 10, 0, damage_reduction), 0.5)
+    dr_factor = expected_damage(REFERENCE_DAMAGE_DICE, 10) / damage_taken
+    effective_hp = max_hp * dr_factor / hit_probability(REFERENCE_MODIFIER, defense_modifier)
+    return {
+        "power": round(math.sqrt(damage * effective_hp), 3),
+        "hit_chance": round(hit_chance, 4),
+        "expected_damage": round(damage, 3),
+        "effective_hp": round(effective_hp, 3),
+    }
 
 
 # ADD THIS FUNCTION
@@ -109,33 +214,43 @@ def calculate_skill_mt_bonus(rank: int) -> int:
 # --- Dice Rolling ---
 
 
-def _roll_d20() -> int:
-    return random.randint(1, 20)
+# Roll helpers take what to roll with from rng.rng_for(): a named stream, or
+# the global random module by default.
+def _roll_d20(source=random) -> int:
+    return source.randint(1, 20)
 
 
-def _roll_d6() -> int:
-    return random.randint(1, 6)
+def _roll_d6(source=random) -> int:
+    return source.randint(1, 6)
 
 
-def parse_dice_string(dice_str: str) -> (int, int):
-    """Parses a dice string like '2d6' into (number_of_dice, dice_sides). Handles '0' for no roll."""
-    if dice_str == "0":
-        return 0, 0
-    if "d" not in dice_str:
-        raise ValueError(f"Invalid dice string format: '{dice_str}'")
+def _roll_dice(dice_str: str, source=random) -> (List[int], int):
+    """Rolls a dice expression (see dice.py), e.g. '2d6+1d4+3'. Returns (rolls, total)."""
+    return dice.compile_dice(dice_str).roll(source)
 
-    parts = dice_str.lower().split("d")
-    if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
-        raise ValueError(f"Invalid dice string format: '{dice_str}'")
 
-    return int(parts[0]), int(parts[1])
+# Contested attack outcomes that land a blow
+HIT_OUTCOMES = ("hit", "solid_hit", "critical_hit")
 
 
-def _roll_dice(num_dice: int, sides: int) -> int:
-    """Rolls a specified number of dice with a given number of sides."""
-    if num_dice == 0:
-        return 0
-    return sum(random.randint(1, sides) for _ in range(num_dice))
+def _attacker_total_modifier(attack_data: models.ContestedAttackRequest) -> int:
+    return (
+        calculate_modifier(attack_data.attacker_attacking_stat_score)
+        + calculate_skill_mt_bonus(attack_data.attacker_skill_rank)  # Still uses +1 per rank
+        + attack_data.attacker_attack_roll_bonus
+        - attack_data.attacker_attack_roll_penalty  # Use new specific fields
+    )
+
+
+def _defender_total_modifier(attack_data: models.ContestedAttackRequest) -> int:
+    # Weapon penalty still comes from request (story_engine looks it up)
+    return (
+        calculate_modifier(attack_data.defender_armor_stat_score)
+        + calculate_skill_mt_bonus(attack_data.defender_armor_skill_rank)  # Still uses +1 per rank
+        - attack_data.defender_weapon_penalty
+        + attack_data.defender_defense_roll_bonus
+        - attack_data.defender_defense_roll_penalty  # Use new specific fields
+    )
 
 
 def calculate_contested_attack(
@@ -148,35 +263,20 @@ def calculate_contested_attack(
     # and aggregated bonuses/penalties are provided directly in attack_data.
 
     # --- Roll Dice ---
-    attacker_roll = _roll_d20()
-    defender_roll = _roll_d20()
+    source = rng.rng_for(attack_data.rng_stream)
+    attacker_roll = _roll_d20(source)
+    defender_roll = _roll_d20(source)
 
     # --- Calculate Attacker Total ---
     attacker_stat_mod = calculate_modifier(attack_data.attacker_attacking_stat_score)
-    attacker_skill_bonus = calculate_skill_mt_bonus(
-        attack_data.attacker_skill_rank
-    )  # Still uses +1 per rank
-    attacker_total_modifier = (
-        attacker_stat_mod
-        + attacker_skill_bonus
-        + attack_data.attacker_attack_roll_bonus
-        - attack_data.attacker_attack_roll_penalty  # Use new specific fields
-    )
+    attacker_skill_bonus = calculate_skill_mt_bonus(attack_data.attacker_skill_rank)
+    attacker_total_modifier = _attacker_total_modifier(attack_data)
     attacker_final_total = attacker_roll + attacker_total_modifier
 
     # --- Calculate Defender Total ---
     defender_stat_mod = calculate_modifier(attack_data.defender_armor_stat_score)
-    defender_skill_bonus = calculate_skill_mt_bonus(
-        attack_data.defender_armor_skill_rank
-    )  # Still uses +1 per rank
-    # Weapon penalty still comes from request (story_engine looks it up)
-    defender_total_modifier = (
-        defender_stat_mod
-        + defender_skill_bonus
-        - attack_data.defender_weapon_penalty
-        + attack_data.defender_defense_roll_bonus
-        - attack_data.defender_defense_roll_penalty  # Use new specific fields
-    )
+    defender_skill_bonus = calculate_skill_mt_bonus(attack_data.defender_armor_skill_rank)
+    defender_total_modifier = _defender_total_modifier(attack_data)
     defender_final_total = defender_roll + defender_total_modifier
 
     # --- Determine Outcome (Logic remains the same) ---
@@ -215,12 +315,11 @@ def calculate_damage(damage_data: models.DamageRequest) -> models.DamageResponse
     # as base dice, relevant stat, damage bonus, DR modifier, and base DR
     # are provided directly in damage_data.
 
-    # --- 1. Parse Dice String & Roll ---
+    # --- 1. Compile Dice Expression & Roll ---
     try:
-        # Handle multi-hit like '(x2)'? Assume caller handles this or provides combined dice.
+        # Multi-hit '(xN)' is part of the expression; the hits are summed.
         # Handle AoE? Assume single target damage here.
-        # We just parse the dice string provided.
-        num_dice, die_type = parse_dice_string(damage_data.base_damage_dice)
+        rolls, roll_total = _roll_dice(damage_data.base_damage_dice, rng.rng_for(damage_data.rng_stream))
     except ValueError as e:
         print(f"Error parsing dice string in core calculate_damage: {e}")
         # Return zero damage
@@ -234,7 +333,6 @@ def calculate_damage(damage_data: models.DamageRequest) -> models.DamageResponse
             final_damage=0,
         )
 
-    rolls, roll_total = _roll_dice(num_dice, die_type)
 
     # --- 2. Calculate Stat Bonus ---
     stat_bonus = calculate_modifier(damage_data.relevant_stat_score)
@@ -269,12 +367,56 @@ def calculate_damage(damage_data: models.DamageRequest) -> models.DamageResponse
     )
 
 
+def analyze_attack(
+    attack_data: models.ContestedAttackRequest, damage_data: models.DamageRequest
+) -> models.AttackAnalysisResponse:
+    """
+    Exact odds of calculate_contested_attack followed, on a landed blow, by
+    calculate_damage, without rolling. The distributions are memoized on
+    their integer inputs (see probability.py), so repeated questions about
+    the same matchup cost a dictionary lookup.
+    """
+    attacker_total_modifier = _attacker_total_modifier(attack_data)
+    defender_total_modifier = _defender_total_modifier(attack_data)
+    net_modifier = attacker_total_modifier - defender_total_modifier
+
+    # --- Outcomes and margins over all 400 roll pairs ---
+    outcome_counts = dict(probability.contested_outcome_counts(net_modifier))
+    outcome_probabilities = {outcome: ways / 400 for outcome, ways in outcome_counts.items()}
+    hit_chance = sum(outcome_counts[outcome] for outcome in HIT_OUTCOMES) / 400
+    lowest_margin, margins = probability.margin_counts(net_modifier)
+    margin_histogram = {lowest_margin + i: int(ways) / 400 for i, ways in enumerate(margins)}
+
+    # --- Damage when the attack lands ---
+    expression = dice.compile_dice(damage_data.base_damage_dice)
+    flat_modifier = (
+        calculate_modifier(damage_data.relevant_stat_score)
+        + damage_data.attacker_damage_bonus
+        - damage_data.attacker_damage_penalty
+    )
+    effective_dr = max(0, damage_data.defender_base_dr - damage_data.attacker_dr_modifier)
+    lowest_damage, damage_counts, total_ways = probability.final_damage_counts(expression, flat_modifier, effective_dr)
+    damage_pmf = {lowest_damage + i: int(ways) / total_ways for i, ways in enumerate(damage_counts) if ways}
+    expected_on_hit = lowest_damage + int(damage_counts @ np.arange(len(damage_counts))) / total_ways
+
+    return models.AttackAnalysisResponse(
+        attacker_total_modifier=attacker_total_modifier,
+        defender_total_modifier=defender_total_modifier,
+        outcome_probabilities=outcome_probabilities,
+        hit_chance=hit_chance,
+        margin_histogram=margin_histogram,
+        damage_pmf=damage_pmf,
+        expected_damage_on_hit=expected_on_hit,
+        expected_damage=hit_chance * expected_on_hit,
+    )
+
+
 def calculate_initiative(stats: models.InitiativeRequest) -> models.InitiativeResponse:
     """
     Calculates initiative based on the Fulcrum rules:
     d20 + B Mod + D Mod + F Mod + H Mod + J Mod + L Mod
     """
-    roll = _roll_d20()
+    roll = _roll_d20(rng.rng_for(stats.rng_stream))
 
     # Calculate modifiers using the helper function
     mod_b = calculate_modifier(stats.endurance)
@@ -303,12 +445,76 @@ def calculate_initiative(stats: models.InitiativeRequest) -> models.InitiativeRe
     )
 
 
+# --- Batch Resolution ---
+_BATCH_RESOLVERS = {
+    "skill_check": lambda op: calculate_skill_check(op.stat_modifier, op.skill_rank, op.dc, op.rng_stream),
+    "ability_check": lambda op: calculate_ability_check(
+        op.ability_school_rank, op.associated_stat_modifier, op.ability_tier, op.rng_stream
+    ),
+    "initiative": lambda op: calculate_initiative(op),
+    "contested_attack": lambda op: calculate_contested_attack(op),
+    "damage": lambda op: calculate_damage(op),
+}
+
+
+def _operation_succeeded(result: Any) -> bool:
+    """Whether a resolved operation lets the operations that require it run."""
+    if isinstance(result, models.ContestedAttackResponse):
+        return result.outcome in HIT_OUTCOMES
+    if isinstance(result, RollResult):
+        return result.is_success
+    if isinstance(result, models.DamageResponse):
+        return result.final_damage > 0
+    return True
+
+
+def resolve_batch(operations: List[Any], rng_stream: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Resolves batch operations in order with the same functions as the
+    single-operation endpoints. An operation whose 'requires' did not
+    succeed is skipped, and a failing operation is reported without
+    stopping the rest. Operations that name no rng_stream roll on
+    `rng_stream`. Raises ValueError if an id is used twice or a
+    'requires' does not name an earlier operation.
+    """
+    earlier_ids = set()
+    for index, op in enumerate(operations):
+        if op.requires is not None and op.requires not in earlier_ids:
+            raise ValueError(f"Operation {index} requires '{op.requires}', which is not the id of an earlier operation.")
+        if op.id is not None:
+            if op.id in earlier_ids:
+                raise ValueError(f"Operation id '{op.id}' is used more than once.")
+            earlier_ids.add(op.id)
+
+    succeeded: Dict[str, bool] = {}
+    results = []
+    for index, op in enumerate(operations):
+        entry = {"index": index, "id": op.id, "op": op.op}
+        ok = False
+        if op.requires is not None and not succeeded[op.requires]:
+            entry.update(status="skipped", detail=f"Required operation '{op.requires}' did not succeed.")
+        else:
+            try:
+                if op.rng_stream is None and rng_stream is not None:
+                    op = op.model_copy(update={"rng_stream": rng_stream})
+                result = _BATCH_RESOLVERS[op.op](op)
+                entry.update(status="ok", result=result.model_dump())
+                ok = _operation_succeeded(result)
+            except Exception as e:
+                print(f"Error resolving batch operation {index} ({op.op}): {e}")
+                entry.update(status="error", detail=str(e))
+        if op.id is not None:
+            succeeded[op.id] = ok
+        results.append(entry)
+    return results
+
+
 # --- Core Validation Logic ---
 
 
-def calculate_skill_check(stat_mod: int, skill_rank: int, dc: int) -> RollResult:
+def calculate_skill_check(stat_mod: int, skill_rank: int, dc: int, rng_stream: Optional[str] = None) -> RollResult:
     """Performs a d20 skill check."""
-    roll = _roll_d20()
+    roll = _roll_d20(rng.rng_for(rng_stream))
     total = roll + stat_mod + skill_rank
     success = total >= dc
     crit_success = roll == 20
@@ -326,7 +532,7 @@ def calculate_skill_check(stat_mod: int, skill_rank: int, dc: int) -> RollResult
     )
 
 
-def calculate_ability_check(rank: int, stat_mod: int, tier: int) -> RollResult:
+def calculate_ability_check(rank: int, stat_mod: int, tier: int, rng_stream: Optional[str] = None) -> RollResult:
     """Performs a d20 Ability check against a Tiered DC."""
     if tier <= 3:
         dc = 12
@@ -337,7 +543,7 @@ def calculate_ability_check(rank: int, stat_mod: int, tier: int) -> RollResult:
     else:
         dc = 20  # Assuming T10 might exist implicitly or have a higher DC
 
-    roll = _roll_d20()
+    roll = _roll_d20(rng.rng_for(rng_stream))
     total = roll + rank + stat_mod
     success = total >= dc
     crit_success = roll == 20
@@ -390,6 +596,38 @@ def get_skill_for_category(category_name: str, skill_map: Dict[str, str]) -> str
     return skill_map[category_name]
 
 
+def shape_ability_school(school_name: str, data: Dict[str, Any]) -> AbilitySchoolResponse:
+    """Flattens an ability school's branches into one list of tiers."""
+    # --- FIX: Extract all tiers from all branches (with safety checks) ---
+    all_tiers = []
+    branches = data.get("branches", [])
+
+    if not branches:
+        # If no branches, check if tiers exist at top level (flat structure)
+        all_tiers = data.get("tiers", [])
+        print(f"Warning: Ability school '{school_name}' has no branches. Using flat tier structure.")
+    else:
+        # Extract tiers from each branch
+        for branch in branches:
+            branch_tiers = branch.get("tiers", [])
+            if branch_tiers:
+                all_tiers.extend(branch_tiers)
+            else:
+                print(f"Warning: Branch '{branch.get('branch', 'Unknown')}' in {school_name} has no tiers")
+
+    if not all_tiers:
+        print(f"Warning: Ability school '{school_name}' returned no tiers after processing.")
+    # --- END FIX ---
+
+    return AbilitySchoolResponse(
+        school=school_name,
+        # Check both keys for flexibility, default to Unknown
+        resource_pool=data.get("resource_pool", data.get("resource", "Unknown")),
+        associated_stat=data.get("associated_stat", "Unknown"),
+        tiers=all_tiers,
+    )
+
+
 def get_status_effect(
     status_name: str, status_effects_data: Dict[str, Any]
 ) -> models.StatusEffectResponse:
@@ -465,96 +703,25 @@ def get_injury_effects(
 def find_eligible_talents(
     stats_in: Dict[str, int],
     skills_in: Dict[str, int],  # {skill_name: rank}
-    talent_data: Dict[str, Any],
-    stats_list: List[str],
-    all_skills_map: Dict[str, Dict[str, str]],
+    talent_index: talents.TalentIndex,
 ) -> List[TalentInfo]:
-    """Finds unlocked talents based on stats, skills, and provided talent data."""
-    unlocked_talents = []
-
-    if not talent_data or not stats_list or not all_skills_map:
-        print(
-            "Warning: Missing required data (talents, stats list, or skills map) for talent lookup."
-        )
-        return []
-
-    stats_complete = {stat: stats_in.get(stat, 0) for stat in stats_list}
-    skills_complete = skills_in  # Assumes skills_in is {skill_name: rank}
+    """
+    Finds unlocked talents based on stats and skills, by bisecting the
+    thresholds indexed from talents.json at load time.
+    """
+    return talents.eligible_talents(talent_index, stats_in, skills_in)
 
-    # --- 1. Check Single Stat Mastery ---
-    for talent_group in talent_data.get("single_stat_mastery", []):
-        stat_name = talent_group.get("stat")
-        if not stat_name:
-            continue
-        current_stat_score = stats_complete.get(stat_name, 0)
-        # Check 'score' field (ensure talents.json uses 'score')
-        required_score = talent_group.get("score")
-        if required_score is not None and current_stat_score >= required_score:
-            unlocked_talents.append(
-                TalentInfo(
-                    name=talent_group.get("talent_name", "Unknown Talent"),
-                    source=f"Stat: {stat_name} {required_score}",
-                    effect=talent_group.get("effect", ""),
-                )
-            )
 
-    # --- 2. Check Dual Stat Synergy ---
-    for talent in talent_data.get("dual_stat_focus", []):
-        req_score = talent.get("score", 99)  # Check 'score' field
-        stats_pair = talent.get("paired_stats", [])  # Check 'paired_stats' field
-        if len(stats_pair) == 2:
-            stat1, stat2 = stats_pair
-            if (
-                stats_complete.get(stat1, 0) >= req_score
-                and stats_complete.get(stat2, 0) >= req_score
-            ):
-                unlocked_talents.append(
-                    TalentInfo(
-                        name=talent.get(
-                            "talent_name", "Unknown Talent"
-                        ),  # Check 'talent_name' field
-                        source=f"Dual Stat: {stat1} & {stat2} {req_score}",
-                        effect=talent.get("effect", ""),
-                    )
-                )
-
-    # --- 3. Check Skill Mastery ---
-    for category_key, category_list in talent_data.get(
-        "single_skill_mastery", {}
-    ).items():
-        if isinstance(category_list, list):
-            for skill_group in category_list:
-                skill_name = skill_group.get("skill")
-                if (
-                    skill_name and skill_name in all_skills_map
-                ):  # Check against provided map
-                    current_skill_rank = skills_complete.get(skill_name, 0)
-                    for talent in skill_group.get("talents", []):
-                        # Check both 'tier' and 'prerequisite_mt' keys for flexibility
-                        tier_name = talent.get("tier", talent.get("prerequisite_mt"))
-                        req_rank = 99
-                        if tier_name and tier_name.startswith("MT"):
-                            try:
-                                req_rank = int(tier_name.replace("MT", ""))
-                            except ValueError:
-                                pass
-
-                        if current_skill_rank >= req_rank:
-                            unlocked_talents.append(
-                                TalentInfo(
-                                    name=talent.get(
-                                        "talent_name", "Unknown Talent"
-                                    ),  # Check 'talent_name' field
-                                    source=f"Skill: {skill_name} ({tier_name})",
-                                    effect=talent.get("effect", ""),
-                                )
-                            )
-                elif skill_name:
-                    print(
-                        f"Warning: Skill '{skill_name}' from talent data not found in master skill map."
-                    )
-
-    return unlocked_talents
+def find_crossed_talents(
+    before: models.TalentLookupRequest,
+    after: models.TalentLookupRequest,
+    talent_index: talents.TalentIndex,
+) -> models.TalentDiffResponse:
+    """Talents unlocked (and lost) going from `before` to `after`, e.g. on a rank-up."""
+    unlocked, locked = talents.crossed_talents(
+        talent_index, before.stats, before.skills, after.stats, after.skills
+    )
+    return models.TalentDiffResponse(unlocked=unlocked, locked=locked)
 
 
 # ADD THIS FUNCTION
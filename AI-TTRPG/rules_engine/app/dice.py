@@ -0,0 +1,177 @@
+# dice.py
+"""
+Dice expressions, compiled once and cached.
+
+Grammar (case is ignored; spaces are allowed between terms):
+
+    expression := term (('+' | '-') term)* [multi_hit]
+    term       := [N]dM [('kh' | 'kl') K]  |  N
+    multi_hit  := '(x' N ')'
+
+e.g. '2d6+1d4+3', '4d6kh3' (roll 4d6, keep the highest 3), '1d8+1 (x2)'
+(two hits of 1d8+1, summed). The legacy '0' is a constant 0.
+
+compile_dice() turns a string into a DiceExpression, an immutable tuple of
+terms kept in an LRU cache, so hot paths never re-parse. A DiceExpression
+can be rolled with any source that has randint() (the global random module
+or an rng stream), or asked for its exact distribution.
+"""
+import math
+import random
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import probability
+
+DICE_CACHE_SIZE = 512
+MAX_DICE_PER_TERM = 100
+MAX_SIDES = 1000
+MAX_HITS = 20
+# Exact distributions are counted in int64; larger outcome spaces can still be rolled
+MAX_DISTRIBUTION_OUTCOMES = 2**62
+MAX_KEEP_STATES = 2_000_000
+
+_TERM = re.compile(r"\s*([+-])?\s*(?:(\d*)d(\d+)(?:(kh|kl)(\d+))?|(\d+))\s*")
+_MULTI_HIT = re.compile(r"\(\s*x\s*(\d+)\s*\)\s*$")
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    """`count` dice of `sides` sides, optionally keeping only the `keep` highest or lowest."""
+    count: int
+    sides: int
+    sign: int = 1
+    keep: Optional[int] = None
+    keep_highest: bool = True
+
+    def roll(self, source=random) -> Tuple[List[int], int]:
+        faces = [source.randint(1, self.sides) for _ in range(self.count)]
+        if self.keep is not None:
+            faces = sorted(faces, reverse=self.keep_highest)[: self.keep]
+        return faces, self.sign * sum(faces)
+
+    def distribution(self) -> Tuple[int, np.ndarray]:
+        if self.keep is None:
+            lowest, counts = self.count, probability.dice_sum_counts(self.count, self.sides)
+        else:
+            lowest, counts = self.keep, _kept_sum_counts(self.count, self.sides, self.keep, self.keep_highest)
+        if self.sign < 0:
+            return -(lowest + len(counts) - 1), counts[::-1]
+        return lowest, counts
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    text: str
+    terms: Tuple[DiceTerm, ...]
+    constant: int = 0
+    hits: int = 1
+
+    def roll(self, source=random) -> Tuple[List[int], int]:
+        """Rolls every hit. Returns (each kept die, total including constants)."""
+        rolls, total = [], 0
+        for _ in range(self.hits):
+            for term in self.terms:
+                faces, subtotal = term.roll(source)
+                rolls.extend(faces)
+                total += subtotal
+            total += self.constant
+        return rolls, total
+
+    def distribution(self) -> Tuple[int, np.ndarray]:
+        """Exact (lowest total, ways per total from there up); see _distribution."""
+        return _distribution(self)
+
+
+def _kept_sum_counts(count: int, sides: int, keep: int, highest: bool) -> np.ndarray:
+    counts = _kept_highest_sum_counts(count, sides, keep)
+    # Keeping the lowest is the mirror image of keeping the highest
+    return counts if highest else counts[::-1]
+
+
+@lru_cache(maxsize=probability.DISTRIBUTION_CACHE_SIZE)
+def _kept_highest_sum_counts(count: int, sides: int, keep: int) -> np.ndarray:
+    """
+    Ways to roll each sum of the `keep` highest of `count`d`sides`; index i
+    is the sum keep + i. Dice are added one at a time, tracking only the
+    dice kept so far, so the work grows with the number of kept-dice
+    combinations rather than sides ** count.
+    """
+    if math.comb(sides + keep - 1, keep) * sides * count > MAX_KEEP_STATES:
+        raise ValueError(f"{count}d{sides}kh{keep} is too large to compute exactly.")
+    states = {(): 1}
+    for _ in range(count):
+        next_states = defaultdict(int)
+        for kept, ways in states.items():
+            for face in range(1, sides + 1):
+                next_states[tuple(sorted(kept + (face,)))[-keep:]] += ways
+        states = next_states
+    counts = np.zeros(keep * (sides - 1) + 1, dtype=np.int64)
+    for kept, ways in states.items():
+        counts[sum(kept) - keep] += ways
+    counts.flags.writeable = False
+    return counts
+
+
+@lru_cache(maxsize=DICE_CACHE_SIZE)
+def _distribution(expression: DiceExpression) -> Tuple[int, np.ndarray]:
+    """
+    Ways to roll each total of `expression`, as (lowest total, counts), by
+    convolving its terms' distributions and then the hits. Raises
+    ValueError if the outcome space is too large to count exactly.
+    """
+    outcomes = math.prod(term.sides ** term.count for term in expression.terms) ** expression.hits
+    if outcomes > MAX_DISTRIBUTION_OUTCOMES:
+        raise ValueError(f"Dice expression '{expression.text}' is too large to compute exactly.")
+    lowest, counts = expression.constant, np.ones(1, dtype=np.int64)
+    for term in expression.terms:
+        term_lowest, term_counts = term.distribution()
+        lowest += term_lowest
+        counts = np.convolve(counts, term_counts)
+    counts = probability.convolve_power(counts, expression.hits)
+    counts.flags.writeable = False
+    return lowest * expression.hits, counts
+
+
+@lru_cache(maxsize=DICE_CACHE_SIZE)
+def compile_dice(text: str) -> DiceExpression:
+    """Parses a dice expression (see the module docstring). Raises ValueError if it is invalid."""
+    source = text.lower().strip()
+    hits = 1
+    multi_hit = _MULTI_HIT.search(source)
+    if multi_hit:
+        hits = int(multi_hit.group(1))
+        source = source[: multi_hit.start()]
+        if not 1 <= hits <= MAX_HITS:
+            raise ValueError(f"Invalid dice expression '{text}': hits must be between 1 and {MAX_HITS}.")
+    if not source.strip():
+        raise ValueError(f"Invalid dice expression: '{text}'")
+
+    terms, constant, position = [], 0, 0
+    while position < len(source):
+        match = _TERM.match(source, position)
+        if not match or (position > 0 and not match.group(1)):
+            raise ValueError(f"Invalid dice expression: '{text}'")
+        sign = -1 if match.group(1) == "-" else 1
+        count, sides, keep_mode, keep, flat = match.group(2, 3, 4, 5, 6)
+        if flat is not None:
+            constant += sign * int(flat)
+        else:
+            count = int(count) if count else 1
+            sides = int(sides)
+            keep = int(keep) if keep else None
+            if not (0 <= count <= MAX_DICE_PER_TERM and 1 <= sides <= MAX_SIDES):
+                raise ValueError(
+                    f"Invalid dice expression '{text}': at most {MAX_DICE_PER_TERM} dice of 1-{MAX_SIDES} sides per term."
+                )
+            if keep is not None and not 1 <= keep <= count:
+                raise ValueError(f"Invalid dice expression '{text}': cannot keep {keep} of {count} dice.")
+            if count:
+                terms.append(DiceTerm(count, sides, sign, keep, keep_mode != "kl"))
+        position = match.end()
+    return DiceExpression(text=text, terms=tuple(terms), constant=constant, hits=hits)
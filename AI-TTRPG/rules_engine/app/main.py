@@ -1,12 +1,12 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Request  # Import Request
-from typing import List, Dict, Any
+from fastapi import Body, FastAPI, HTTPException, Request, Response  # Import Request
+from typing import Annotated, List, Dict, Any
 from contextlib import asynccontextmanager
 import logging
 
 logger = logging.getLogger("uvicorn.error")
 
-from . import core, data_loader, models
+from . import core, data_loader, models, rng, snapshot
 from . import data_validator  # <-- NEW: Import validation module
 from .models import (
     SkillCheckRequest,
@@ -73,6 +73,29 @@ async def lifespan(app: FastAPI):
         app.state.npc_templates = loaded_rules.get("npc_templates", {})
         app.state.item_templates = loaded_rules.get("item_templates", {})
 
+        # Precompute each NPC template's stat block and power rating once
+        app.state.npc_statblocks = core.build_npc_statblocks(
+            app.state.npc_templates, app.state.all_skills, app.state.generation_rules
+        )
+        app.state.npc_power_ratings = {
+            template_id: core.calculate_power_rating(
+                statblock["stats"],
+                statblock["max_hp"],
+                statblock["attack_stat"],
+                statblock["defense_stat"],
+                statblock["damage_dice"],
+                statblock["combat_skill_rank"],
+            )
+            for template_id, statblock in app.state.npc_statblocks.items()
+        }
+        print(f"INFO: Rated {len(app.state.npc_power_ratings)} NPC templates.")
+
+        # Index and pre-shape everything the lookups serve, once
+        app.state.rules_snapshot = snapshot.build_rules_snapshot(
+            loaded_rules, app.state.npc_statblocks, app.state.npc_power_ratings
+        )
+        print(f"INFO: Built rules snapshot {app.state.rules_snapshot.content_hash[:12]}.")
+
         print("INFO: Rules data loaded successfully and stored in app.state.")
     except Exception as e:
         print(f"FATAL: Failed to load rules data on startup: {e}")
@@ -98,6 +121,9 @@ async def lifespan(app: FastAPI):
         # --- END ADD ---
         app.state.npc_templates = {}
         app.state.item_templates = {}
+        app.state.rules_snapshot = snapshot.RulesSnapshot()
+        app.state.npc_statblocks = {}
+        app.state.npc_power_ratings = {}
 
         # Optionally re-raise to prevent server start on load failure
         # raise
@@ -114,6 +140,24 @@ app = FastAPI(
 )
 
 
+# Lookup responses only change with the rules data, so they are tagged with
+# the snapshot's content hash and a client that already has them gets a 304.
+# The lookup still runs first, so unknown names keep their 404.
+@app.middleware("http")
+async def tag_lookups_with_rules_hash(request: Request, call_next):
+    rules_snapshot = getattr(request.app.state, "rules_snapshot", None)
+    if request.method != "GET" or not request.url.path.startswith("/v1/lookup/") or not rules_snapshot or not rules_snapshot.content_hash:
+        return await call_next(request)
+    etag = f'"{rules_snapshot.content_hash}"'
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+
 # --- Helper Function (Dependency) to Check State ---
 def check_state_loaded(request: Request):
     """Dependency raises 503 if essential data isn't loaded in app.state"""
@@ -247,6 +291,7 @@ async def get_status(request: Request):
             # --- END ADD ---
             "npc_templates_loaded_count": len(npc_templates),
             "item_templates_loaded_count": len(item_templates),
+            "rules_content_hash": getattr(request.app.state, "rules_snapshot", snapshot.RulesSnapshot()).content_hash,
         }
     except Exception as e:
         logger.exception(f"Error in get_status accessing app.state: {e}")
@@ -264,6 +309,7 @@ async def api_validate_skill_check(request_data: SkillCheckRequest):  # Renamed
             stat_mod=request_data.stat_modifier,
             skill_rank=request_data.skill_rank,
             dc=request_data.dc,
+            rng_stream=request_data.rng_stream,
         )
     except Exception as e:
         logger.exception(f"Error in api_validate_skill_check: {e}")
@@ -282,6 +328,7 @@ async def api_validate_ability_check(
             rank=request_data.ability_school_rank,
             stat_mod=request_data.associated_stat_modifier,
             tier=request_data.ability_tier,
+            rng_stream=request_data.rng_stream,
         )
     except Exception as e:
         logger.exception(f"Error in api_validate_ability_check: {e}")
@@ -327,9 +374,7 @@ async def api_lookup_talents(req_data: TalentLookupRequest, request: Request):
         return core.find_eligible_talents(
             stats_in=req_data.stats,
             skills_in=req_data.skills,
-            talent_data=request.app.state.talent_data,
-            stats_list=request.app.state.stats_list,
-            all_skills_map=request.app.state.all_skills,
+            talent_index=request.app.state.rules_snapshot.talent_index,
         )
     except Exception as e:
         logger.exception(f"Error in api_lookup_talents: {e}")
@@ -338,6 +383,23 @@ async def api_lookup_talents(req_data: TalentLookupRequest, request: Request):
         )
 
 
+@app.post("/v1/lookup/talents/unlocked", response_model=models.TalentDiffResponse, tags=["Lookups"])
+async def api_lookup_unlocked_talents(req_data: models.TalentDiffRequest, request: Request):
+    """
+    Gets only the talents crossed between two sets of stats and skills:
+    those 'after' unlocks that 'before' did not, and any it loses. Only the
+    stats and skills that differ are checked.
+    """
+    check_state_loaded(request)  # Run dependency check
+    try:
+        return core.find_crossed_talents(req_data.before, req_data.after, request.app.state.rules_snapshot.talent_index)
+    except Exception as e:
+        logger.exception(f"Error in api_lookup_unlocked_talents: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Internal error looking up unlocked talents: {e}"
+        )
+
+
 @app.get(
     "/v1/lookup/skills_by_category",
     response_model=SkillCategoryResponse,
@@ -368,48 +430,12 @@ async def api_get_skills_by_category(request: Request):
 async def api_get_ability_school(request: Request, school_name: str):
     """Returns data for a single ability school."""
     check_state_loaded(request)  # Run dependency check
-    try:
-        ability_data = request.app.state.ability_data  # Get from state
-        if school_name not in ability_data:
-            raise HTTPException(
-                status_code=404, detail=f"Ability school '{school_name}' not found."
-            )
-        data = ability_data[school_name]
-        
-        # --- FIX: Extract all tiers from all branches (with safety checks) ---
-        all_tiers = []
-        branches = data.get("branches", [])
-        
-        if not branches:
-            # If no branches, check if tiers exist at top level (flat structure)
-            all_tiers = data.get("tiers", [])
-            logger.warning(f"Ability school '{school_name}' has no branches. Using flat tier structure.")
-        else:
-            # Extract tiers from each branch
-            for branch in branches:
-                branch_tiers = branch.get("tiers", [])
-                if branch_tiers:
-                    all_tiers.extend(branch_tiers)
-                else:
-                    logger.warning(f"Branch '{branch.get('branch', 'Unknown')}' in {school_name} has no tiers")
-        
-        if not all_tiers:
-            logger.warning(f"Ability school '{school_name}' returned no tiers after processing.")
-        # --- END FIX ---
-
-        # Ensure response matches Pydantic model structure
-        return AbilitySchoolResponse(
-            school=school_name,
-            # Check both keys for flexibility, default to Unknown
-            resource_pool=data.get("resource_pool", data.get("resource", "Unknown")),
-            associated_stat=data.get("associated_stat", "Unknown"),
-            tiers=all_tiers,  # <-- Pass the corrected list of all tiers
-        )
-    except Exception as e:
-        logger.exception(f"Error in api_get_ability_school for '{school_name}': {e}")
+    school = request.app.state.rules_snapshot.ability_schools.get(snapshot.normalize_key(school_name))
+    if school is None:
         raise HTTPException(
-            status_code=500, detail=f"Internal error getting ability school data: {e}"
+            status_code=404, detail=f"Ability school '{school_name}' not found."
         )
+    return school
 
 
 @app.get("/v1/lookup/all_stats", response_model=List[str], tags=["Lookups"])
@@ -433,17 +459,7 @@ async def api_get_all_ability_schools(request: Request):
     """Returns the list of the 12 official ability school names."""
     check_state_loaded(request)  # Run dependency check
     logger.info("Received request for /v1/lookup/all_ability_schools")
-    try:
-        ability_data = request.app.state.ability_data  # Get from state
-        keys = list(ability_data.keys())
-        logger.info(f"Successfully retrieved ability school keys: {keys}")
-        return keys
-    except Exception as e:
-        logger.exception(f"Unexpected ERROR in api_get_all_ability_schools: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Internal server error getting ability schools list.",
-        )
+    return list(request.app.state.rules_snapshot.ability_school_names)
 
 
 # --- ADD THIS NEW ENDPOINT ---
@@ -536,30 +552,7 @@ async def api_get_background_talents(request: Request):
     """Returns all talents with talent_type == 'Background'."""
     check_state_loaded(request)
     logger.info("Received request for /v1/lookup/creation/background_talents")
-    talent_data = request.app.state.talent_data
-    background_talents = []
-
-    if not isinstance(talent_data, dict):
-        logger.error(
-            "Talent data is not a dictionary, cannot filter for background talents."
-        )
-        return []
-
-    for talent_name, talent_info in talent_data.items():
-        if (
-            isinstance(talent_info, dict)
-            and talent_info.get("talent_type") == "Background"
-        ):
-            background_talents.append(
-                TalentInfo(
-                    name=talent_name,
-                    source=f"Talent Type: Background",
-                    description=talent_info.get("description", "No description."),
-                )
-            )
-
-    logger.info(f"Returning {len(background_talents)} background talents.")
-    return background_talents
+    return list(request.app.state.rules_snapshot.background_talents)
 
 
 @app.get(
@@ -571,32 +564,7 @@ async def api_get_ability_talents(request: Request):
     """Returns all talents with talent_type == 'Ability'."""
     check_state_loaded(request)
     logger.info("Received request for /v1/lookup/creation/ability_talents")
-    talent_data = request.app.state.talent_data
-    ability_talents = []
-
-    if not isinstance(talent_data, dict):
-        logger.error(
-            "Talent data is not a dictionary, cannot filter for ability talents."
-        )
-        return []
-
-    for talent_name, talent_info in talent_data.items():
-        if (
-            isinstance(talent_info, dict)
-            and talent_info.get("talent_type") == "Ability"
-        ):
-            # You could expand TalentInfo model to include 'school' if needed
-            ability_talents.append(
-                TalentInfo(
-                    name=talent_name,
-                    source=f"Talent Type: Ability",
-                    description=talent_info.get("description", "No description."),
-                    # We can add more fields if TalentInfo model is expanded
-                )
-            )
-
-    logger.info(f"Returning {len(ability_talents)} ability talents.")
-    return ability_talents
+    return list(request.app.state.rules_snapshot.ability_talents)
 
 
 # --- ADD NEW BACKGROUND CHOICE ENDPOINTS ---
@@ -768,6 +736,84 @@ async def api_calculate_damage(request_data: models.DamageRequest):
         )
 
 
+@app.post(
+    "/v1/analyze/attack",
+    response_model=models.AttackAnalysisResponse,
+    tags=["Combat Calculations"],
+)
+async def api_analyze_attack(request_data: models.AttackAnalysisRequest):
+    """
+    Exact odds of a contested attack and its damage, without rolling.
+    Takes the bodies of /v1/roll/contested_attack and /v1/calculate/damage
+    as 'attack' and 'damage'; returns each outcome's probability, the
+    margin histogram and the distribution of damage after DR on a hit.
+    """
+    logger.info(f"Received attack analysis request.")
+    try:
+        return core.analyze_attack(request_data.attack, request_data.damage)
+    except ValueError as ve:
+        logger.warning(f"Validation error during attack analysis: {ve}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.exception(f"Error analyzing attack: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error analyzing attack: {str(e)}",
+        )
+
+
+@app.post(
+    "/v1/resolve/batch",
+    response_model=models.BatchResolveResponse,
+    tags=["Combat Rolls"],
+)
+async def api_resolve_batch(request_data: models.BatchResolveRequest):
+    """
+    Resolves a list of skill checks, ability checks, initiative rolls,
+    contested attacks and damage rolls in one request, in order. Each
+    operation takes the same fields as its single endpoint plus 'op'; give
+    it an 'id' and later operations can 'require' it, e.g. damage that
+    runs only if the attack landed. Results come back in request order.
+    """
+    logger.info(f"Received batch of {len(request_data.operations)} operations.")
+    try:
+        results = core.resolve_batch(request_data.operations, request_data.rng_stream)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return {"results": results}
+
+
+@app.post("/v1/rng/streams", response_model=models.RngStreamInfo, tags=["Random Streams"])
+async def api_start_rng_stream(request_data: models.RngStreamRequest):
+    """
+    Starts a named random stream from a seed, replacing any stream with that
+    id. Roll requests that pass this id as 'rng_stream' then draw from it in
+    order, so restarting with the same seed and re-sending the same
+    requests replays the same rolls. Streams are also started with a fresh
+    seed the first time a roll request names them.
+    """
+    stream = rng.start_stream(request_data.stream_id, request_data.seed)
+    logger.info(f"Started RNG stream '{stream.stream_id}' with seed {stream.seed}.")
+    return stream.info()
+
+
+@app.get("/v1/rng/streams/{stream_id}", response_model=models.RngStreamInfo, tags=["Random Streams"])
+async def api_get_rng_stream(stream_id: str):
+    """The seed of a stream and how many dice it has rolled."""
+    stream = rng.get_stream(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail=f"RNG stream '{stream_id}' not found.")
+    return stream.info()
+
+
+@app.delete("/v1/rng/streams/{stream_id}", tags=["Random Streams"])
+async def api_discard_rng_stream(stream_id: str):
+    """Drops a stream, e.g. when its combat ends."""
+    if not rng.discard_stream(stream_id):
+        raise HTTPException(status_code=404, detail=f"RNG stream '{stream_id}' not found.")
+    return {"status": "discarded", "stream_id": stream_id}
+
+
 @app.get(
     "/v1/lookup/melee_weapon/{category_name}",
     response_model=Dict[str, Any],
@@ -776,9 +822,9 @@ async def api_calculate_damage(request_data: models.DamageRequest):
 async def api_get_melee_weapon(request: Request, category_name: str):
     """Looks up the stats for a specific melee weapon category."""
     check_state_loaded(request)
-    weapons = getattr(request.app.state, "melee_weapons", {})
-    if category_name in weapons:
-        return weapons[category_name]
+    weapon = request.app.state.rules_snapshot.melee_weapons.get(snapshot.normalize_key(category_name))
+    if weapon is not None:
+        return weapon
     raise HTTPException(
         status_code=404, detail=f"Melee weapon category '{category_name}' not found."
     )
@@ -792,9 +838,9 @@ async def api_get_melee_weapon(request: Request, category_name: str):
 async def api_get_ranged_weapon(request: Request, category_name: str):
     """Looks up the stats for a specific ranged weapon category."""
     check_state_loaded(request)
-    weapons = getattr(request.app.state, "ranged_weapons", {})
-    if category_name in weapons:
-        return weapons[category_name]
+    weapon = request.app.state.rules_snapshot.ranged_weapons.get(snapshot.normalize_key(category_name))
+    if weapon is not None:
+        return weapon
     raise HTTPException(
         status_code=404, detail=f"Ranged weapon category '{category_name}' not found."
     )
@@ -806,9 +852,9 @@ async def api_get_ranged_weapon(request: Request, category_name: str):
 async def api_get_armor(request: Request, category_name: str):
     """Looks up the stats for a specific armor category."""
     check_state_loaded(request)
-    armor = getattr(request.app.state, "armor", {})
-    if category_name in armor:
-        return armor[category_name]
+    armor = request.app.state.rules_snapshot.armor.get(snapshot.normalize_key(category_name))
+    if armor is not None:
+        return armor
     raise HTTPException(
         status_code=404, detail=f"Armor category '{category_name}' not found."
     )
@@ -822,11 +868,10 @@ async def api_get_armor(request: Request, category_name: str):
 async def api_get_skill_for_category(request: Request, category_name: str):
     """Looks up the skill for a given equipment category."""
     check_state_loaded(request)
-    skill_map = getattr(request.app.state, "equipment_category_to_skill_map", {})
-    try:
-        return core.get_skill_for_category(category_name, skill_map)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    skill = request.app.state.rules_snapshot.skill_for_category.get(snapshot.normalize_key(category_name))
+    if skill is None:
+        raise HTTPException(status_code=404, detail=f"Category '{category_name}' not found in skill map.")
+    return skill
 
 
 @app.post(
@@ -839,7 +884,16 @@ async def api_get_injury_effects(
 ):
     """Looks up the mechanical effects of a specific injury."""
     check_state_loaded(request)
+    key = (
+        snapshot.normalize_key(request_data.location),
+        snapshot.normalize_key(request_data.sub_location),
+        str(request_data.severity),
+    )
+    shaped = request.app.state.rules_snapshot.injury_effects.get(key)
+    if shaped is not None:
+        return shaped
     try:
+        # Not indexed: let the lookup explain which part is invalid
         return core.get_injury_effects(request_data, request.app.state.injury_effects)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -858,15 +912,13 @@ async def api_get_injury_effects(
 async def api_get_status_effect(status_name: str, request: Request):
     """Looks up the definition and effects for a status by name (e.g., 'Staggered', 'Bleeding')."""
 
-    # Verify status data loaded during startup
-    # Accessing via app.state where data_loader placed it
-    loaded_statuses = getattr(request.app.state, "status_effects", None)
-    if loaded_statuses is None:  # Check if attribute exists at all
+    rules_snapshot = getattr(request.app.state, "rules_snapshot", None)
+    if rules_snapshot is None:  # Check if attribute exists at all
         raise HTTPException(
             status_code=503,
             detail="Status effects data structure not initialized in app state.",
         )
-    if not loaded_statuses:  # Check if it's empty (e.g., file not found or empty)
+    if not rules_snapshot.status_effects and not rules_snapshot.status_effect_errors:
         # Logged warning during startup, return appropriate error now
         raise HTTPException(
             status_code=404,
@@ -874,50 +926,79 @@ async def api_get_status_effect(status_name: str, request: Request):
         )
 
     logger.info(f"Looking up status effect: {status_name}")
-    try:
-        # Call the core logic function
-        result = core.get_status_effect(status_name, request.app.state.status_effects)
-        return result
-    except (
-        ValueError
-    ) as e:  # Catch 'not found' or data structure errors from core function
-        logger.warning(f"Status effect lookup failed for '{status_name}': {e}")
-        # Use 404 if it's a 'not found' error, 400/500 for data issues
-        if "not found" in str(e):
-            raise HTTPException(status_code=404, detail=str(e))
-        else:  # Likely a data structure mismatch
-            raise HTTPException(
-                status_code=500,
-                detail=f"Data error retrieving status '{status_name}': {e}",
-            )
-    except Exception as e:
-        logger.exception(
-            f"Unexpected error looking up status effect '{status_name}': {e}"
-        )
+    key = snapshot.normalize_key(status_name)
+    status_effect = rules_snapshot.status_effects.get(key)
+    if status_effect is not None:
+        return status_effect
+    if key in rules_snapshot.status_effect_errors:
+        # The entry exists but does not match StatusEffectResponse
         raise HTTPException(
             status_code=500,
-            detail=f"Internal server error looking up status effect: {str(e)}",
+            detail=f"Data error retrieving status '{status_name}': {rules_snapshot.status_effect_errors[key]}",
         )
+    logger.warning(f"Status effect lookup failed for '{status_name}'.")
+    raise HTTPException(
+        status_code=404,
+        detail=f"Status effect '{status_name}' not found in loaded status_effects.json.",
+    )
 
 @app.get("/v1/lookup/npc_template/{template_id}", response_model=Dict, tags=["Lookups"])
 async def api_get_npc_template(request: Request, template_id: str):
     """Looks up the generation parameters for a given NPC template ID."""
     check_state_loaded(request)  # Run dependency check
     logger.info(f"Received request for NPC template: {template_id}")
-    templates = getattr(request.app.state, "npc_templates", {})
-    template_data = templates.get(template_id)
+    template_data = request.app.state.rules_snapshot.npc_templates.get(snapshot.normalize_key(template_id))
     if not template_data:
         logger.warning(f"NPC template ID '{template_id}' not found in npc_templates.json.")
         raise HTTPException(status_code=404, detail=f"NPC template '{template_id}' not found.")
     return template_data
 
+@app.get("/v1/lookup/npc_statblock/{template_id}", response_model=NpcTemplateResponse, tags=["Lookups"])
+async def api_get_npc_statblock(request: Request, template_id: str):
+    """Returns the stat block generated for an NPC template at startup."""
+    check_state_loaded(request)
+    statblock = request.app.state.rules_snapshot.npc_statblocks.get(snapshot.normalize_key(template_id))
+    if not statblock:
+        raise HTTPException(status_code=404, detail=f"NPC template '{template_id}' not found.")
+    return statblock
+
+@app.get("/v1/lookup/npc_power_ratings", response_model=Dict[str, models.PowerRatingResponse], tags=["Lookups"])
+async def api_get_npc_power_ratings(request: Request):
+    """
+    Returns the power rating of every NPC template, keyed by template ID.
+    Used by the encounter_generator to build encounters to a budget.
+    """
+    check_state_loaded(request)
+    return request.app.state.rules_snapshot.npc_power_ratings
+
+@app.post("/v1/calculate/power_rating", response_model=List[models.PowerRatingResponse], tags=["Combat Calculations"])
+async def api_calculate_power_rating(
+    request_data: Annotated[List[models.PowerRatingRequest], Body(max_length=models.MAX_POWER_RATING_MEMBERS)],
+):
+    """
+    Rates a list of combatants (e.g. a party) on the same scale as the NPC
+    templates. At most MAX_POWER_RATING_MEMBERS combatants per call.
+    """
+    return [
+        core.calculate_power_rating(
+            member.stats,
+            member.max_hp,
+            member.attack_stat,
+            member.defense_stat,
+            member.damage_dice,
+            member.skill_rank,
+            member.damage_bonus,
+            member.damage_reduction,
+        )
+        for member in request_data
+    ]
+
 @app.get("/v1/lookup/item_template/{item_id}", response_model=Dict, tags=["Lookups"])
 async def api_get_item_template(request: Request, item_id: str):
     """Looks up the definition for a given item_id."""
     check_state_loaded(request)  # Run dependency check
     logger.info(f"Received request for item template: {item_id}")
-    templates = getattr(request.app.state, "item_templates", {})
-    template_data = templates.get(item_id)
+    template_data = request.app.state.rules_snapshot.item_templates.get(snapshot.normalize_key(item_id))
     if not template_data:
         logger.warning(f"Item template ID '{item_id}' not found in item_templates.json.")
         raise HTTPException(status_code=404, detail=f"Item template '{item_id}' not found.")
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Dict, Optional
+from typing import Annotated, Any, List, Dict, Literal, Optional, Union
+
+from . import dice
 
 
 # Game Data Models
@@ -126,17 +128,26 @@ class Stat(BaseModel):
 
 # --- API Request Models ---
 
+RNG_STREAM_DESCRIPTION = (
+    "Optional id of a seeded random stream (e.g. a combat id) to roll on, "
+    "so rolls can be replayed; see /v1/rng/streams."
+)
+# Flat bonuses, penalties and DR are bounded well beyond anything the rules produce
+FLAT_MODIFIER_LIMIT = 1000
+
 
 class SkillCheckRequest(BaseModel):
     stat_modifier: int
     skill_rank: int
     dc: int = Field(default=15, description="Difficulty Class")
+    rng_stream: Optional[str] = Field(default=None, description=RNG_STREAM_DESCRIPTION)
 
 
 class AbilityCheckRequest(BaseModel):
     ability_school_rank: int
     associated_stat_modifier: int
     ability_tier: int = Field(gt=0, le=10, description="Tier 1-10")
+    rng_stream: Optional[str] = Field(default=None, description=RNG_STREAM_DESCRIPTION)
 
 
 class TalentLookupRequest(BaseModel):
@@ -148,6 +159,12 @@ class TalentLookupRequest(BaseModel):
     )
 
 
+class TalentDiffRequest(BaseModel):
+    """A character's stats and skills before and after a change, e.g. a rank-up."""
+    before: TalentLookupRequest
+    after: TalentLookupRequest
+
+
 # --- API Response Models ---
 
 
@@ -167,6 +184,11 @@ class TalentInfo(BaseModel):
     effect: str
 
 
+class TalentDiffResponse(BaseModel):
+    unlocked: List[TalentInfo] = Field(description="Talents reached by 'after' but not 'before'.")
+    locked: List[TalentInfo] = Field(description="Talents reached by 'before' but no longer by 'after'.")
+
+
 class FeatureStatsResponse(BaseModel):
     name: str
     mods: Dict[str, List[str]]
@@ -206,6 +228,7 @@ class InitiativeRequest(BaseModel):
     logic: int = Field(..., description="Attribute H Score")
     intuition: int = Field(..., description="Attribute J Score")
     willpower: int = Field(..., description="Attribute L Score")
+    rng_stream: Optional[str] = Field(default=None, description=RNG_STREAM_DESCRIPTION)
 
 
 class InitiativeResponse(BaseModel):
@@ -229,11 +252,11 @@ class ContestedAttackRequest(BaseModel):
     attacker_skill_rank: int = Field(...)
     # --- MODIFIED: Specific Bonuses/Penalties ---
     attacker_attack_roll_bonus: int = Field(
-        default=0,
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT,
         description="Sum of bonuses DIRECTLY affecting the attacker's d20 roll (e.g., from Steady Aim, Bless).",
     )
     attacker_attack_roll_penalty: int = Field(
-        default=0,
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT,
         description="Sum of penalties DIRECTLY affecting the attacker's d20 roll (e.g., from Shaken, Blinded).",
     )
     # --- END MODIFIED ---
@@ -242,18 +265,19 @@ class ContestedAttackRequest(BaseModel):
     defender_armor_stat_score: int = Field(...)
     defender_armor_skill_rank: int = Field(...)
     defender_weapon_penalty: int = Field(
-        default=0, description="Base penalty from the attacker's weapon category."
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT, description="Base penalty from the attacker's weapon category."
     )
     # --- MODIFIED: Specific Bonuses/Penalties ---
     defender_defense_roll_bonus: int = Field(
-        default=0,
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT,
         description="Sum of bonuses DIRECTLY affecting the defender's d20 roll (e.g., from Cover, Heavy Cloaks vs Ranged).",
     )
     defender_defense_roll_penalty: int = Field(
-        default=0,
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT,
         description="Sum of penalties DIRECTLY affecting the defender's d20 roll (e.g., from Prone vs Melee, injuries).",
     )
     # --- END MODIFIED ---
+    rng_stream: Optional[str] = Field(default=None, description=RNG_STREAM_DESCRIPTION)
 
     # Removed target_hit_location, attacker_steady_aim_active, is_ranged_attack
     # The effects of these are now expected to be included in the bonus/penalty fields by the caller (story_engine)
@@ -301,49 +325,40 @@ class ContestedAttackResponse(BaseModel):
     margin: int = Field(description="Attacker's Final Total - Defender's Final Total.")
 
 
-def _core_parse_dice_string(dice_str: str) -> (int, int):
-    """Helper for model validation. Parses a dice string like '2d6' into (number_of_dice, dice_sides)."""
-    if dice_str == "0":
-        return 0, 0
-    if "d" not in dice_str:
-        raise ValueError(f"Invalid dice string format: '{dice_str}'")
-    parts = dice_str.lower().split("d")
-    if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
-        raise ValueError(f"Invalid dice string format: '{dice_str}'")
-    return int(parts[0]), int(parts[1])
-
-
 # ADD THESE MODELS for Damage Calculation
 class DamageRequest(BaseModel):
     """Input required for calculating damage, using specific aggregated modifiers."""
 
     # Attacker Info
-    base_damage_dice: str = Field(...)
+    base_damage_dice: str = Field(
+        ..., description="Dice expression, e.g. '2d6', '2d6+1d4+3', '4d6kh3' or '1d8 (x2)' for two hits."
+    )
     relevant_stat_score: int = Field(...)
     # --- MODIFIED: Specific Bonuses/Penalties ---
     attacker_damage_bonus: int = Field(
-        default=0,
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT,
         description="Sum of flat damage bonuses (talents, abilities, weapon properties NOT included in dice).",
     )
     attacker_damage_penalty: int = Field(
-        default=0, description="Sum of flat damage penalties."
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT, description="Sum of flat damage penalties."
     )
     attacker_dr_modifier: int = Field(
-        default=0,
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT,
         description="Value to subtract from target's DR (e.g., 1 for Great Weapons/Heavy Artillery). Should be positive.",
     )
     # --- END MODIFIED ---
 
     # Defender Info
     defender_base_dr: int = Field(
-        default=0, description="Target's base Damage Reduction from armor."
+        default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT, description="Target's base Damage Reduction from armor."
     )
+    rng_stream: Optional[str] = Field(default=None, description=RNG_STREAM_DESCRIPTION)
 
     # Future: Add 'defender_resistance_multiplier', 'damage_type'
     @validator("base_damage_dice")
     def validate_dice_string(cls, v):
         try:
-            _core_parse_dice_string(v)  # Use local helper
+            dice.compile_dice(v)  # Compiled once; calculate_damage reuses the cached form
         except ValueError as e:
             raise ValueError(str(e))
         return v
@@ -379,6 +394,34 @@ class DamageResponse(BaseModel):
     )
 
 
+class AttackAnalysisRequest(BaseModel):
+    """The inputs of a contested attack and of the damage it deals if it lands."""
+
+    attack: ContestedAttackRequest
+    damage: DamageRequest
+
+
+class AttackAnalysisResponse(BaseModel):
+    """
+    Exact odds of an attack, computed without rolling.
+    """
+
+    attacker_total_modifier: int
+    defender_total_modifier: int
+    outcome_probabilities: Dict[str, float] = Field(
+        description="Chance of each outcome: critical_fumble, miss, hit, solid_hit, critical_hit."
+    )
+    hit_chance: float = Field(description="Chance the attack lands (hit, solid_hit or critical_hit).")
+    margin_histogram: Dict[int, float] = Field(
+        description="Chance of each margin (attacker total - defender total), before natural 1s and 20s."
+    )
+    damage_pmf: Dict[int, float] = Field(
+        description="Chance of each final damage amount (after DR) when the attack lands."
+    )
+    expected_damage_on_hit: float
+    expected_damage: float = Field(description="Mean damage per attack, counting misses as 0.")
+
+
 class InjuryLookupRequest(BaseModel):
     """Input for looking up an injury's effects."""
 
@@ -469,6 +512,7 @@ class NpcGenerationRequest(BaseModel):
     behavior: str = "aggressive"
     difficulty: str = "medium"
     custom_name: Optional[str] = None
+    rng_stream: Optional[str] = Field(default=None, description=RNG_STREAM_DESCRIPTION)
 
 class NpcTemplateResponse(BaseModel):
     """
@@ -483,3 +527,126 @@ class NpcTemplateResponse(BaseModel):
     max_hp: int
     behavior_tags: List[str]
     loot_table_ref: Optional[str] = None
+    # Combat profile from generation_rules.json 'combat_profile_by_style'
+    attack_stat: Optional[str] = None
+    defense_stat: Optional[str] = None
+    damage_dice: Optional[str] = None
+    combat_skill_rank: Optional[int] = None
+    power_rating: Optional[float] = None
+
+
+MAX_POWER_RATING_MEMBERS = 50 # Combatants rated per /v1/calculate/power_rating call
+
+
+class PowerRatingRequest(BaseModel):
+    """
+    A combatant to rate, e.g. a party member when budgeting an encounter.
+    Stats not listed count as 10.
+    """
+    stats: Dict[str, int]
+    max_hp: int = Field(..., gt=0)
+    attack_stat: str = "Might"
+    defense_stat: str = "Reflexes"
+    damage_dice: str = "1d8"
+    skill_rank: int = Field(default=0, ge=0)
+    damage_bonus: int = Field(default=0, ge=-FLAT_MODIFIER_LIMIT, le=FLAT_MODIFIER_LIMIT)
+    damage_reduction: int = Field(default=0, ge=0, le=FLAT_MODIFIER_LIMIT)
+
+    @validator("damage_dice")
+    def validate_dice_string(cls, v):
+        dice.compile_dice(v)
+        return v
+
+
+class PowerRatingResponse(BaseModel):
+    """
+    A combatant's strength against a reference combatant (average stats,
+    no skill bonus). Ratings add up across a group.
+    """
+    power: float = Field(description="Geometric mean of expected_damage and effective_hp.")
+    hit_chance: float = Field(description="Chance an attack lands on the reference.")
+    expected_damage: float = Field(description="Mean damage per attack, counting misses.")
+    effective_hp: float = Field(description="max_hp adjusted for DR and how often the reference lands a hit.")
+    template_id: Optional[str] = None
+    name: Optional[str] = None
+
+
+# --- Batch Resolution ---
+class BatchOperationBase(BaseModel):
+    """
+    Fields shared by every batch operation. 'id' names the operation so a
+    later one can 'require' it: the later operation runs only if this one
+    succeeded (a contested attack that landed, or a passed check) and is
+    reported as skipped otherwise, e.g. damage only on a hit.
+    """
+    id: Optional[str] = None
+    requires: Optional[str] = None
+
+
+class SkillCheckOperation(BatchOperationBase, SkillCheckRequest):
+    op: Literal["skill_check"]
+
+
+class AbilityCheckOperation(BatchOperationBase, AbilityCheckRequest):
+    op: Literal["ability_check"]
+
+
+class InitiativeOperation(BatchOperationBase, InitiativeRequest):
+    op: Literal["initiative"]
+
+
+class ContestedAttackOperation(BatchOperationBase, ContestedAttackRequest):
+    op: Literal["contested_attack"]
+
+
+class DamageOperation(BatchOperationBase, DamageRequest):
+    op: Literal["damage"]
+
+
+BatchOperation = Annotated[
+    Union[
+        SkillCheckOperation,
+        AbilityCheckOperation,
+        InitiativeOperation,
+        ContestedAttackOperation,
+        DamageOperation,
+    ],
+    Field(discriminator="op"),
+]
+
+
+class BatchResolveRequest(BaseModel):
+    """A list of operations resolved in order in one request."""
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=500)
+    rng_stream: Optional[str] = Field(
+        default=None, description="Stream for every operation that does not name its own. " + RNG_STREAM_DESCRIPTION
+    )
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    op: str
+    status: str = Field(description="'ok', 'skipped' (a required operation did not succeed) or 'error'.")
+    result: Optional[Dict[str, Any]] = Field(
+        default=None, description="The same response the single-operation endpoint returns."
+    )
+    detail: Optional[str] = None
+
+
+class BatchResolveResponse(BaseModel):
+    results: List[BatchOperationResult]
+
+
+class RngStreamRequest(BaseModel):
+    """Starts (or restarts) a named random stream."""
+    stream_id: str = Field(..., min_length=1)
+    seed: Optional[int] = Field(
+        default=None, description="Seed to start from; a previous stream's seed replays it. Omit for a fresh seed."
+    )
+
+
+class RngStreamInfo(BaseModel):
+    stream_id: str
+    seed: int
+    rolls: int = Field(description="Dice rolled on this stream since it was started.")
@@ -0,0 +1,102 @@
+# probability.py
+"""
+Exact roll distributions for the combat rules, by convolving dice as NumPy
+arrays of outcome counts instead of sampling. Everything is counted in
+integer ways and only divided at the end, so probabilities are exact
+fractions of the total number of outcomes.
+
+Distributions are memoized on their integer inputs and returned as
+read-only arrays, so cached results can be shared safely.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+D20_FACES = 20
+DISTRIBUTION_CACHE_SIZE = 1024
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def convolve_power(counts: np.ndarray, times: int) -> np.ndarray:
+    """
+    Distribution of the sum of `times` independent draws from `counts`, by
+    repeated squaring, so large pools take O(log n) convolutions.
+    """
+    result = np.ones(1, dtype=np.int64)
+    power = counts
+    remaining = times
+    while remaining:
+        if remaining & 1:
+            result = np.convolve(result, power)
+        remaining >>= 1
+        if remaining:
+            power = np.convolve(power, power)
+    return result
+
+
+@lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)
+def dice_sum_counts(num_dice: int, sides: int) -> np.ndarray:
+    """
+    Ways to roll each total of `num_dice`d`sides`; index i is the total
+    num_dice + i. 0d0 is the single total 0.
+    """
+    if num_dice <= 0 or sides <= 0:
+        return _frozen(np.ones(1, dtype=np.int64))
+    return _frozen(convolve_power(np.ones(sides, dtype=np.int64), num_dice))
+
+
+@lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)
+def contested_outcome_counts(net_modifier: int) -> Tuple[Tuple[str, int], ...]:
+    """
+    Ways (out of 400) for each outcome of a contested d20 attack where the
+    attacker's total modifier exceeds the defender's by `net_modifier`:
+    a natural 1 fumbles, a natural 20 crits, otherwise margin >= 5 is a
+    solid hit and margin >= 0 a hit.
+    """
+    attacker = np.arange(2, D20_FACES, dtype=np.int64) # Natural 2-19
+    defender = np.arange(1, D20_FACES + 1, dtype=np.int64)
+    margins = attacker[:, None] + net_modifier - defender[None, :]
+    solid = int(np.count_nonzero(margins >= 5))
+    landed = int(np.count_nonzero(margins >= 0))
+    return (
+        ("critical_fumble", D20_FACES),
+        ("miss", margins.size - landed),
+        ("hit", landed - solid),
+        ("solid_hit", solid),
+        ("critical_hit", D20_FACES),
+    )
+
+
+@lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)
+def margin_counts(net_modifier: int) -> Tuple[int, np.ndarray]:
+    """
+    Distribution of the margin (attacker total - defender total) over all
+    400 roll pairs: (lowest margin, ways per margin from there up).
+    The d20 difference is one convolution of a d20 with itself.
+    """
+    counts = np.convolve(np.ones(D20_FACES, dtype=np.int64), np.ones(D20_FACES, dtype=np.int64))
+    return 1 - D20_FACES + net_modifier, _frozen(counts)
+
+
+@lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)
+def final_damage_counts(expression, flat_modifier: int, effective_dr: int) -> Tuple[int, np.ndarray, int]:
+    """
+    Distribution of final damage following calculate_damage: a compiled
+    dice expression (see dice.py) + flat modifier - DR, never below 0.
+    Returns (lowest damage, ways per damage from there up, total ways).
+    The array is as long as the dice range whatever the flat modifier is;
+    totals at or below 0 all land in the 0 bucket.
+    """
+    lowest, counts = expression.distribution()
+    lowest += flat_modifier - effective_dr
+    total_ways = int(counts.sum())
+    if lowest >= 0:
+        return lowest, counts, total_ways
+    at_or_below_zero = min(len(counts), 1 - lowest)
+    final = np.concatenate([[counts[:at_or_below_zero].sum()], counts[at_or_below_zero:]])
+    return 0, _frozen(final), total_ways
@@ -0,0 +1,95 @@
+# rng.py
+"""
+Named, seeded random streams for reproducible rolls.
+
+A roll request that names an `rng_stream` (e.g. "combat-42") draws its dice
+from that stream's own random.Random instead of the shared global `random`
+module, so the same seed and the same requests in the same order give the
+same rolls. Each stream counts the dice it has rolled; a stream's seed and
+counter identify exactly where a replay is.
+
+Streams are held in a bounded registry; once it is full, the stream used
+least recently is dropped. A dropped or never-created stream is started
+again with a fresh seed on its next use.
+"""
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+RNG_STREAM_CAPACITY = int(os.getenv("RNG_STREAM_CAPACITY", "256"))
+
+_seed_source = random.SystemRandom()
+
+
+class RngStream:
+    """A seeded random.Random that counts the dice it rolls."""
+
+    def __init__(self, stream_id: str, seed: int):
+        self.stream_id = stream_id
+        self.seed = seed
+        self.rolls = 0
+        self._random = random.Random(seed)
+
+    def randint(self, a: int, b: int) -> int:
+        self.rolls += 1
+        return self._random.randint(a, b)
+
+    def info(self) -> Dict[str, Union[str, int]]:
+        return {"stream_id": self.stream_id, "seed": self.seed, "rolls": self.rolls}
+
+
+_streams: "OrderedDict[str, RngStream]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _store(stream: RngStream) -> RngStream:
+    # Caller holds _lock
+    _streams[stream.stream_id] = stream
+    _streams.move_to_end(stream.stream_id)
+    while len(_streams) > RNG_STREAM_CAPACITY:
+        _streams.popitem(last=False)
+    return stream
+
+
+def start_stream(stream_id: str, seed: Optional[int] = None) -> RngStream:
+    """
+    Starts `stream_id` from `seed` (a fresh one if omitted), replacing any
+    stream of that id. Starting again with a stream's seed replays it.
+    """
+    if seed is None:
+        seed = _seed_source.getrandbits(63)
+    with _lock:
+        return _store(RngStream(stream_id, seed))
+
+
+def get_stream(stream_id: str) -> Optional[RngStream]:
+    """The stream with this id, or None if it was never started or was dropped."""
+    with _lock:
+        stream = _streams.get(stream_id)
+        if stream is not None:
+            _streams.move_to_end(stream_id)
+        return stream
+
+
+def discard_stream(stream_id: str) -> bool:
+    """Drops a stream; returns whether it existed."""
+    with _lock:
+        return _streams.pop(stream_id, None) is not None
+
+
+def rng_for(stream_id: Optional[str]):
+    """
+    What to roll with: the named stream (started with a fresh seed if it
+    does not exist), or the global `random` module when no stream is named.
+    Both provide randint().
+    """
+    if stream_id is None:
+        return random
+    with _lock:
+        stream = _streams.get(stream_id)
+        if stream is None:
+            return _store(RngStream(stream_id, _seed_source.getrandbits(63)))
+        _streams.move_to_end(stream_id)
+        return stream
@@ -0,0 +1,155 @@
+# snapshot.py
+"""
+One immutable, indexed copy of the loaded rules data.
+
+build_rules_snapshot() runs once at startup and does every lookup's work
+ahead of time: names are case-folded into dictionaries, status effects,
+ability schools, injuries and talent lists are shaped into their response
+models, and the talent thresholds are indexed. Lookup endpoints then answer
+with a single dictionary hit. The snapshot also carries a hash of the data
+it was built from, served as the ETag of lookup responses so clients can
+cache them until the rules change.
+"""
+import copy
+import hashlib
+import json
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
+
+from . import core, models, talents
+
+
+def normalize_key(name: str) -> str:
+    """How lookup names are matched: case-insensitive, ignoring surrounding spaces."""
+    return name.strip().casefold()
+
+
+def _empty() -> Mapping:
+    return MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class RulesSnapshot:
+    content_hash: str = ""
+    # Case-folded name -> data or pre-shaped response
+    status_effects: Mapping[str, models.StatusEffectResponse] = field(default_factory=_empty)
+    status_effect_errors: Mapping[str, str] = field(default_factory=_empty)
+    melee_weapons: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    ranged_weapons: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    armor: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    skill_for_category: Mapping[str, str] = field(default_factory=_empty)
+    ability_schools: Mapping[str, models.AbilitySchoolResponse] = field(default_factory=_empty)
+    npc_templates: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    npc_statblocks: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    item_templates: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    # (location, sub-location, severity) -> response, all case-folded
+    injury_effects: Mapping[Tuple[str, str, str], models.InjuryEffectResponse] = field(default_factory=_empty)
+    # Lists, in file order
+    ability_school_names: Tuple[str, ...] = ()
+    background_talents: Tuple[models.TalentInfo, ...] = ()
+    ability_talents: Tuple[models.TalentInfo, ...] = ()
+    npc_power_ratings: Mapping[str, Dict[str, Any]] = field(default_factory=_empty)
+    talent_index: talents.TalentIndex = field(default_factory=talents.TalentIndex)
+
+
+def content_hash(loaded_rules: Dict[str, Any]) -> str:
+    """SHA-256 of the rules data in a canonical JSON form."""
+    canonical = json.dumps(loaded_rules, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _folded(data: Dict[str, Any]) -> Mapping[str, Any]:
+    # First spelling wins if two names differ only in case, as lookups always did
+    folded = {}
+    for name, value in data.items():
+        folded.setdefault(normalize_key(name), copy.deepcopy(value))
+    return MappingProxyType(folded)
+
+
+def _talents_of_type(talent_data: Dict[str, Any], talent_type: str) -> Tuple[models.TalentInfo, ...]:
+    return tuple(
+        models.TalentInfo(
+            name=talent_name,
+            source=f"Talent Type: {talent_type}",
+            effect=talent_info.get("description", "No description."),
+        )
+        for talent_name, talent_info in talent_data.items()
+        if isinstance(talent_info, dict) and talent_info.get("talent_type") == talent_type
+    )
+
+
+def _ability_schools(ability_data: Dict[str, Any]) -> Mapping[str, models.AbilitySchoolResponse]:
+    shaped = {}
+    for name, data in ability_data.items():
+        if normalize_key(name) not in shaped:
+            shaped[normalize_key(name)] = core.shape_ability_school(name, data)
+    return MappingProxyType(shaped)
+
+
+def _status_effects(status_data: Dict[str, Any]):
+    shaped, errors = {}, {}
+    for name in status_data:
+        key = normalize_key(name)
+        if key in shaped or key in errors:
+            continue
+        try:
+            shaped[key] = core.get_status_effect(name, status_data)
+        except ValueError as e:
+            errors[key] = str(e)
+    return MappingProxyType(shaped), MappingProxyType(errors)
+
+
+def _injury_effects(injury_data: Dict[str, Any]) -> Mapping[Tuple[str, str, str], models.InjuryEffectResponse]:
+    shaped = {}
+    for location, sub_locations in injury_data.items():
+        if not isinstance(sub_locations, dict):
+            continue
+        for sub_location, severities in sub_locations.items():
+            if not isinstance(severities, dict):
+                continue
+            for severity, severity_data in severities.items():
+                if not severity_data:
+                    continue
+                key = (normalize_key(location), normalize_key(sub_location), str(severity))
+                shaped.setdefault(key, models.InjuryEffectResponse(
+                    severity_name=severity_data.get("name", "Unknown"),
+                    effects=severity_data.get("effects", []),
+                ))
+    return MappingProxyType(shaped)
+
+
+def build_rules_snapshot(
+    loaded_rules: Dict[str, Any],
+    npc_statblocks: Dict[str, Dict[str, Any]],
+    npc_power_ratings: Dict[str, Dict[str, Any]],
+) -> RulesSnapshot:
+    """Indexes and pre-shapes everything the lookup endpoints serve."""
+    ability_data = loaded_rules.get("ability_data", {})
+    talent_data = loaded_rules.get("talent_data", {})
+    status_effects, status_effect_errors = _status_effects(loaded_rules.get("status_effects", {}))
+
+    return RulesSnapshot(
+        content_hash=content_hash(loaded_rules),
+        status_effects=status_effects,
+        status_effect_errors=status_effect_errors,
+        melee_weapons=_folded(loaded_rules.get("melee_weapons", {})),
+        ranged_weapons=_folded(loaded_rules.get("ranged_weapons", {})),
+        armor=_folded(loaded_rules.get("armor", {})),
+        skill_for_category=_folded(loaded_rules.get("equipment_category_to_skill_map", {})),
+        ability_schools=_ability_schools(ability_data),
+        npc_templates=_folded(loaded_rules.get("npc_templates", {})),
+        npc_statblocks=_folded(npc_statblocks),
+        item_templates=_folded(loaded_rules.get("item_templates", {})),
+        injury_effects=_injury_effects(loaded_rules.get("injury_effects", {})),
+        ability_school_names=tuple(ability_data),
+        background_talents=_talents_of_type(talent_data, "Background"),
+        ability_talents=_talents_of_type(talent_data, "Ability"),
+        npc_power_ratings=MappingProxyType({
+            template_id: {**rating, "template_id": template_id, "name": npc_statblocks[template_id]["name"]}
+            for template_id, rating in npc_power_ratings.items()
+        }),
+        talent_index=talents.build_talent_index(
+            talent_data, loaded_rules.get("stats_list", []), loaded_rules.get("all_skills", {})
+        ),
+    )
@@ -0,0 +1,191 @@
+# talents.py
+"""
+Talent eligibility by threshold index.
+
+Every talent unlocks when one number reaches a threshold: a stat score, the
+lower of two stat scores (dual stat talents need both), or a skill rank.
+build_talent_index() groups the talents by that number's key once, at load
+time, with their thresholds sorted, so the talents a score unlocks are a
+prefix found by bisection, and the talents crossed between two scores are
+the slice between two bisections.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Tuple
+
+from .models import TalentInfo
+
+# Threshold for talents whose requirement cannot be read; never reached in play
+UNREACHABLE_THRESHOLD = 99
+
+
+@dataclass(frozen=True)
+class ThresholdList:
+    """Talents sorted by the score that unlocks them; `order` is each talent's position in talents.json."""
+    thresholds: Tuple[int, ...]
+    talents: Tuple[Tuple[int, TalentInfo], ...]
+
+    def unlocked(self, score: int) -> Tuple[Tuple[int, TalentInfo], ...]:
+        return self.talents[: bisect_right(self.thresholds, score)]
+
+    def crossed(self, old_score: int, new_score: int) -> Tuple[Tuple[int, TalentInfo], ...]:
+        """Talents unlocked by new_score but not old_score (or the reverse, if the score went down)."""
+        low, high = sorted((old_score, new_score))
+        return self.talents[bisect_right(self.thresholds, low): bisect_right(self.thresholds, high)]
+
+
+@dataclass(frozen=True)
+class TalentIndex:
+    stats: FrozenSet[str] = frozenset()
+    by_stat: Mapping[str, ThresholdList] = field(default_factory=lambda: MappingProxyType({}))
+    by_stat_pair: Mapping[Tuple[str, str], ThresholdList] = field(default_factory=lambda: MappingProxyType({}))
+    pairs_by_stat: Mapping[str, Tuple[Tuple[str, str], ...]] = field(default_factory=lambda: MappingProxyType({}))
+    by_skill: Mapping[str, ThresholdList] = field(default_factory=lambda: MappingProxyType({}))
+
+    def stat_score(self, stats: Dict[str, int], stat: str) -> int:
+        # Stats outside the stats list count as 0, as they always have
+        return stats.get(stat, 0) if stat in self.stats else 0
+
+    def pair_score(self, stats: Dict[str, int], pair: Tuple[str, str]) -> int:
+        return min(self.stat_score(stats, pair[0]), self.stat_score(stats, pair[1]))
+
+
+def _parse_tier(tier_name: Any) -> int:
+    """'MT3' -> 3; anything unreadable can never be reached."""
+    if isinstance(tier_name, str) and tier_name.startswith("MT"):
+        try:
+            return int(tier_name[2:])
+        except ValueError:
+            pass
+    return UNREACHABLE_THRESHOLD
+
+
+def _threshold_lists(entries: Dict[Any, List[Tuple[int, int, TalentInfo]]]) -> Mapping[Any, ThresholdList]:
+    lists = {}
+    for key, talents in entries.items():
+        talents.sort(key=lambda entry: (entry[0], entry[1]))
+        lists[key] = ThresholdList(
+            thresholds=tuple(threshold for threshold, _, _ in talents),
+            talents=tuple((order, talent) for _, order, talent in talents),
+        )
+    return MappingProxyType(lists)
+
+
+def build_talent_index(
+    talent_data: Dict[str, Any], stats_list: List[str], all_skills_map: Dict[str, Any]
+) -> TalentIndex:
+    """
+    Indexes talents.json. Tier strings are parsed and skills checked against
+    the master skill map here, once; talents for unknown skills are left out.
+    """
+    by_stat, by_pair, by_skill = {}, {}, {}
+    order = 0
+
+    for talent_group in talent_data.get("single_stat_mastery", []):
+        stat_name = talent_group.get("stat")
+        required_score = talent_group.get("score")
+        if not stat_name or required_score is None:
+            continue
+        talent = TalentInfo(
+            name=talent_group.get("talent_name", "Unknown Talent"),
+            source=f"Stat: {stat_name} {required_score}",
+            effect=talent_group.get("effect", ""),
+        )
+        by_stat.setdefault(stat_name, []).append((required_score, order, talent))
+        order += 1
+
+    for talent in talent_data.get("dual_stat_focus", []):
+        req_score = talent.get("score", UNREACHABLE_THRESHOLD)
+        stats_pair = talent.get("paired_stats") or talent.get("stats") or []
+        if len(stats_pair) != 2:
+            continue
+        stat1, stat2 = stats_pair
+        info = TalentInfo(
+            name=talent.get("talent_name", "Unknown Talent"),
+            source=f"Dual Stat: {stat1} & {stat2} {req_score}",
+            effect=talent.get("effect", ""),
+        )
+        by_pair.setdefault((stat1, stat2), []).append((req_score, order, info))
+        order += 1
+
+    for category_list in talent_data.get("single_skill_mastery", {}).values():
+        if not isinstance(category_list, list):
+            continue
+        for skill_group in category_list:
+            skill_name = skill_group.get("skill")
+            if not skill_name:
+                continue
+            if skill_name not in all_skills_map:
+                print(f"Warning: Skill '{skill_name}' from talent data not found in master skill map.")
+                continue
+            for talent in skill_group.get("talents", []):
+                # Check both 'tier' and 'prerequisite_mt' keys for flexibility
+                tier_name = talent.get("tier", talent.get("prerequisite_mt"))
+                info = TalentInfo(
+                    name=talent.get("talent_name") or talent.get("name", "Unknown Talent"),
+                    source=f"Skill: {skill_name} ({tier_name})",
+                    effect=talent.get("effect", ""),
+                )
+                by_skill.setdefault(skill_name, []).append((_parse_tier(tier_name), order, info))
+                order += 1
+
+    pairs_by_stat: Dict[str, List[Tuple[str, str]]] = {}
+    for pair in by_pair:
+        for stat in set(pair):
+            pairs_by_stat.setdefault(stat, []).append(pair)
+
+    return TalentIndex(
+        stats=frozenset(stats_list),
+        by_stat=_threshold_lists(by_stat),
+        by_stat_pair=_threshold_lists(by_pair),
+        pairs_by_stat=MappingProxyType({stat: tuple(pairs) for stat, pairs in pairs_by_stat.items()}),
+        by_skill=_threshold_lists(by_skill),
+    )
+
+
+def _in_file_order(entries: Iterable[Tuple[int, TalentInfo]]) -> List[TalentInfo]:
+    return [talent for _, talent in sorted(entries, key=lambda entry: entry[0])]
+
+
+def eligible_talents(index: TalentIndex, stats: Dict[str, int], skills: Dict[str, int]) -> List[TalentInfo]:
+    """Every talent unlocked by these stats and skill ranks, in talents.json order."""
+    entries = []
+    for stat, talents in index.by_stat.items():
+        entries.extend(talents.unlocked(index.stat_score(stats, stat)))
+    for pair, talents in index.by_stat_pair.items():
+        entries.extend(talents.unlocked(index.pair_score(stats, pair)))
+    for skill, talents in index.by_skill.items():
+        entries.extend(talents.unlocked(skills.get(skill, 0)))
+    return _in_file_order(entries)
+
+
+def crossed_talents(
+    index: TalentIndex,
+    old_stats: Dict[str, int],
+    old_skills: Dict[str, int],
+    new_stats: Dict[str, int],
+    new_skills: Dict[str, int],
+) -> Tuple[List[TalentInfo], List[TalentInfo]]:
+    """
+    (unlocked, locked): talents gained and lost going from the old to the
+    new scores. Only the stats and skills that changed are looked at, so a
+    single rank-up is a single bisection pair.
+    """
+    unlocked, locked = [], []
+
+    def compare(talents: ThresholdList, old_score: int, new_score: int):
+        if new_score != old_score:
+            (unlocked if new_score > old_score else locked).extend(talents.crossed(old_score, new_score))
+
+    changed_stats = {stat for stat in old_stats.keys() | new_stats.keys()
+                     if index.stat_score(old_stats, stat) != index.stat_score(new_stats, stat)}
+    for stat in changed_stats:
+        if stat in index.by_stat:
+            compare(index.by_stat[stat], index.stat_score(old_stats, stat), index.stat_score(new_stats, stat))
+    for pair in {pair for stat in changed_stats for pair in index.pairs_by_stat.get(stat, ())}:
+        compare(index.by_stat_pair[pair], index.pair_score(old_stats, pair), index.pair_score(new_stats, pair))
+    for skill in old_skills.keys() | new_skills.keys():
+        if skill in index.by_skill:
+            compare(index.by_skill[skill], old_skills.get(skill, 0), new_skills.get(skill, 0))
+    return _in_file_order(unlocked), _in_file_order(locked)
@@ -14,3 +14,117 @@ def test_calculate_skill_check_failure():
     result = calculate_skill_check(stat_mod=0, skill_rank=0, dc=20)
     assert result.is_success is False
     assert result.roll_value == 5
+
+
+def test_hit_probability_matches_enumeration():
+    from rules_engine.app.core import hit_probability
+
+    for attack_mod in range(-6, 7, 3):
+        for defense_mod in range(-6, 7, 3):
+            hits = 0
+            for attacker_roll in range(1, 21):
+                for defender_roll in range(1, 21):
+                    margin = (attacker_roll + attack_mod) - (defender_roll + defense_mod)
+                    if attacker_roll == 20 or (attacker_roll != 1 and margin >= 0):
+                        hits += 1
+            assert hit_probability(attack_mod, defense_mod) == hits / 400
+
+
+def test_expected_damage_never_negative():
+    from rules_engine.app.core import expected_damage
+
+    assert expected_damage("1d8", 10) == 4.5
+    # 1d4 - 3 DR: only rolls of 4 get through, for 1 damage
+    assert expected_damage("1d4", 10, damage_reduction=3) == 0.25
+
+
+def test_power_rating_grows_with_hp_and_damage():
+    from rules_engine.app.core import calculate_power_rating
+
+    stats = {"Might": 12, "Reflexes": 12}
+    base = calculate_power_rating(stats, 20, "Might", "Reflexes", "1d8")
+    tougher = calculate_power_rating(stats, 80, "Might", "Reflexes", "1d8")
+    stronger = calculate_power_rating(stats, 20, "Might", "Reflexes", "4d8")
+    assert tougher["power"] > base["power"]
+    assert stronger["power"] > base["power"]
+    # Quadrupling HP doubles power, as a geometric mean should
+    assert abs(tougher["power"] / base["power"] - 2) < 0.01
+
+
+def test_analyze_attack_matches_enumeration(monkeypatch):
+    import itertools
+    from collections import Counter
+    from rules_engine.app import core, models, probability
+
+    attack = models.ContestedAttackRequest(
+        attacker_attacking_stat_score=14, attacker_skill_rank=2, attacker_attack_roll_bonus=1,
+        defender_armor_stat_score=12, defender_armor_skill_rank=1, defender_weapon_penalty=-1,
+    )
+    damage = models.DamageRequest(
+        base_damage_dice="2d6", relevant_stat_score=14, attacker_damage_bonus=1,
+        defender_base_dr=6, attacker_dr_modifier=1,
+    )
+
+    # Every pair of d20 rolls through the real contested attack
+    pairs = [roll for pair in itertools.product(range(1, 21), repeat=2) for roll in pair]
+    rolls = iter(pairs)
+    monkeypatch.setattr(core, "_roll_d20", lambda source=None: next(rolls))
+    outcomes, margins = Counter(), Counter()
+    for _ in range(400):
+        result = core.calculate_contested_attack(attack)
+        outcomes[result.outcome] += 1
+        margins[result.margin] += 1
+
+    # Every 2d6 roll through the real damage calculation
+    damages = Counter()
+    for faces in itertools.product(range(1, 7), repeat=2):
+        monkeypatch.setattr(core, "_roll_dice", lambda dice_str, source=None, faces=faces: (list(faces), sum(faces)))
+        damages[core.calculate_damage(damage).final_damage] += 1
+
+    analysis = core.analyze_attack(attack, damage)
+    assert analysis.outcome_probabilities == {o: outcomes[o] / 400 for o in analysis.outcome_probabilities}
+    assert analysis.margin_histogram == {m: c / 400 for m, c in sorted(margins.items())}
+    assert analysis.damage_pmf == {d: c / 36 for d, c in sorted(damages.items())}
+    assert abs(analysis.expected_damage - analysis.hit_chance * analysis.expected_damage_on_hit) < 1e-12
+
+    # Repeating the question is served from the memoized distributions
+    hits = probability.final_damage_counts.cache_info().hits
+    core.analyze_attack(attack, damage)
+    assert probability.final_damage_counts.cache_info().hits == hits + 1
+
+
+def test_damage_distribution_is_sized_by_the_dice_not_the_bonus():
+    import pytest
+    from rules_engine.app import core, dice, models, probability
+
+    lowest, counts, total = probability.final_damage_counts(dice.compile_dice("2d6"), 1000, 0)
+    assert (lowest, len(counts), total) == (1002, 11, 36)
+    # Totals at or below 0 collapse into the 0 bucket
+    lowest, counts, total = probability.final_damage_counts(dice.compile_dice("2d6"), -8, 0)
+    assert (lowest, counts.tolist()) == (0, [26, 4, 3, 2, 1])
+    assert core.expected_damage("1d4", 10, damage_bonus=models.FLAT_MODIFIER_LIMIT) == 1002.5
+
+    with pytest.raises(ValueError):
+        models.DamageRequest(base_damage_dice="2d6", relevant_stat_score=10, attacker_damage_bonus=50_000_000)
+
+
+def test_rng_stream_replays_rolls_without_global_state():
+    import random
+    from rules_engine.app import core, models, rng
+
+    attack = models.ContestedAttackRequest(
+        attacker_attacking_stat_score=12, attacker_skill_rank=1,
+        defender_armor_stat_score=12, defender_armor_skill_rank=1, rng_stream="combat-1",
+    )
+    damage = models.DamageRequest(base_damage_dice="3d6", relevant_stat_score=12, rng_stream="combat-1")
+
+    def play():
+        return [(core.calculate_contested_attack(attack).attacker_roll, core.calculate_damage(damage).damage_roll_details)
+                for _ in range(5)]
+
+    rng.start_stream("combat-1", seed=1234)
+    first = play()
+    assert rng.get_stream("combat-1").info() == {"stream_id": "combat-1", "seed": 1234, "rolls": 25}
+    rng.start_stream("combat-1", seed=1234)
+    random.seed(0)  # The global generator plays no part
+    assert play() == first
@@ -18,3 +18,117 @@ def test_read_status():
         assert data["ranged_weapons_loaded_count"] > 0
         assert data["armor_loaded_count"] > 0
         assert data["injury_effects_loaded_count"] > 0
+
+
+def test_npc_power_ratings_precomputed():
+    with TestClient(app) as client:
+        ratings = client.get("/v1/lookup/npc_power_ratings").json()
+        assert ratings["cultist_brute"]["power"] > 0
+        statblock = client.get("/v1/lookup/npc_statblock/cultist_brute").json()
+        assert statblock["power_rating"] == ratings["cultist_brute"]["power"]
+
+        party = client.post(
+            "/v1/calculate/power_rating",
+            json=[{"stats": {"Might": 10}, "max_hp": 20}, {"stats": {"Might": 16}, "max_hp": 20}],
+        ).json()
+        assert party[1]["power"] > party[0]["power"]
+
+        too_many = [{"stats": {}, "max_hp": 20}] * 51
+        assert client.post("/v1/calculate/power_rating", json=too_many).status_code == 422
+        too_strong = [{"stats": {}, "max_hp": 20, "damage_bonus": 50_000_000}]
+        assert client.post("/v1/calculate/power_rating", json=too_strong).status_code == 422
+
+
+def test_resolve_batch_chains_damage_on_hit():
+    attack = {
+        "attacker_attacking_stat_score": 14, "attacker_skill_rank": 3,
+        "defender_armor_stat_score": 10, "defender_armor_skill_rank": 0,
+    }
+    damage = {"base_damage_dice": "1d8", "relevant_stat_score": 14}
+    stats = {"endurance": 10, "reflexes": 12, "fortitude": 10, "logic": 10, "intuition": 10, "willpower": 10}
+    operations = [{"op": "initiative", **stats}, {"op": "skill_check", "stat_modifier": 2, "skill_rank": 1}]
+    for i in range(20):
+        operations.append({"op": "contested_attack", "id": f"a{i}", **attack})
+        operations.append({"op": "damage", "requires": f"a{i}", **damage})
+
+    with TestClient(app) as client:
+        body = client.post("/v1/resolve/batch", json={"operations": operations}).json()
+        results = body["results"]
+        assert [r["index"] for r in results] == list(range(len(operations)))
+        assert results[0]["result"]["total_initiative"] >= 1
+        for attack_result, damage_result in zip(results[2::2], results[3::2]):
+            landed = attack_result["result"]["outcome"] in ("hit", "solid_hit", "critical_hit")
+            assert damage_result["status"] == ("ok" if landed else "skipped")
+            if landed:
+                assert damage_result["result"]["final_damage"] >= 1
+
+        bad = client.post("/v1/resolve/batch", json={"operations": [{"op": "damage", "requires": "nope", **damage}]})
+        assert bad.status_code == 400
+        assert client.post("/v1/resolve/batch", json={"operations": [{"op": "teleport"}]}).status_code == 422
+
+
+def test_analyze_attack_endpoint():
+    attack = {
+        "attacker_attacking_stat_score": 12, "attacker_skill_rank": 1,
+        "defender_armor_stat_score": 12, "defender_armor_skill_rank": 1,
+    }
+    damage = {"base_damage_dice": "1d6", "relevant_stat_score": 10, "defender_base_dr": 2}
+    with TestClient(app) as client:
+        body = client.post("/v1/analyze/attack", json={"attack": attack, "damage": damage}).json()
+        assert abs(sum(body["outcome_probabilities"].values()) - 1) < 1e-12
+        # 1d6 - 2 DR: rolls of 1 and 2 deal nothing
+        assert body["damage_pmf"] == {"0": 2 / 6, "1": 1 / 6, "2": 1 / 6, "3": 1 / 6, "4": 1 / 6}
+        assert client.post("/v1/analyze/attack", json={"attack": attack}).status_code == 422
+
+
+def test_rng_stream_endpoints_and_batch_default(monkeypatch):
+    from rules_engine.app import rng
+
+    check = {"op": "skill_check", "stat_modifier": 0, "skill_rank": 0}
+    with TestClient(app) as client:
+        assert client.post("/v1/rng/streams", json={"stream_id": "replay", "seed": 7}).json()["rolls"] == 0
+        first = client.post("/v1/resolve/batch", json={"operations": [check] * 10, "rng_stream": "replay"}).json()
+        assert client.get("/v1/rng/streams/replay").json() == {"stream_id": "replay", "seed": 7, "rolls": 10}
+
+        client.post("/v1/rng/streams", json={"stream_id": "replay", "seed": 7})
+        singles = [client.post("/v1/validate/skill_check", json={"stat_modifier": 0, "skill_rank": 0, "rng_stream": "replay"}).json()
+                   for _ in range(10)]
+        assert [r["result"]["roll_value"] for r in first["results"]] == [r["roll_value"] for r in singles]
+
+        # Naming an unknown stream starts it with a fresh seed
+        client.post("/v1/validate/skill_check", json={"stat_modifier": 0, "skill_rank": 0, "rng_stream": "fresh"})
+        assert client.get("/v1/rng/streams/fresh").json()["rolls"] == 1
+
+        assert client.delete("/v1/rng/streams/replay").status_code == 200
+        assert client.get("/v1/rng/streams/replay").status_code == 404
+
+    # The registry is bounded: the least recently used stream is dropped
+    monkeypatch.setattr(rng, "RNG_STREAM_CAPACITY", 2)
+    for stream_id in ("a", "b", "c"):
+        rng.start_stream(stream_id)
+    assert rng.get_stream("a") is None and rng.get_stream("c") is not None
+
+
+def test_lookups_are_served_from_the_rules_snapshot():
+    import dataclasses
+    import pytest
+    from rules_engine.app import snapshot
+
+    with TestClient(app) as client:
+        rules_snapshot = app.state.rules_snapshot
+        assert client.get("/v1/lookup/status_effect/sTaGgErEd").json()["name"] == "Staggered"
+        assert client.get("/v1/lookup/ability_school/force").json()["school"] == "Force"
+        assert client.get("/v1/lookup/npc_template/GOBLIN_SCOUT").status_code == 200
+
+        # Lookups carry the content hash and honour If-None-Match
+        response = client.get("/v1/lookup/melee_weapon/Great Weapons")
+        assert response.headers["etag"] == f'"{rules_snapshot.content_hash}"'
+        assert client.get("/v1/lookup/melee_weapon/Great Weapons", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+        assert client.get("/v1/lookup/melee_weapon/No Such Weapon", headers={"If-None-Match": response.headers["etag"]}).status_code == 404
+        assert client.get("/").json()["rules_content_hash"] == rules_snapshot.content_hash
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        rules_snapshot.content_hash = "x"
+    with pytest.raises(TypeError):
+        rules_snapshot.melee_weapons["new"] = {}
+    assert snapshot.content_hash({"b": 1, "a": [1]}) == snapshot.content_hash({"a": [1], "b": 1})
@@ -0,0 +1,62 @@
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+from rules_engine.app import dice, models
+
+
+def _enumerate(expression):
+    """Every equally likely roll of the expression, by brute force."""
+    groups = []
+    for term in expression.terms:
+        groups.append([
+            (term, faces) for faces in itertools.product(range(1, term.sides + 1), repeat=term.count)
+        ])
+    one_hit = Counter()
+    for choice in itertools.product(*groups):
+        total = expression.constant
+        for term, faces in choice:
+            kept = sorted(faces, reverse=term.keep_highest)[: term.keep] if term.keep else faces
+            total += term.sign * sum(kept)
+        one_hit[total] += 1
+    totals = Counter({0: 1})
+    for _ in range(expression.hits):
+        combined = Counter()
+        for a, x in totals.items():
+            for b, y in one_hit.items():
+                combined[a + b] += x * y
+        totals = combined
+    return totals
+
+
+@pytest.mark.parametrize("text", ["2d6", "2d4+1d3-1", "4d6kh3", "3d6kl2", "1d4-1d4", "1d4+1 (x2)", "0"])
+def test_distribution_matches_enumeration(text):
+    lowest, counts = dice.compile_dice(text).distribution()
+    exact = {lowest + i: int(ways) for i, ways in enumerate(counts) if ways}
+    assert exact == dict(_enumerate(dice.compile_dice(text)))
+
+
+def test_compile_is_cached_and_rolls_with_any_source():
+    expression = dice.compile_dice("2d6 + 1d4 + 3")
+    assert dice.compile_dice("2d6 + 1d4 + 3") is expression
+    assert [t.sides for t in expression.terms] == [6, 4] and expression.constant == 3
+
+    rolls, total = dice.compile_dice("4d6kh3").roll(random.Random(3))
+    assert len(rolls) == 3 and total == sum(rolls)
+    assert dice.compile_dice("1d8+1 (x2)").roll(random.Random(3))[1] >= 4
+    assert dice.compile_dice("2d6").roll(random.Random(5)) == dice.compile_dice("2d6").roll(random.Random(5))
+
+
+@pytest.mark.parametrize("text", ["", "d", "2d0", "2d6+", "2d6 3", "3d6kh4", "1d6 (x0)", "1d6x2", "101d6"])
+def test_invalid_expressions_are_rejected(text):
+    with pytest.raises(ValueError):
+        dice.compile_dice(text)
+
+
+def test_damage_request_accepts_weapon_expressions():
+    # 'Dual Daggers'-style damage from melee_weapons.json used to be rejected
+    assert models.DamageRequest(base_damage_dice="1d4+1d4", relevant_stat_score=10)
+    with pytest.raises(ValueError):
+        models.DamageRequest(base_damage_dice="2x6", relevant_stat_score=10)
@@ -0,0 +1,67 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from rules_engine.app import data_loader, talents
+from rules_engine.app.main import app
+
+
+def _load_index():
+    rules = data_loader.load_data()
+    return rules, talents.build_talent_index(rules["talent_data"], rules["stats_list"], rules["all_skills"])
+
+
+def _tier(tier_name):
+    return int(tier_name[2:]) if tier_name.startswith("MT") else 99
+
+
+def _names(talent_list):
+    return [t.name for t in talent_list]
+
+
+def test_eligibility_matches_a_full_scan():
+    rules, index = _load_index()
+    talent_data = rules["talent_data"]
+    rng = random.Random(4)
+    skill_names = list(index.by_skill)
+    for _ in range(50):
+        stats = {stat: rng.randint(8, 18) for stat in rules["stats_list"]}
+        skills = {skill: rng.randint(0, 8) for skill in rng.sample(skill_names, 10)}
+
+        expected = [g["talent_name"] for g in talent_data["single_stat_mastery"] if stats.get(g["stat"], 0) >= g["score"]]
+        expected += [t["talent_name"] for t in talent_data["dual_stat_focus"]
+                     if all(stats.get(stat, 0) >= t["score"] for stat in t["stats"])]
+        for category in talent_data["single_skill_mastery"].values():
+            for group in category:
+                if group["skill"] in rules["all_skills"]:
+                    expected += [t.get("talent_name") or t["name"] for t in group["talents"]
+                                 if skills.get(group["skill"], 0) >= _tier(t["tier"])]
+        assert _names(talents.eligible_talents(index, stats, skills)) == expected
+
+
+def test_crossed_talents_is_the_difference():
+    rules, index = _load_index()
+    stats = {stat: 13 for stat in rules["stats_list"]}
+    skill = next(iter(index.by_skill))
+    before = talents.eligible_talents(index, stats, {skill: 2})
+
+    raised_stats = dict(stats, Might=14, Endurance=14)
+    after = talents.eligible_talents(index, raised_stats, {skill: 5})
+    unlocked, locked = talents.crossed_talents(index, stats, {skill: 2}, raised_stats, {skill: 5})
+    assert _names(unlocked) == [name for name in _names(after) if name not in _names(before)]
+    assert "Colossal Physique" in _names(unlocked) and locked == []
+
+    # Going back down loses them again
+    unlocked, locked = talents.crossed_talents(index, raised_stats, {skill: 5}, stats, {skill: 2})
+    assert unlocked == [] and _names(locked) == [name for name in _names(after) if name not in _names(before)]
+
+
+def test_unlocked_talents_endpoint():
+    skill = "Scale/Band Mail"
+    with TestClient(app) as client:
+        body = client.post("/v1/lookup/talents/unlocked", json={
+            "before": {"stats": {}, "skills": {skill: 4}},
+            "after": {"stats": {}, "skills": {skill: 5}},
+        }).json()
+        assert [(t["name"], t["source"]) for t in body["unlocked"]] == [("Spiked Retaliation", f"Skill: {skill} (MT5)")]
+        assert body["locked"] == []
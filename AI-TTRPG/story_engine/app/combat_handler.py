@@ -10,23 +10,17 @@ import logging
 
 logger = logging.getLogger("uvicorn.error")
 
-def _find_spawn_points(map_data: List[List[int]], num_points: int) -> List[List[int]]:
+async def _find_spawn_points(client: httpx.AsyncClient, map_data: List[List[int]], num_points: int) -> List[List[int]]:
+    """Asks the Map Generator for spaced-out spawn points; falls back to a default tile."""
     if not map_data:
         logger.warning("Map data is empty, cannot find spawn points.")
         return [[5, 5]] * num_points
-    valid_spawns = []
-    height = len(map_data)
-    width = len(map_data[0]) if height > 0 else 0
-    for y in range(height):
-        for x in range(width):
-            tile_id = map_data[y][x]
-            if tile_id in [0, 3]: # 0=Grass, 3=Stone Floor
-                valid_spawns.append([x, y])
-    if not valid_spawns:
+    spawn_points = await services.find_spawn_points(client, map_data, num_enemy=num_points)
+    enemy_spawns = spawn_points.get("enemy", [])
+    if len(enemy_spawns) < num_points:
         logger.warning("No valid spawn tiles found on map. Falling back to default.")
         return [[5, 5]] * num_points
-    random.shuffle(valid_spawns)
-    return [valid_spawns[i % len(valid_spawns)] for i in range(num_points)]
+    return enemy_spawns
 
 def _extract_initiative_stats(stats_dict: Dict) -> Dict:
     # This function is now correct based on our previous fix
@@ -49,7 +43,7 @@ async def start_combat(db: Session, start_request: schemas.CombatStartRequest) -
             location_context = await services.get_world_location_context(client, start_request.location_id)
             map_data = location_context.get("generated_map_data")
             num_npcs = len(start_request.npc_template_ids)
-            spawn_points = _find_spawn_points(map_data, num_npcs)
+            spawn_points = await _find_spawn_points(client, map_data, num_npcs)
             logger.info(f"Found {len(spawn_points)} spawn points for {num_npcs} NPCs.")
         except Exception as e:
             logger.exception(f"Error finding spawn points: {e}. NPCs will spawn at default location.")
@@ -93,6 +87,8 @@ async def start_combat(db: Session, start_request: schemas.CombatStartRequest) -
                 logger.exception(f"Unexpected error spawning NPC template '{template_id}': {e}")
                 continue
 
+        # (actor_id, actor_type, initiative stats), rolled together in one batch below
+        initiative_requests: List[Tuple[str, str, Dict]] = []
         logger.info(f"Rolling initiative for players: {start_request.player_ids}")
         for player_id_str in start_request.player_ids:
             try:
@@ -102,11 +98,7 @@ async def start_combat(db: Session, start_request: schemas.CombatStartRequest) -
                 char_context = await services.get_character_context(client, player_id_str)
                 # --- MODIFIED: Use flat stats ---
                 player_stats = char_context.get("stats", {})
-                stats_for_init = _extract_initiative_stats(player_stats)
-                init_result = await services.roll_initiative(client, **stats_for_init)
-                initiative_total = init_result.get("total_initiative", 0)
-                participants_data.append((player_id_str, "player", initiative_total))
-                logger.info(f"Player {player_id_str} initiative: {initiative_total}")
+                initiative_requests.append((player_id_str, "player", _extract_initiative_stats(player_stats)))
             except HTTPException as e:
                 logger.error(f"Failed to get context or roll initiative for Player {player_id_str}: {e.detail}")
                 participants_data.append((player_id_str, "player", 0))
@@ -141,11 +133,7 @@ async def start_combat(db: Session, start_request: schemas.CombatStartRequest) -
                     except Exception as e:
                         logger.error(f"Failed to re-generate template for NPC {npc_id} stats. Using defaults. Error: {e}")
                         npc_stats = {}
-                stats_for_init = _extract_initiative_stats(npc_stats)
-                init_result = await services.roll_initiative(client, **stats_for_init)
-                initiative_total = init_result.get("total_initiative", 0)
-                participants_data.append((actor_id_str, "npc", initiative_total))
-                logger.info(f"NPC {npc_id} (template: {template_id}) initiative: {initiative_total}")
+                initiative_requests.append((actor_id_str, "npc", _extract_initiative_stats(npc_stats)))
             except HTTPException as e:
                 logger.error(f"Failed to get context or roll initiative for NPC {npc_id}: {e.detail}")
                 participants_data.append((actor_id_str, "npc", 0))
@@ -153,6 +141,19 @@ async def start_combat(db: Session, start_request: schemas.CombatStartRequest) -
                 logger.exception(f"Unexpected error processing NPC {npc_id}: {e}")
                 participants_data.append((actor_id_str, "npc", 0))
 
+        if initiative_requests:
+            operations = [{"op": "initiative", **stats} for _, _, stats in initiative_requests]
+            try:
+                results = (await services.resolve_batch(client, operations)).get("results", [])
+            except HTTPException as e:
+                logger.error(f"Failed to roll initiative batch: {e.detail}")
+                results = []
+            for i, (actor_id, actor_type, _) in enumerate(initiative_requests):
+                result = results[i] if i < len(results) else {}
+                initiative_total = (result.get("result") or {}).get("total_initiative", 0)
+                participants_data.append((actor_id, actor_type, initiative_total))
+                logger.info(f"{actor_id} initiative: {initiative_total}")
+
     if not participants_data:
         raise HTTPException(status_code=400, detail="Cannot start combat: No valid participants found.")
 
@@ -1,10 +1,12 @@
 from fastapi import Depends, FastAPI, HTTPException, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
+import json
 import logging
 
-from . import crud, models, schemas, services, combat_handler, interaction_handler
+from . import crud, models, schemas, services, combat_handler, interaction_handler, scene_handler
 from .database import SessionLocal, engine
 
 
@@ -170,6 +172,33 @@ async def post_npc_action(combat_id: int, db: Session = Depends(get_db)):
         action=npc_action_request
     )
 
+@router.post("/v1/scenes", response_model=schemas.SceneBundle, tags=["Scene Assembly"])
+async def api_assemble_scene(scene_request: schemas.SceneRequest):
+    """
+    Assembles a fight in one call: encounter (budgeted to the party if one is
+    given), map, spawn points and NPC stat blocks. Independent stages run
+    concurrently; see scene_handler for the dependency graph.
+    """
+    async for event in scene_handler.assemble_scene(scene_request):
+        if event["stage"] != "scene":
+            continue
+        if event["status"] == "error":
+            raise HTTPException(status_code=event["status_code"], detail=event["detail"])
+        return event["result"]
+
+@router.post("/v1/scenes/stream", tags=["Scene Assembly"])
+async def api_assemble_scene_stream(scene_request: schemas.SceneRequest):
+    """
+    Same as /v1/scenes, streamed as NDJSON: one line per stage as it
+    finishes (encounter, map, statblocks, spawn_points, in completion
+    order), then a final 'scene' line with the bundle.
+    """
+    async def stream():
+        async for event in scene_handler.assemble_scene(scene_request):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.post("/v1/actions/interact", response_model=schemas.InteractionResponse, tags=["Player Actions"])
 async def handle_player_interaction(interaction_request: schemas.InteractionRequest):
     logger.info(f"Received interaction request: {interaction_request.dict()}")
@@ -0,0 +1,192 @@
+# AI-TTRPG/story_engine/app/scene_handler.py
+from fastapi import HTTPException
+import httpx
+from typing import AsyncIterator, Dict, Any, List, Optional
+from . import schemas, services
+import asyncio
+import logging
+import time
+import zlib
+
+logger = logging.getLogger("uvicorn.error")
+
+# Scene assembly runs as a small dependency graph instead of a chain:
+#
+#   encounter ──┬──> statblocks ──┐
+#               │                 ├──> bundle
+#   map ────────┴──> spawn_points ┘
+#
+# The encounter and the map start together, stat blocks are fetched as soon
+# as the encounter names its NPCs (one concurrent lookup per template), and
+# spawn points are placed once both the map and the NPC count are known.
+# Scene latency is the slowest path through the graph, not the sum of calls.
+REQUIRED_STAGES = ("encounter", "map", "spawn_points")
+
+class StageSkipped(Exception):
+    """A stage could not run because a stage it depends on failed."""
+
+def _seed_int(seed: Optional[str]) -> Optional[int]:
+    """The encounter_generator takes integer seeds; derive one from the scene seed."""
+    return zlib.crc32(seed.encode("utf-8")) if seed is not None else None
+
+async def _encounter_stage(client: httpx.AsyncClient, request: schemas.SceneRequest) -> Dict[str, Any]:
+    """Picks the encounter; with a party, its NPCs are budgeted to the party's power."""
+    if not request.party:
+        encounter = await services.generate_encounter(client, request.tags)
+        if encounter.get("type", "combat") != "combat":
+            raise HTTPException(status_code=422, detail=f"Encounter '{encounter.get('id')}' is not a combat encounter.")
+        return encounter
+
+    budget_request = {
+        "party": [member.model_dump(exclude_none=True) for member in request.party],
+        "difficulty": request.difficulty,
+        "tags": request.tags,
+        "max_npcs": request.max_npcs,
+        "seed": _seed_int(request.seed),
+    }
+    # The narrative comes from a matching encounter, the NPCs from the budget
+    narrative, budgeted = await asyncio.gather(
+        services.generate_encounter(client, request.tags),
+        services.generate_budgeted_encounter(client, budget_request),
+        return_exceptions=True
+    )
+    if isinstance(budgeted, BaseException):
+        raise budgeted
+    if isinstance(narrative, BaseException):
+        logger.warning(f"No narrative encounter for scene tags {request.tags}: {narrative}")
+        narrative = {}
+    return {
+        "id": narrative.get("id"),
+        "description": narrative.get("description"),
+        "npcs_to_spawn": budgeted.get("npcs_to_spawn", []),
+        "budget": budgeted,
+    }
+
+async def _map_stage(client: httpx.AsyncClient, request: schemas.SceneRequest) -> Dict[str, Any]:
+    return await services.generate_map(client, request.map_tags or request.tags, request.seed, request.width, request.height)
+
+async def _statblock_stage(client: httpx.AsyncClient, encounter_task: asyncio.Task) -> Dict[str, Any]:
+    """Fetches each distinct template's stat block concurrently; unknown templates are reported, not fatal."""
+    encounter = await _dependency(encounter_task, "encounter")
+    template_ids = list(dict.fromkeys(encounter.get("npcs_to_spawn", [])))
+    results = await asyncio.gather(
+        *(services.get_npc_statblock(client, template_id) for template_id in template_ids),
+        return_exceptions=True
+    )
+    statblocks, unresolved = {}, []
+    for template_id, result in zip(template_ids, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"No stat block for NPC template '{template_id}': {result}")
+            unresolved.append(template_id)
+        else:
+            statblocks[template_id] = result
+    return {"statblocks": statblocks, "unresolved_templates": unresolved}
+
+async def _spawn_stage(client: httpx.AsyncClient, request: schemas.SceneRequest,
+                       map_task: asyncio.Task, encounter_task: asyncio.Task) -> Dict[str, List[List[int]]]:
+    generated_map = await _dependency(map_task, "map")
+    encounter = await _dependency(encounter_task, "encounter")
+    return await services.find_spawn_points(
+        client,
+        generated_map.get("map_data", []),
+        num_enemy=len(encounter.get("npcs_to_spawn", [])),
+        num_player=len(request.party),
+        seed=request.seed
+    )
+
+async def _dependency(task: asyncio.Task, stage: str) -> Any:
+    """Waits for an upstream stage, turning its failure into StageSkipped."""
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        raise StageSkipped(f"Skipped because the {stage} stage failed.")
+
+def _build_bundle(results: Dict[str, Any], timings_ms: Dict[str, float]) -> schemas.SceneBundle:
+    """Pairs each NPC with a spawn point and its stat block."""
+    encounter = results["encounter"]
+    statblock_stage = results.get("statblocks") or {"statblocks": {}, "unresolved_templates": []}
+    statblocks = statblock_stage["statblocks"]
+    enemy_spawns = results["spawn_points"].get("enemy", [])
+
+    npcs = []
+    for i, template_id in enumerate(encounter.get("npcs_to_spawn", [])):
+        statblock = statblocks.get(template_id)
+        if statblock is None:
+            continue
+        coordinates = enemy_spawns[i] if i < len(enemy_spawns) else [5, 5]
+        npcs.append(schemas.SceneNpc(
+            template_id=template_id,
+            coordinates=coordinates,
+            max_hp=statblock.get("max_hp", 10),
+            behavior_tags=statblock.get("behavior_tags", ["aggressive"]),
+            statblock=statblock
+        ))
+    return schemas.SceneBundle(
+        encounter=encounter,
+        map=results["map"],
+        spawn_points=results["spawn_points"],
+        npcs=npcs,
+        unresolved_templates=statblock_stage["unresolved_templates"],
+        timings_ms=timings_ms
+    )
+
+async def assemble_scene(request: schemas.SceneRequest) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs every stage as soon as its inputs are ready and yields one event
+    per stage in completion order:
+        {"stage": name, "status": "ok", "elapsed_ms": t, "result": {...}}
+        {"stage": name, "status": "error", "elapsed_ms": t, "status_code": n, "detail": "..."}
+    followed by a final "scene" event carrying the SceneBundle, or an error
+    if the encounter, map or spawn points could not be produced.
+    Leaving the iterator early cancels the stages still running.
+    """
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        encounter_task = asyncio.create_task(_encounter_stage(client, request))
+        map_task = asyncio.create_task(_map_stage(client, request))
+        stages = {
+            encounter_task: "encounter",
+            map_task: "map",
+            asyncio.create_task(_statblock_stage(client, encounter_task)): "statblocks",
+            asyncio.create_task(_spawn_stage(client, request, map_task, encounter_task)): "spawn_points",
+        }
+        results: Dict[str, Any] = {}
+        timings_ms: Dict[str, float] = {}
+        failed: List[str] = []
+        pending = set(stages)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = stages[task]
+                    elapsed = round((time.perf_counter() - start) * 1000, 1)
+                    timings_ms[stage] = elapsed
+                    error = task.exception()
+                    if error is None:
+                        results[stage] = task.result()
+                        yield {"stage": stage, "status": "ok", "elapsed_ms": elapsed, "result": results[stage]}
+                        continue
+                    failed.append(stage)
+                    if isinstance(error, HTTPException):
+                        status_code, detail = error.status_code, error.detail
+                    elif isinstance(error, StageSkipped):
+                        status_code, detail = 424, str(error)
+                    else:
+                        logger.exception(f"Unexpected error in scene stage '{stage}'", exc_info=error)
+                        status_code, detail = 500, f"Internal error in {stage} stage: {error}"
+                    yield {"stage": stage, "status": "error", "elapsed_ms": elapsed,
+                           "status_code": status_code, "detail": detail}
+        finally:
+            for task in stages:
+                task.cancel()
+
+    timings_ms["total"] = round((time.perf_counter() - start) * 1000, 1)
+    missing = [stage for stage in REQUIRED_STAGES if stage in failed]
+    if missing:
+        yield {"stage": "scene", "status": "error", "elapsed_ms": timings_ms["total"], "status_code": 502,
+               "detail": f"Scene could not be assembled; failed stages: {', '.join(missing)}."}
+        return
+    bundle = _build_bundle(results, timings_ms)
+    yield {"stage": "scene", "status": "ok", "elapsed_ms": timings_ms["total"], "result": bundle.model_dump()}
@@ -145,3 +145,49 @@ class PlayerActionResponse(BaseModel):
     log: list[str]
     new_turn_index: int
     combat_over: bool = False
+
+# --- Scene Assembly ---
+class ScenePartyMember(BaseModel):
+    """
+    A party member for encounter budgeting: a known 'power' rating, or a
+    stat block the rules_engine rates (see encounter_generator's PartyMember).
+    """
+    power: Optional[float] = None
+    stats: Optional[Dict[str, int]] = None
+    max_hp: Optional[int] = None
+    attack_stat: Optional[str] = None
+    defense_stat: Optional[str] = None
+    damage_dice: Optional[str] = None
+    skill_rank: Optional[int] = None
+
+class SceneRequest(BaseModel):
+    """
+    Everything needed to set up a fight in one call. With a party, the
+    NPCs are budgeted to its power; without one, the matched encounter's
+    own NPC list is used.
+    """
+    tags: List[str] # Encounter tags, e.g. ["forest", "combat"]
+    map_tags: Optional[List[str]] = None # Defaults to 'tags'
+    party: List[ScenePartyMember] = []
+    difficulty: str = "medium"
+    max_npcs: int = 8
+    width: Optional[int] = None
+    height: Optional[int] = None
+    seed: Optional[str] = None # Makes the map, NPC picks and spawn points repeatable
+
+class SceneNpc(BaseModel):
+    """One NPC ready to spawn: where it goes and its generated stat block."""
+    template_id: str
+    coordinates: List[int]
+    max_hp: int
+    behavior_tags: List[str] = []
+    statblock: Dict[str, Any]
+
+class SceneBundle(BaseModel):
+    """A fully assembled scene, ready to persist through the world_engine."""
+    encounter: Dict[str, Any] # id, description, npcs_to_spawn (and the budget when a party was given)
+    map: Dict[str, Any] # The map_generator's MapGenerationResponse
+    spawn_points: Dict[str, List[List[int]]] # 'player' and 'enemy'
+    npcs: List[SceneNpc]
+    unresolved_templates: List[str] = [] # Templates the rules_engine has no stat block for
+    timings_ms: Dict[str, float] = {} # Per stage, from the start of the request, plus 'total'
@@ -11,6 +11,7 @@ import random
 RULES_ENGINE_URL = "http://127.0.0.1:8000"
 CHARACTER_ENGINE_URL = "http://127.0.0.1:8001"
 WORLD_ENGINE_URL = "http://127.0.0.1:8002"
+ENCOUNTER_GENERATOR_URL = "http://127.0.0.1:8004"
 # NPC_GENERATOR_URL REMOVED
 MAP_GENERATOR_URL = "http://127.0.0.1:8006"
 
@@ -79,6 +80,11 @@ async def roll_initiative(client: httpx.AsyncClient, endurance: int, reflexes: i
     }
     return await _call_api(client, "POST", url, json=request_data)
 
+async def resolve_batch(client: httpx.AsyncClient, operations: List[Dict[str, Any]]) -> Dict:
+    """Resolves many rolls (initiative, attacks, damage, checks) in one Rules Engine call."""
+    url = f"{RULES_ENGINE_URL}/v1/resolve/batch"
+    return await _call_api(client, "POST", url, json={"operations": operations})
+
 async def get_npc_generation_params(client: httpx.AsyncClient, template_id: str) -> Dict:
     url = f"{RULES_ENGINE_URL}/v1/lookup/npc_template/{template_id}"
     return await _call_api(client, "GET", url)
@@ -94,6 +100,34 @@ async def generate_npc_template(client: httpx.AsyncClient, generation_request: D
     url = f"{RULES_ENGINE_URL}/v1/generate/npc_template"
     return await _call_api(client, "POST", url, json=generation_request)
 
+async def get_npc_statblock(client: httpx.AsyncClient, template_id: str) -> Dict:
+    """Calls rules_engine for the stat block it generated for a template at startup."""
+    url = f"{RULES_ENGINE_URL}/v1/lookup/npc_statblock/{template_id}"
+    return await _call_api(client, "GET", url)
+
+async def generate_encounter(client: httpx.AsyncClient, tags: List[str]) -> Dict:
+    """Calls the Encounter Generator for one encounter matching all the tags."""
+    url = f"{ENCOUNTER_GENERATOR_URL}/v1/generate"
+    return await _call_api(client, "POST", url, json={"tags": tags})
+
+async def generate_budgeted_encounter(client: httpx.AsyncClient, budget_request: Dict) -> Dict:
+    """Calls the Encounter Generator for a group of NPCs that fits the party's difficulty budget."""
+    url = f"{ENCOUNTER_GENERATOR_URL}/v1/generate/budgeted"
+    return await _call_api(client, "POST", url, json=budget_request)
+
+async def generate_map(client: httpx.AsyncClient, tags: List[str], seed: Optional[str] = None, width: Optional[int] = None, height: Optional[int] = None) -> Dict:
+    """Calls the Map Generator for a new map."""
+    url = f"{MAP_GENERATOR_URL}/v1/generate"
+    payload = {"tags": tags, "seed": seed, "width": width, "height": height}
+    return await _call_api(client, "POST", url, json=payload)
+
+async def find_spawn_points(client: httpx.AsyncClient, map_data: List[List[int]], num_enemy: int, num_player: int = 0, seed: Optional[str] = None) -> Dict[str, List[List[int]]]:
+    """Calls the Map Generator to place spaced-out spawn points on an existing map."""
+    url = f"{MAP_GENERATOR_URL}/v1/spawn_points"
+    payload = {"map_data": map_data, "num_enemy": num_enemy, "num_player": num_player, "seed": seed}
+    response = await _call_api(client, "POST", url, json=payload)
+    return response.get("spawn_points", {})
+
 async def spawn_npc_in_world(client: httpx.AsyncClient, spawn_request: schemas.OrchestrationSpawnNpc) -> Dict:
     url = f"{WORLD_ENGINE_URL}/v1/npcs/spawn"
     return await _call_api(client, "POST", url, json=spawn_request.dict())
@@ -154,7 +188,8 @@ async def get_world_location_context(client: httpx.AsyncClient, location_id: int
             map_update_payload = {
                 "generated_map_data": new_map_data,
                 "map_seed": map_response.get("seed_used"),
-                "spawn_points": map_response.get("spawn_points")
+                "spawn_points": map_response.get("spawn_points"),
+                "navigation_data": map_response.get("navigation")
             }
             await _call_api(client, "PUT", f"{WORLD_ENGINE_URL}/v1/locations/{location_id}/map", json=map_update_payload)
             
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from story_engine.app import scene_handler, schemas, services
+from story_engine.app.main import app
+
+DELAY = 0.1
+
+
+def _fake_services(monkeypatch, statblock_missing=(), map_fails=False):
+    async def generate_encounter(client, tags):
+        await asyncio.sleep(DELAY)
+        return {"type": "combat", "id": "ambush", "description": "Goblins!", "npcs_to_spawn": ["goblin_scout", "goblin_scout"]}
+
+    async def generate_budgeted_encounter(client, budget_request):
+        await asyncio.sleep(DELAY)
+        return {"npcs_to_spawn": ["cultist_brute", "spiderling"], "total_power": 30.0}
+
+    async def generate_map(client, tags, seed=None, width=None, height=None):
+        await asyncio.sleep(3 * DELAY)
+        if map_fails:
+            raise HTTPException(status_code=404, detail="No algorithm")
+        return {"width": 4, "height": 4, "map_data": [[1] * 4] * 4, "seed_used": seed}
+
+    async def get_npc_statblock(client, template_id):
+        await asyncio.sleep(DELAY)
+        if template_id in statblock_missing:
+            raise HTTPException(status_code=404, detail="not found")
+        return {"generated_id": template_id, "max_hp": 21, "behavior_tags": ["charges"]}
+
+    async def find_spawn_points(client, map_data, num_enemy, num_player=0, seed=None):
+        await asyncio.sleep(DELAY / 2)
+        return {"player": [[0, i] for i in range(num_player)], "enemy": [[3, i] for i in range(num_enemy)]}
+
+    for fake in (generate_encounter, generate_budgeted_encounter, generate_map, get_npc_statblock, find_spawn_points):
+        monkeypatch.setattr(services, fake.__name__, fake)
+
+
+def _collect(request):
+    async def run():
+        return [event async for event in scene_handler.assemble_scene(request)]
+    return asyncio.run(run())
+
+
+def test_scene_stages_run_concurrently(monkeypatch):
+    _fake_services(monkeypatch)
+    events = _collect(schemas.SceneRequest(tags=["forest", "combat"], seed="s"))
+
+    assert [e["stage"] for e in events][-1] == "scene"
+    bundle = events[-1]["result"]
+    assert [npc["template_id"] for npc in bundle["npcs"]] == ["goblin_scout", "goblin_scout"]
+    assert [npc["coordinates"] for npc in bundle["npcs"]] == [[3, 0], [3, 1]]
+    # Sequential calls would take 3 + 1 + 1 + 0.5 = 5.5 delays; the slowest path is 3.5
+    assert bundle["timings_ms"]["total"] < 4.5 * DELAY * 1000
+    # Stat blocks arrive while the map is still generating
+    assert bundle["timings_ms"]["statblocks"] < bundle["timings_ms"]["map"]
+
+
+def test_scene_with_party_uses_budget_and_reports_unresolved(monkeypatch):
+    _fake_services(monkeypatch, statblock_missing=("spiderling",))
+    request = schemas.SceneRequest(tags=["cave"], party=[{"power": 20.0}, {"power": 10.0}])
+    bundle = _collect(request)[-1]["result"]
+
+    assert bundle["encounter"]["description"] == "Goblins!"
+    assert bundle["encounter"]["npcs_to_spawn"] == ["cultist_brute", "spiderling"]
+    assert [npc["template_id"] for npc in bundle["npcs"]] == ["cultist_brute"]
+    assert bundle["unresolved_templates"] == ["spiderling"]
+    assert len(bundle["spawn_points"]["player"]) == 2
+
+
+def test_scene_stream_reports_failed_stages(monkeypatch):
+    _fake_services(monkeypatch, map_fails=True)
+    with TestClient(app) as client:
+        response = client.post("/v1/scenes/stream", json={"tags": ["forest"]})
+        events = [json.loads(line) for line in response.text.splitlines()]
+        by_stage = {e["stage"]: e for e in events}
+        assert by_stage["map"]["status_code"] == 404
+        assert by_stage["spawn_points"]["status_code"] == 424
+        assert by_stage["statblocks"]["status"] == "ok"
+        assert by_stage["scene"]["status"] == "error"
+
+        assert client.post("/v1/scenes", json={"tags": ["forest"]}).status_code == 502
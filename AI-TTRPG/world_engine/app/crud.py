@@ -59,10 +59,12 @@ def update_location_map(db: Session, location_id: int, map_update: schemas.Locat
         db_loc.generated_map_data = map_update.generated_map_data
         db_loc.map_seed = map_update.map_seed
         db_loc.spawn_points = map_update.spawn_points # <-- ADD THIS
+        db_loc.navigation_data = map_update.navigation_data
 
         # This line is important for JSON fields
         flag_modified(db_loc, "generated_map_data")
         flag_modified(db_loc, "spawn_points") # <-- ADD THIS
+        flag_modified(db_loc, "navigation_data")
 
         db.commit()
         db.refresh(db_loc)
@@ -1,14 +1,15 @@
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 from contextlib import asynccontextmanager
 from alembic.config import Config as AlembicConfig
 from alembic import command as alembic_command
 
 # Import all our other files
-from . import crud, models, schemas
+from . import crud, models, schemas, tilecodec
 from .database import SessionLocal, engine, Base, DATABASE_URL # <-- Import Base and DATABASE_URL
 
 # --- NEW LIFESPAN FUNCTION ---
@@ -92,16 +93,39 @@ def read_root():
 
 # --- Location Endpoints ---
 
+def _negotiate_map_format(accept: Optional[str]):
+    try:
+        return tilecodec.negotiate(accept)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def _pack_map_data(map_data: Any, compression: str) -> Any:
+    """Packs a stored list-of-lists map; anything else is passed through untouched."""
+    if not isinstance(map_data, list) or not map_data:
+        return map_data
+    try:
+        return tilecodec.pack_rows(map_data, compression)
+    except (TypeError, ValueError) as e:
+        print(f"Warning: Stored map could not be packed, returning JSON lists: {e}")
+        return map_data
+
 @app.get("/v1/locations/{location_id}", response_model=schemas.Location)
-def read_location(location_id: int, db: Session = Depends(get_db)):
+def read_location(location_id: int, accept: Optional[str] = Header(None), db: Session = Depends(get_db)):
     """
     Get all data for a single location by its ID.
     This is the main 'get' function for the story_engine.
+    Send 'Accept: application/vnd.ttrpg.tilemap+json' to receive
+    generated_map_data in the packed tilemap/v1 form.
     """
+    media_type, compression = _negotiate_map_format(accept)
     try:
         db_loc = crud.get_location(db, location_id=location_id)
         if db_loc is None:
             raise HTTPException(status_code=404, detail="Location not found")
+        if media_type == tilecodec.PACKED_MEDIA_TYPE:
+            location = schemas.Location.model_validate(db_loc)
+            location.generated_map_data = _pack_map_data(location.generated_map_data, compression)
+            return JSONResponse(content=location.model_dump(mode="json"), media_type=tilecodec.PACKED_MEDIA_TYPE)
         return db_loc
     except HTTPException:
         raise
@@ -125,6 +149,41 @@ def update_location_ai_annotations(
         raise HTTPException(status_code=404, detail="Location not found")
     return db_loc
 
+@app.get("/v1/locations/{location_id}/map", response_model=schemas.LocationMap)
+def read_location_generated_map(location_id: int, accept: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """
+    Get only the generated map of a location.
+    JSON lists by default; 'Accept: application/vnd.ttrpg.tilemap+json' packs
+    generated_map_data, and 'Accept: application/octet-stream' returns the raw
+    tile bytes with X-Map-* headers.
+    """
+    media_type, compression = _negotiate_map_format(accept)
+    db_loc = crud.get_location(db, location_id=location_id)
+    if db_loc is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    location_map = schemas.LocationMap.model_validate(db_loc)
+    if media_type is None:
+        return location_map
+
+    if media_type == tilecodec.RAW_MEDIA_TYPE:
+        if not isinstance(location_map.generated_map_data, list) or not location_map.generated_map_data:
+            raise HTTPException(status_code=404, detail="Location has no generated map")
+        try:
+            raw, width, height, dtype = tilecodec.rows_to_buffer(location_map.generated_map_data)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=500, detail=f"Stored map cannot be encoded: {e}")
+        headers = tilecodec.raw_headers(width, height, dtype, compression)
+        if location_map.map_seed:
+            headers["X-Map-Seed"] = location_map.map_seed
+        return Response(
+            content=tilecodec.compress(raw, dtype, compression),
+            media_type=tilecodec.RAW_MEDIA_TYPE,
+            headers=headers
+        )
+
+    location_map.generated_map_data = _pack_map_data(location_map.generated_map_data, compression)
+    return JSONResponse(content=location_map.model_dump(mode="json"), media_type=tilecodec.PACKED_MEDIA_TYPE)
+
 @app.put("/v1/locations/{location_id}/map", response_model=schemas.Location)
 def update_location_generated_map(
     location_id: int,
@@ -134,7 +193,14 @@ def update_location_generated_map(
     """
     Used by the story_engine to save a procedurally generated
     map to the database, making it persistent.
+    generated_map_data may be JSON lists or a packed tilemap/v1 envelope;
+    it is always stored as JSON lists so older clients keep working.
     """
+    if tilecodec.is_packed(map_update.generated_map_data):
+        try:
+            map_update.generated_map_data = tilecodec.unpack(map_update.generated_map_data)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
     db_loc = crud.update_location_map(db, location_id, map_update)
     if db_loc is None:
         raise HTTPException(status_code=404, detail="Location not found")
@@ -68,6 +68,8 @@ class Location(Base):
     trap_instances = relationship("TrapInstance", back_populates="location") # Add this line
     ai_annotations = Column(JSON, nullable=True) # Store descriptions, interactions flags etc.
     spawn_points = Column(JSON, nullable=True) # <-- ADD THIS
+    # Walkability costs and spawn distance fields from the map_generator (packed tilemap/v1)
+    navigation_data = Column(JSON, nullable=True)
 
 class NpcInstance(Base):
     """
@@ -87,6 +87,7 @@ class LocationBase(BaseModel):
     generated_map_data: Optional[Any] = None # Can be any JSON
     map_seed: Optional[str] = None
     spawn_points: Optional[Dict[str, Any]] = None # <-- ADD THIS
+    navigation_data: Optional[Dict[str, Any]] = None # The 'navigation' block of a map_generator response
     region_id: int
 
 class Location(LocationBase):
@@ -143,8 +144,20 @@ class NpcUpdate(BaseModel):
 class ItemSpawnRequest(ItemInstanceBase):
     pass # Inherits all fields
 
+class LocationMap(BaseModel):
+    # Just the map portion of a location
+    id: int
+    generated_map_data: Optional[Any] = None # JSON lists, or a packed tilemap/v1 envelope
+    map_seed: Optional[str] = None
+    spawn_points: Optional[Dict[str, Any]] = None
+    navigation_data: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
+
 class LocationMapUpdate(BaseModel):
     # This is for saving the procedurally generated map
-    generated_map_data: Any # The tile map array
+    generated_map_data: Any # The tile map array, or a packed tilemap/v1 envelope
     map_seed: str
     spawn_points: Optional[Dict[str, Any]] = None # <-- ADD THIS
+    navigation_data: Optional[Dict[str, Any]] = None # The 'navigation' block of a map_generator response